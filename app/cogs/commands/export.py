@@ -0,0 +1,95 @@
+import os
+import tempfile
+import discord
+from typing import Literal
+from discord.ext import commands
+from discord import app_commands
+
+from statlib import logger
+from statlib.database import Period
+from statlib.database.export import Aggregation, ExportFormat, export_listening
+
+
+MAX_FILES_PER_MESSAGE: int = 10
+DEFAULT_FILESIZE_LIMIT: int = 10 * 1024 * 1024
+
+PERIODS = {
+    "today": Period.today,
+    "this_week": Period.this_week,
+    "this_month": Period.this_month,
+    "this_year": Period.this_year
+}
+
+
+def _batches(paths: list[str], limit: int) -> list[list[str]]:
+    """
+    Group files into messages of at most `MAX_FILES_PER_MESSAGE` files and `limit` bytes.
+    """
+    batches, batch, size = [], [], 0
+    for path in paths:
+        file_size = os.path.getsize(path)
+        if batch and (len(batch) >= MAX_FILES_PER_MESSAGE or size + file_size > limit):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(path)
+        size += file_size
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class Export(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @app_commands.command(
+        name="export",
+        description="Download your listening history as a compressed file."
+    )
+    @app_commands.describe(
+        period="Time range to export.",
+        aggregation="One row per listening session, or per-song totals per hour, day or month.",
+        format="File format."
+    )
+    @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
+    @app_commands.allowed_installs(guilds=True, users=True)
+    async def export(
+        self,
+        interaction: discord.Interaction,
+        period: Literal["today", "this_week", "this_month", "this_year", "all"] = "all",
+        aggregation: Literal["session", "hour", "day", "month"] = "session",
+        format: Literal["csv", "ndjson"] = "csv"
+    ) -> None:
+        await interaction.response.defer()
+
+        limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_FILESIZE_LIMIT
+
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                paths = await export_listening.aio(
+                    directory,
+                    period=PERIODS[period]() if period in PERIODS else None,
+                    aggregation=Aggregation(aggregation),
+                    export_format=ExportFormat(format),
+                    max_bytes=limit
+                )
+
+                batches = _batches(paths, limit)
+                await interaction.edit_original_response(
+                    content=f"Listening history export ({len(paths)} file(s))",
+                    attachments=[discord.File(path) for path in batches[0]]
+                )
+
+                for batch in batches[1:]:
+                    await interaction.followup.send(files=[discord.File(path) for path in batch])
+
+        except Exception as error:
+            logger.error(error)
+            await interaction.edit_original_response(
+                content="Something went wrong. Please try again later."
+            )
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Export(bot))
@@ -1,11 +1,11 @@
 import io
-import calendar
 import discord
 import matplotlib.pyplot as plt
 from discord.ext import commands
 from discord import app_commands
 
-from statlib.database.handlers import StatsHandler, TracksHandler
+from statlib.database import Period, Granularity, listening_snapshot
+from statlib.database.handlers import ReportHandler
 from statlib import logger, EMBED_COLOR, get_artist_image, get_track_image
 
 
@@ -23,12 +23,18 @@ class Monthly(commands.Cog):
         await interaction.response.defer()
 
         try:
-            summary = StatsHandler.get_this_month()
-            minutes = round(summary.total_seconds / 60)
+            period = Period.this_month()
 
-            top_tracks = TracksHandler.get_top_tracks_month()
-            top_artists = TracksHandler.get_top_artists_month()
-            daily = StatsHandler.get_this_month_daily_breakdown()
+            if listening_snapshot.covers(period):
+                report = listening_snapshot.report(period, Granularity.DAY)
+            else:
+                report = await ReportHandler.get_report.aio(period, Granularity.DAY)
+
+            minutes = round(report.total_seconds / 60)
+
+            top_tracks = report.top_tracks
+            top_artists = report.top_artists
+            daily = report.breakdown
 
             embed = discord.Embed(
                 title="Monthly Listening Stats",
@@ -57,22 +63,12 @@ class Monthly(commands.Cog):
 
             if not thumbnail and top_tracks:
                 track = top_tracks[0]
-                thumbnail = await get_track_image(track.track_name, "")
+                thumbnail = await get_track_image(track.track_name, track.artist_name or "")
 
             if thumbnail:
                 embed.set_thumbnail(url=thumbnail)
 
-            year = summary.timestamp.year if hasattr(summary, "timestamp") else None
-            month = summary.timestamp.month if hasattr(summary, "timestamp") else None
-
-            if not year or not month:
-                from datetime import datetime
-                now = datetime.now()
-                year = now.year
-                month = now.month
-
-            days_in_month = calendar.monthrange(year, month)[1]
-            days = list(range(1, days_in_month + 1))
+            days = list(range(1, len(daily) + 1))
 
             plt.style.use("https://github.com/dhaitz/matplotlib-stylesheets/raw/master/pitayasmoothie-dark.mplstyle")
             fig, ax = plt.subplots(figsize=(14, 4))
@@ -5,7 +5,8 @@ from discord.ext import commands
 from discord import app_commands
 
 from statlib import logger, EMBED_COLOR, get_artist_image, get_track_image
-from statlib.database.handlers import StatsHandler, TracksHandler
+from statlib.database import Period, Granularity, listening_snapshot
+from statlib.database.handlers import ReportHandler
 from statlib.api import get_now_playing
 
 
@@ -23,13 +24,19 @@ class Overview(commands.Cog):
         await interaction.response.defer()
 
         try:
-            summary = StatsHandler.get_this_year()
-            minutes = round(summary.total_seconds / 60)
+            period = Period.this_year()
 
-            top_tracks = TracksHandler.get_top_tracks_year()
-            top_artists = TracksHandler.get_top_artists_year()
+            if listening_snapshot.covers(period):
+                report = listening_snapshot.report(period, Granularity.MONTH)
+            else:
+                report = await ReportHandler.get_report.aio(period, Granularity.MONTH)
 
-            monthly = StatsHandler.get_this_year_monthly_breakdown()
+            minutes = round(report.total_seconds / 60)
+
+            top_tracks = report.top_tracks
+            top_artists = report.top_artists
+
+            monthly = report.breakdown
             months = [
                 "Jan","Feb","Mar","Apr","May","Jun",
                 "Jul","Aug","Sep","Oct","Nov","Dec"
@@ -85,7 +92,7 @@ class Overview(commands.Cog):
 
             if not thumbnail and top_tracks:
                 track = top_tracks[0]
-                thumbnail = await get_track_image(track.track_name, "")
+                thumbnail = await get_track_image(track.track_name, track.artist_name or "")
 
             if thumbnail:
                 embed.set_thumbnail(url=thumbnail)
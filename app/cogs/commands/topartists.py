@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
+from statlib.database import leaderboards
 from statlib.database.handlers import TracksHandler
 from statlib import logger, EMBED_COLOR, get_artist_image
 
@@ -20,7 +21,10 @@ class TopArtists(commands.Cog):
         await interaction.response.defer()
         
         try:
-            top_artists = TracksHandler.get_top_artists(limit=10)
+            if leaderboards.seeded:
+                top_artists = leaderboards.top_artists(limit=10)
+            else:
+                top_artists = await TracksHandler.get_top_artists.aio(limit=10)
 
             embed = discord.Embed(
                 title="Top Artists",
@@ -1,80 +1,132 @@
+import time
 import discord
+from typing import Literal
 from discord.ext import commands
 from discord import app_commands
 
-from statlib.database.handlers import TracksHandler
-from statlib import logger, EMBED_COLOR, get_artist_image, get_artist_genres
+from statlib.database import Period, leaderboards
+from statlib.genres import GenreProgress, aggregate_genres
+from statlib.database.handlers import GenreHandler, TracksHandler
+from statlib import logger, EMBED_COLOR, get_artist_image
+
+
+EDIT_INTERVAL: float = 1.5
+
+PERIODS = {
+    "today": Period.today,
+    "this_week": Period.this_week,
+    "this_month": Period.this_month,
+    "this_year": Period.this_year
+}
 
 
 class TopGenres(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
+    @staticmethod
+    def build_embed(progress: GenreProgress, thumbnail: str | None, description: str = "Most listened-to genres") -> discord.Embed:
+        embed = discord.Embed(
+            title="Top Genres",
+            description=description,
+            color=EMBED_COLOR
+        )
+
+        lines = [
+            f"`{i+1}.` {genre} - `{round(seconds / 60)} min`"
+            for i, (genre, seconds) in enumerate(progress.ranking)
+        ]
+        embed.add_field(
+            name="Genre Rankings",
+            value="\n".join(lines) or "Resolving genres...",
+            inline=False
+        )
+
+        if not progress.settled:
+            embed.set_footer(text=f"Resolving genres... {progress.resolved}/{progress.artists} artists")
+        elif progress.resolved < progress.artists:
+            embed.set_footer(text=f"Based on the top {progress.resolved} of {progress.artists} artists")
+
+        if thumbnail:
+            embed.set_thumbnail(url=thumbnail)
+
+        return embed
+
     @app_commands.command(
         name="topgenres",
         description="Show your most listened-to music genres."
     )
+    @app_commands.describe(period="Time range to rank.")
     @app_commands.allowed_contexts(guilds=True, dms=True, private_channels=True)
     @app_commands.allowed_installs(guilds=True, users=True)
-    async def topgenres(self, interaction: discord.Interaction) -> None:
+    async def topgenres(
+        self,
+        interaction: discord.Interaction,
+        period: Literal["today", "this_week", "this_month", "this_year", "all"] = "all"
+    ) -> None:
         await interaction.response.defer()
         
         try:
-            artist_totals = TracksHandler.get_artist_totals()
+            scoped = PERIODS[period]() if period in PERIODS else None
+            top_genres = await GenreHandler.get_top_genres.aio(scoped, 10)
+
+            if top_genres or scoped:
+                if scoped:
+                    top_artists = await TracksHandler.get_top_artists_between.aio(scoped, 1)
+                elif leaderboards.seeded:
+                    top_artists = leaderboards.top_artists(limit=1)
+                else:
+                    top_artists = await TracksHandler.get_top_artists.aio(limit=1)
+
+                if not top_genres:
+                    await interaction.followup.send("No genre data available for this period yet.")
+                    return
+
+                progress = GenreProgress(
+                    ranking=[(genre.genre_name, genre.total_seconds) for genre in top_genres],
+                    resolved=0,
+                    artists=0,
+                    remaining_seconds=0.0,
+                    settled=True
+                )
+                thumbnail = await get_artist_image(top_artists[0].artist_name) if top_artists else None
+                description = f"Most listened-to genres {period.replace('_', ' ')}" if scoped else "Most listened-to genres"
+
+                await interaction.edit_original_response(embed=self.build_embed(progress, thumbnail, description))
+                return
+
+            # Genres have not been enriched yet, resolve them from Spotify
+            if leaderboards.seeded:
+                artist_totals = leaderboards.artist_totals()
+            else:
+                artist_totals = await TracksHandler.get_artist_totals.aio()
 
             if not artist_totals:
                 await interaction.followup.send("No listening data available.")
                 return
 
-            genre_map = {}
+            thumbnail = await get_artist_image(artist_totals[0][0])
 
-            for artist, total_seconds in artist_totals:
-                genres = await get_artist_genres(artist)
+            progress = None
+            last_edit = time.monotonic()
 
-                for genre in genres:
-                    genre_map[genre] = genre_map.get(genre, 0) + total_seconds
+            async for progress in aggregate_genres(artist_totals, limit=10):
+                if progress.ranking and not progress.settled and time.monotonic() - last_edit >= EDIT_INTERVAL:
+                    await interaction.edit_original_response(embed=self.build_embed(progress, thumbnail))
+                    last_edit = time.monotonic()
 
-            if not genre_map:
+            if progress is None or not progress.ranking:
                 await interaction.followup.send("No genres could be resolved from Spotify.")
                 return
 
-            sorted_genres = sorted(
-                genre_map.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-
-            top_genres = sorted_genres[:10]
-
-            embed = discord.Embed(
-                title="Top Genres",
-                description="Most listened-to genres",
-                color=EMBED_COLOR
-            )
-
-            lines = [
-                f"`{i+1}.` {genre} - `{round(seconds / 60)} min`"
-                for i, (genre, seconds) in enumerate(top_genres)
-            ]
-            embed.add_field(
-                name="Genre Rankings",
-                value="\n".join(lines),
-                inline=False
-            )
-
-            top_artist = artist_totals[0][0]
-            thumb = await get_artist_image(top_artist)
-            if thumb:
-                embed.set_thumbnail(url=thumb)
-
-            await interaction.edit_original_response(embed=embed)
+            await interaction.edit_original_response(embed=self.build_embed(progress, thumbnail))
 
         except Exception as error:
             logger.error(error)
             await interaction.edit_original_response(
-                "Something went wrong. Please try again later."
+                content="Something went wrong. Please try again later."
             )
 
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(TopGenres(bot))
\ No newline at end of file
+    await bot.add_cog(TopGenres(bot))
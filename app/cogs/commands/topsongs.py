@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
+from statlib.database import leaderboards
 from statlib.database.handlers import TracksHandler
 from statlib import logger, EMBED_COLOR, get_track_image
 
@@ -20,7 +21,10 @@ class TopSongs(commands.Cog):
         await interaction.response.defer()
         
         try:
-            top_tracks = TracksHandler.get_top_tracks(limit=10)
+            if leaderboards.seeded:
+                top_tracks = leaderboards.top_tracks(limit=10)
+            else:
+                top_tracks = await TracksHandler.get_top_tracks.aio(limit=10)
 
             embed = discord.Embed(
                 title="Top Songs",
@@ -39,7 +43,7 @@ class TopSongs(commands.Cog):
                     inline=False
                 )
 
-                thumbnail = await get_track_image(top_tracks[0].track_name, "")
+                thumbnail = await get_track_image(top_tracks[0].track_name, top_tracks[0].artist_name or "")
                 if thumbnail:
                     embed.set_thumbnail(url=thumbnail)
 
@@ -4,7 +4,8 @@ import matplotlib.pyplot as plt
 from discord.ext import commands
 from discord import app_commands
 
-from statlib.database.handlers import StatsHandler, TracksHandler
+from statlib.database import Period, Granularity, listening_snapshot
+from statlib.database.handlers import ReportHandler
 from statlib import logger, EMBED_COLOR, get_artist_image, get_track_image
 
 
@@ -22,12 +23,18 @@ class Weekly(commands.Cog):
         await interaction.response.defer()
 
         try:
-            summary = StatsHandler.get_this_week()
-            minutes = round(summary.total_seconds / 60)
+            period = Period.this_week()
 
-            top_tracks = TracksHandler.get_top_tracks_week()
-            top_artists = TracksHandler.get_top_artists_week()
-            daily = StatsHandler.get_this_week_daily_breakdown()
+            if listening_snapshot.covers(period):
+                report = listening_snapshot.report(period, Granularity.WEEKDAY)
+            else:
+                report = await ReportHandler.get_report.aio(period, Granularity.WEEKDAY)
+
+            minutes = round(report.total_seconds / 60)
+
+            top_tracks = report.top_tracks
+            top_artists = report.top_artists
+            daily = report.breakdown
 
             most_day_index = max(range(len(daily)), key=lambda i: daily[i])
             weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -60,7 +67,7 @@ class Weekly(commands.Cog):
 
             if not thumbnail and top_tracks:
                 track = top_tracks[0]
-                thumbnail = await get_track_image(track.track_name, "")
+                thumbnail = await get_track_image(track.track_name, track.artist_name or "")
 
             if thumbnail:
                 embed.set_thumbnail(url=thumbnail)
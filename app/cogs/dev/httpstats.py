@@ -0,0 +1,35 @@
+from discord.ext import commands
+
+from statlib.api import session_stats, recent_timings, coalescer
+
+
+class HttpStats(commands.Cog):
+    def __init__(self, client):
+        self.client: commands.Bot = client
+
+    @commands.command()
+    @commands.is_owner()
+    async def httpstats(self, ctx: commands.Context, count: int = 10):
+        """
+        Show shared HTTP session counters and the most recent request timings.
+        """
+        stats = session_stats()
+        coalescing = coalescer.stats()
+        average = stats.request_seconds / stats.requests * 1000 if stats.requests else 0.0
+
+        lines = [
+            f"requests {stats.requests}, reused {stats.reused}, connections {stats.connections}, "
+            f"dns cache hits {stats.dns_cache_hits}, errors {stats.errors}, avg {average:.0f}ms",
+            f"coalesced {coalescing.coalesced} of {coalescing.requests} uncached calls, {coalescing.in_flight} in flight"
+        ]
+        for timing in recent_timings()[-count:]:
+            lines.append(
+                f"{timing.method} {timing.host}{timing.path} {timing.status} {timing.seconds * 1000:.0f}ms "
+                f"{'reused' if timing.reused else f'connect {timing.connect_seconds * 1000:.0f}ms'}"
+            )
+
+        await ctx.reply("```\n" + "\n".join(lines)[:1900] + "\n```")
+
+
+async def setup(client: commands.Bot) -> None:
+    await client.add_cog(HttpStats(client))
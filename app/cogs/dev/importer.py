@@ -0,0 +1,56 @@
+import os
+import glob
+import tempfile
+from discord.ext import commands
+
+from statlib import logger
+from statlib.database import refresh_snapshot
+from statlib.database.importer import import_history
+
+
+class Importer(commands.Cog):
+    def __init__(self, client):
+        self.client: commands.Bot = client
+
+    @commands.command(name="import")
+    @commands.is_owner()
+    async def import_(self, ctx: commands.Context, pattern: str = "Streaming_History_Audio_*.json"):
+        """
+        Import Spotify extended streaming history from attached files,
+        or from files on the bot's host matching `pattern`.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for attachment in ctx.message.attachments:
+                path = os.path.join(directory, os.path.basename(attachment.filename))
+                await attachment.save(path)
+                paths.append(path)
+
+            if not paths:
+                paths = sorted(glob.glob(pattern))
+
+            if not paths:
+                await ctx.reply('`❌ No streaming history files found.`')
+                return
+
+            message = await ctx.reply(f'`⏳ Importing {len(paths)} file(s)...`')
+
+            try:
+                stats = await import_history.aio(paths)
+                await refresh_snapshot.aio()
+
+            except Exception as error:
+                logger.error(f"Import failed: {error}")
+                await message.edit(content=f'`❌ Import failed: {error}`')
+                return
+
+        await message.edit(
+            content=(
+                f'`✅ Imported {stats.inserted:,} rows from {stats.records:,} records in {stats.seconds:.1f}s '
+                f'({stats.rate:,.0f} records/s, {stats.duplicates:,} duplicates, {stats.skipped:,} skipped).`'
+            )
+        )
+
+
+async def setup(client: commands.Bot) -> None:
+    await client.add_cog(Importer(client))
@@ -0,0 +1,58 @@
+from datetime import datetime
+from discord.ext import tasks, commands
+
+from statlib import logger
+from statlib.api import Priority
+from statlib.metadata import METADATA_TTL, metadata_store
+from statlib.database.handlers import GenreHandler
+
+
+ENRICH_BATCH: int = 500
+
+
+class Enrichment(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.enrichment_loop.start()
+
+    async def cog_unload(self):
+        self.enrichment_loop.cancel()
+
+    @tasks.loop(hours=1)
+    async def enrichment_loop(self):
+        """
+        Fetch genres for artists that have none yet or whose genres are older
+        than the metadata TTL, and move their listening into the genre rollup.
+        """
+        try:
+            enriched = changed = 0
+
+            while True:
+                artists = await GenreHandler.get_artists_to_enrich.aio(datetime.now() - METADATA_TTL, ENRICH_BATCH)
+                if not artists:
+                    break
+
+                metadata = await metadata_store.artists([name for _, name in artists], Priority.BACKGROUND)
+                genres = {artist_id: metadata[name].genres for artist_id, name in artists if name in metadata}
+                if not genres:
+                    break
+
+                changed += await GenreHandler.set_artist_genres.aio(genres)
+                enriched += len(genres)
+
+                if len(genres) < len(artists) or len(artists) < ENRICH_BATCH:
+                    break
+
+            if enriched:
+                logger.info(f"Enriched genres of {enriched} artists, {changed} changed")
+
+        except Exception as error:
+            logger.error(f"Genre enrichment failed: {error}")
+
+    @enrichment_loop.before_loop
+    async def before_loop(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Enrichment(bot))
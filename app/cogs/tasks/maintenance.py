@@ -0,0 +1,46 @@
+from discord.ext import tasks, commands
+
+from statlib import logger
+from statlib.database import get_pool, refresh_snapshot
+from statlib.database.handlers import ArchiveHandler, PartitionHandler
+
+
+class Maintenance(commands.Cog):
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.maintenance_loop.start()
+        self.reap_loop.start()
+
+    async def cog_unload(self):
+        self.maintenance_loop.cancel()
+        self.reap_loop.cancel()
+
+    @tasks.loop(hours=24)
+    async def maintenance_loop(self):
+        try:
+            await PartitionHandler.ensure_partitions.aio()
+
+            archived = await ArchiveHandler.archive_expired.aio()
+            if archived:
+                await refresh_snapshot.aio()
+
+        except Exception as error:
+            logger.error(f"Database maintenance failed: {error}")
+
+    @tasks.loop(minutes=5)
+    async def reap_loop(self):
+        try:
+            reaped = get_pool().reap()
+            if reaped:
+                logger.debug(f"Closed {reaped} idle database connections")
+
+        except Exception as error:
+            logger.error(f"Reaping idle database connections failed: {error}")
+
+    @maintenance_loop.before_loop
+    async def before_loop(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Maintenance(bot))
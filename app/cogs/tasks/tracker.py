@@ -1,9 +1,18 @@
-import asyncio
 import time
+import asyncio
+from datetime import datetime, timedelta
 from discord.ext import tasks, commands
 
-from statlib.api import get_now_playing
-from statlib.database.handlers import ListeningHandler
+from statlib import logger
+from statlib.api import Priority, get_now_playing
+from statlib.backfill import backfill_recently_played
+from statlib.database import listening_buffer, refresh_snapshot, ListeningSession
+from statlib.database.handlers.listening import SESSION_MAX_SECONDS
+from statlib.database.handlers.rollups import hour_start
+
+
+GAP_SECONDS: float = 30
+BACKFILL_COOLDOWN: float = 120
 
 
 class Tracker(commands.Cog):
@@ -13,14 +22,97 @@ class Tracker(commands.Cog):
         self.last_track = None
         self.last_artist = None
         self.last_timestamp = None
+        self.session: ListeningSession | None = None
+        self.buffer = listening_buffer
+        self.backfill_task: asyncio.Task | None = None
+        self.last_backfill: float | None = None
         self.track_loop.start()
 
+    async def cog_unload(self):
+        self.track_loop.cancel()
+        if self.backfill_task is not None:
+            self.backfill_task.cancel()
+        self.close_session()
+        await self.buffer.flush()
+
+    def close_session(self) -> None:
+        """
+        Queue the open session for writing, if there is one.
+        """
+        if self.session is not None and self.session.duration > 0:
+            self.buffer.add(self.session)
+
+        self.session = None
+
+    def extend_session(
+        self,
+        track: str,
+        artist: str,
+        delta: float,
+        track_id: str | None = None,
+        artist_id: str | None = None
+    ) -> None:
+        """
+        Add `delta` seconds of playback to the open session for (track, artist).
+
+        A new session is started when the track changed, the open session
+        reached SESSION_MAX_SECONDS, or playback crossed into a new hour.
+        """
+        now = datetime.now()
+        session = self.session
+
+        if (
+            session is None
+            or session.track_name != track
+            or session.artist_name != artist
+            or (now - session.started_at).total_seconds() >= SESSION_MAX_SECONDS
+            or hour_start(now) != hour_start(session.started_at)
+        ):
+            self.close_session()
+            started_at = max(now - timedelta(seconds=delta), hour_start(now))
+            session = self.session = ListeningSession(
+                track, artist, started_at, now, track_spotify_id=track_id, artist_spotify_id=artist_id
+            )
+
+        session.ended_at = now
+        session.duration += delta
+
+    def request_backfill(self) -> None:
+        """
+        Recover plays missed during a gap from the recently-played history in
+        the background, unless a backfill is running or ran within BACKFILL_COOLDOWN.
+        """
+        if self.backfill_task is not None and not self.backfill_task.done():
+            return
+        if self.last_backfill is not None and time.monotonic() - self.last_backfill < BACKFILL_COOLDOWN:
+            return
+
+        self.last_backfill = time.monotonic()
+        self.backfill_task = asyncio.create_task(self.backfill())
+
+    async def backfill(self) -> None:
+        try:
+            await self.buffer.flush()
+            stats = await backfill_recently_played(Priority.TRACKER)
+            if stats.inserted:
+                await refresh_snapshot.aio()
+
+        except Exception as error:
+            logger.error(f"Recently-played backfill failed: {error}")
+
     @tasks.loop(seconds=5)
     async def track_loop(self):
-        data = await get_now_playing()
+        self.buffer.flush_soon()
+
+        data = await get_now_playing(priority=Priority.TRACKER)
         now = time.time()
 
+        if self.last_timestamp is not None and now - self.last_timestamp > GAP_SECONDS:
+            self.close_session()
+            self.request_backfill()
+
         if not data:
+            self.close_session()
             self.last_progress = None
             self.last_track = None
             self.last_artist = None
@@ -33,6 +125,7 @@ class Tracker(commands.Cog):
         is_playing = data["is_playing"]
 
         if not is_playing:
+            self.close_session()
             self.last_progress = progress
             self.last_timestamp = now
             return
@@ -45,7 +138,14 @@ class Tracker(commands.Cog):
             real_delta = (progress - self.last_progress) / 1000
 
             if 0 < real_delta <= 15:
-                ListeningHandler.insert_entry(track, artist, real_delta)
+                self.extend_session(track, artist, real_delta, data.get("track_id"), data.get("artist_id"))
+            else:
+                self.close_session()
+                if real_delta > 15:
+                    self.request_backfill()
+
+        else:
+            self.close_session()
 
         self.last_track = track
         self.last_artist = artist
@@ -55,7 +155,8 @@ class Tracker(commands.Cog):
     @track_loop.before_loop
     async def before_loop(self):
         await self.bot.wait_until_ready()
+        self.request_backfill()
 
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(Tracker(bot))
\ No newline at end of file
+    await bot.add_cog(Tracker(bot))
@@ -3,6 +3,11 @@ import discord
 from discord.ext import commands
 
 from statlib import logger
+from statlib.api import open_session, close_session, token_manager, scheduler, api_cache
+from statlib.database import (
+    close_pool, shutdown_executor, migrate, listening_buffer, listening_snapshot, refresh_snapshot,
+    seed_leaderboards
+)
 
 intents = discord.Intents.all()
 intents.message_content = True
@@ -20,6 +25,32 @@ class Client(commands.AutoShardedBot):
 
 
     async def setup_hook(self):
+        await open_session()
+        api_cache.start_sweeper()
+
+        try:
+            await token_manager.start()
+
+        except Exception as error:
+            logger.error(f"Failed to fetch Spotify access token, retrying on first request: {error}")
+
+        version = await migrate.aio()
+        logger.info(f"Database schema at version {version}")
+
+        try:
+            await refresh_snapshot.aio()
+            listening_buffer.on_flush(refresh_snapshot.aio)
+            logger.info(f"Loaded listening snapshot ({len(listening_snapshot)} rows)")
+
+        except Exception as error:
+            logger.error(f"Failed to load listening snapshot, falling back to queries: {error}")
+
+        try:
+            await seed_leaderboards.aio()
+
+        except Exception as error:
+            logger.error(f"Failed to seed leaderboards, falling back to queries: {error}")
+
         for folder in os.listdir("app/cogs"):
             for cog in os.listdir(f"app/cogs/{folder}"):
                 if cog.endswith(".py"):
@@ -31,5 +62,19 @@ class Client(commands.AutoShardedBot):
                         logger.warning(f"Failed to load {cog[:-3]}")
 
 
+    async def close(self):
+        await super().close()
+
+        await api_cache.stop()
+        await scheduler.stop()
+        await token_manager.stop()
+        await close_session()
+        logger.info("Closed HTTP session")
+
+        shutdown_executor()
+        close_pool()
+        logger.info("Closed database connections")
+
+
     async def on_ready(self):
         logger.info(f'Logged in as {self.user} (ID: {self.user.id})')
\ No newline at end of file
@@ -1,12 +1,39 @@
-from .api import spotify_request, get_now_playing
-from .auth import get_access_token, refresh_access_token
-from .cache import set_cache, get_cache
+from .api import spotify_request, get_now_playing, get_recently_played
+from .auth import TokenManager, token_manager, get_access_token, refresh_access_token
+from .cache import MISSING, CacheStats, TTLCache, api_cache, set_cache, get_cache
+from .scheduler import Priority, RequestScheduler, SchedulerStats, scheduler
+from .coalesce import Coalescer, CoalescerStats, coalescer, normalize_endpoint
+from .session import (
+    RequestTiming, SessionStats, open_session, get_session, close_session, session_stats, recent_timings
+)
 
 __all__ = [
     "spotify_request",
     "get_now_playing",
+    "get_recently_played",
     "get_access_token",
     "refresh_access_token",
+    "TokenManager",
+    "token_manager",
+    "Priority",
+    "RequestScheduler",
+    "SchedulerStats",
+    "scheduler",
     "set_cache",
-    "get_cache"
+    "get_cache",
+    "MISSING",
+    "CacheStats",
+    "TTLCache",
+    "api_cache",
+    "Coalescer",
+    "CoalescerStats",
+    "coalescer",
+    "normalize_endpoint",
+    "RequestTiming",
+    "SessionStats",
+    "open_session",
+    "get_session",
+    "close_session",
+    "session_stats",
+    "recent_timings"
 ]
\ No newline at end of file
@@ -1,46 +1,121 @@
-import aiohttp
 from typing import Optional, Dict, Any
 
-from .auth import get_access_token, refresh_access_token
-from .cache import get_cache, set_cache
+from statlib.logging import logger
 
+from .auth import token_manager
+from .cache import MISSING, api_cache
+from .session import get_session
+from .coalesce import coalescer, normalize_endpoint
+from .scheduler import Priority, scheduler
 
-async def spotify_request(endpoint: str, cache_ttl: int = 5) -> Optional[Dict[str, Any]]:
-    """
-    Send a request to the Spotify Web API with caching and auto-refresh token logic.
 
-    :param endpoint: The Spotify API endpoint, e.g., '/v1/me/player/currently-playing'.
-    :param cache_ttl: Number of seconds to cache the response.
-    :return: Parsed JSON response or None.
-    """
-    cached = get_cache(endpoint)
-    if cached:
-        return cached
+MAX_AUTH_RETRIES: int = 1
+MAX_RATE_LIMIT_RETRIES: int = 2
+MAX_RETRY_AFTER: float = 30.0
+
+
+def _retry_after(value: str | None) -> float:
+    try:
+        return max(float(value), 1.0)
+    except (TypeError, ValueError):
+        return 1.0
+
 
-    token = await get_access_token()
+async def _fetch(endpoint: str, cache_ttl: float, stale_ttl: float, priority: Priority) -> Optional[Dict[str, Any]]:
+    """
+    Request `endpoint` and cache a successful response.
+    """
     url = f"https://api.spotify.com{endpoint}"
+    session = await get_session()
+
+    auth_retries = rate_limit_retries = 0
+
+    while True:
+        if scheduler.paused_for() > MAX_RETRY_AFTER:
+            logger.warning(f"Skipping {endpoint}, Spotify requests are paused")
+            return None
+
+        token = await token_manager.get_token()
+        if token is None:
+            return None
+
+        await scheduler.acquire(priority)
 
-    async with aiohttp.ClientSession() as session:
         async with session.get(url, headers={"Authorization": f"Bearer {token}"}) as resp:
             if resp.status == 401:
-                await refresh_access_token()
-                return await spotify_request(endpoint, cache_ttl)
+                token_manager.invalidate(token)
+                auth_retries += 1
+                if auth_retries > MAX_AUTH_RETRIES:
+                    logger.error(f"Spotify rejected the access token for {endpoint}")
+                    return None
+                continue
+
+            if resp.status == 429:
+                scheduler.pause(_retry_after(resp.headers.get("Retry-After")))
+                rate_limit_retries += 1
+                if rate_limit_retries > MAX_RATE_LIMIT_RETRIES:
+                    return None
+                continue
 
             if resp.status == 204:
+                api_cache.set(endpoint, None, cache_ttl)
+                return None
+
+            if resp.status != 200:
+                logger.warning(f"Spotify returned {resp.status} for {endpoint}")
                 return None
 
             data = await resp.json()
-            set_cache(endpoint, data, cache_ttl)
+            api_cache.set(endpoint, data, cache_ttl, stale_ttl)
             return data
 
 
-async def get_now_playing() -> Optional[Dict[str, Any]]:
+async def spotify_request(
+    endpoint: str,
+    cache_ttl: int = 5,
+    priority: Priority = Priority.INTERACTIVE,
+    stale_ttl: int = 0
+) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to the Spotify Web API with caching and auto-refresh token logic.
+
+    Requests go through the shared scheduler, which limits the request rate
+    and serves the tracker before commands and commands before background
+    work. A 429 pauses all requests for its `Retry-After`; the request is
+    retried if the wait is short, and given up on otherwise.
+
+    With a `stale_ttl`, an expired response is still returned for that long
+    while a background request refreshes it. Concurrent calls for the same
+    normalized endpoint share one request.
+
+    :param endpoint: The Spotify API endpoint, e.g., '/v1/me/player/currently-playing'.
+    :param cache_ttl: Number of seconds to cache the response.
+    :param priority: Priority class of the request.
+    :param stale_ttl: Seconds an expired response may be served while it is refreshed.
+    :return: Parsed JSON response or None.
+    """
+    endpoint = normalize_endpoint(endpoint)
+
+    cached, fresh = api_cache.lookup(endpoint)
+    if cached is not MISSING:
+        if not fresh:
+            api_cache.refresh(
+                endpoint,
+                lambda: coalescer.run(endpoint, lambda: _fetch(endpoint, cache_ttl, stale_ttl, Priority.BACKGROUND))
+            )
+        return cached
+
+    return await coalescer.run(endpoint, lambda: _fetch(endpoint, cache_ttl, stale_ttl, priority))
+
+
+async def get_now_playing(priority: Priority = Priority.INTERACTIVE) -> Optional[Dict[str, Any]]:
     """
     Retrieve detailed data about the currently playing Spotify track.
 
+    :param priority: Priority class of the request.
     :return: A dictionary containing track details, playback state, and progress, or None.
     """
-    data = await spotify_request("/v1/me/player/currently-playing", cache_ttl=1)
+    data = await spotify_request("/v1/me/player/currently-playing", cache_ttl=1, priority=priority)
 
     if not data or "item" not in data:
         return None
@@ -50,8 +125,29 @@ async def get_now_playing() -> Optional[Dict[str, Any]]:
     return {
         "track": item["name"],
         "artist": item["artists"][0]["name"],
+        "track_id": item.get("id"),
+        "artist_id": item["artists"][0].get("id"),
         "url": item["external_urls"]["spotify"],
         "thumbnail": item["album"]["images"][0]["url"],
         "progress_ms": data.get("progress_ms", 0),
         "is_playing": data.get("is_playing", False)
-    }
\ No newline at end of file
+    }
+
+async def get_recently_played(
+    after: int | None = None,
+    limit: int = 50,
+    priority: Priority = Priority.BACKGROUND
+) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve one page of recently played tracks.
+
+    :param after: Unix timestamp in milliseconds; only plays after it are returned.
+    :param limit: Plays per page, at most 50.
+    :param priority: Priority class of the request.
+    :return: The raw response with `items` and `cursors`, or None.
+    """
+    endpoint = f"/v1/me/player/recently-played?limit={limit}"
+    if after is not None:
+        endpoint += f"&after={after}"
+
+    return await spotify_request(endpoint, cache_ttl=0, priority=priority)
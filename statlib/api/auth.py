@@ -1,57 +1,192 @@
+import time
 import base64
+import asyncio
 import aiohttp
 
 from statlib import CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN
 from statlib.logging import logger
+from .session import get_session
 
 
-_access_token = None
+TOKEN_URL: str = "https://accounts.spotify.com/api/token"
 
-async def refresh_access_token():
+
+class TokenManager:
     """
-    Request a new Spotify access token using the stored refresh token.
+    Keeps a Spotify access token valid ahead of time.
 
-    :return: The new access token string, or None if the request fails.
+    The token's `expires_in` is tracked, and a background task refreshes it
+    `refresh_margin` seconds before it lapses, so requests normally never
+    wait on the accounts service. Concurrent callers that do need a refresh
+    share one in-flight request, and each refresh makes at most
+    `max_attempts` attempts.
+
+    :param refresh_margin: Seconds before expiry to refresh the token.
+    :param max_attempts: Attempts per refresh before giving up.
+    :param retry_delay: Base delay between attempts, doubled after each one.
     """
-    global _access_token
 
-    auth_header = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
+    def __init__(self, refresh_margin: float = 300, max_attempts: int = 3, retry_delay: float = 1.0) -> None:
+        self.refresh_margin = refresh_margin
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._token: str | None = None
+        self._expires_at: float = 0.0
+        self._inflight: asyncio.Task | None = None
+        self._background: asyncio.Task | None = None
+
+
+    @property
+    def expires_in(self) -> float:
+        """
+        Seconds until the current token expires, 0 if there is none.
+        """
+        return max(self._expires_at - time.monotonic(), 0.0)
+
+
+    def _valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+
+    async def _request(self) -> tuple[str, float] | None:
+        """
+        Request a new token, retrying network errors and server errors.
+
+        :return: (token, expires_in), or None if the refresh failed.
+        """
+        auth_header = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://accounts.spotify.com/api/token",
-            data={
-                "grant_type": "refresh_token",
-                "refresh_token": REFRESH_TOKEN
-            },
-            headers={
-                "Authorization": f"Basic {auth_header}",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-        ) as resp:
+        for attempt in range(self.max_attempts):
+            if attempt:
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
 
-            data = await resp.json()
+            try:
+                session = await get_session()
+                async with session.post(
+                    TOKEN_URL,
+                    data={
+                        "grant_type": "refresh_token",
+                        "refresh_token": REFRESH_TOKEN
+                    },
+                    headers={
+                        "Authorization": f"Basic {auth_header}",
+                        "Content-Type": "application/x-www-form-urlencoded"
+                    }
+                ) as resp:
+                    if resp.status >= 500 or resp.status == 429:
+                        logger.warning(f"Spotify token refresh returned {resp.status}, attempt {attempt + 1}")
+                        continue
+
+                    data = await resp.json()
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                logger.warning(f"Spotify token refresh failed: {error!r}, attempt {attempt + 1}")
+                continue
 
             if "access_token" not in data:
                 logger.error("Could not refresh Spotify access token.")
                 logger.info(data)
-                
                 return None
 
-            _access_token = data["access_token"]
-            return _access_token
+            return data["access_token"], float(data.get("expires_in", 3600))
+
+        logger.error(f"Could not refresh Spotify access token after {self.max_attempts} attempts.")
+        return None
+
+
+    async def _refresh(self) -> str | None:
+        result = await self._request()
+        if result is None:
+            return None
+
+        self._token, expires_in = result
+        self._expires_at = time.monotonic() + expires_in
+        logger.debug(f"Refreshed Spotify access token, expires in {expires_in:.0f}s")
+        return self._token
+
+
+    async def refresh(self) -> str | None:
+        """
+        Refresh the token, joining a refresh that is already in flight.
+
+        :return: The new access token, or None if the refresh failed.
+        """
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._refresh())
+
+        # Shield the shared task so one caller being cancelled doesn't cancel it for everyone.
+        return await asyncio.shield(self._inflight)
+
+
+    async def get_token(self) -> str | None:
+        """
+        Get a valid access token, refreshing only if it has already expired.
+
+        :return: The access token, or None if it could not be refreshed.
+        """
+        if self._valid():
+            return self._token
+        return await self.refresh()
+
+
+    def invalidate(self, token: str) -> None:
+        """
+        Mark `token` as rejected, so the next `get_token` refreshes it.
+        Ignored if the token has already been replaced.
+
+        :param token: The token a request was rejected with.
+        """
+        if token == self._token:
+            self._expires_at = 0.0
+
+
+    async def _keep_fresh(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.expires_in - self.refresh_margin, 0.0))
+
+            if await self.refresh() is None:
+                await asyncio.sleep(min(self.refresh_margin / 2, 60))
+
+
+    async def start(self) -> None:
+        """
+        Fetch the first token and start refreshing it in the background.
+        """
+        await self.get_token()
+
+        if self._background is None or self._background.done():
+            self._background = asyncio.create_task(self._keep_fresh())
+
+
+    async def stop(self) -> None:
+        """
+        Stop the background refresh.
+        """
+        for task in (self._background, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+
+        self._background = self._inflight = None
+
+
+token_manager: TokenManager = TokenManager()
+
+
+async def refresh_access_token():
+    """
+    Request a new Spotify access token using the stored refresh token.
+
+    :return: The new access token string, or None if the request fails.
+    """
+    return await token_manager.refresh()
 
 
 async def get_access_token():
     """
     Get the currently cached Spotify access token.
-    Refresh the token if not available.
+    Refresh the token if it is missing or expired.
 
     :return: A valid Spotify access token string.
     """
-    global _access_token
-
-    if _access_token is None:
-        return await refresh_access_token()
-
-    return _access_token
\ No newline at end of file
+    return await token_manager.get_token()
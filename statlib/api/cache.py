@@ -1,32 +1,288 @@
+import os
+import sys
 import time
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
 
-_cache = {}
+from dotenv import load_dotenv; load_dotenv()
 
+from statlib.logging import logger
 
-def set_cache(key: str, value, ttl: int = 10):
+
+MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters for a TTLCache.
+
+    :param hits: Lookups answered with a fresh value.
+    :param stale_hits: Lookups answered with an expired value while it is refreshed.
+    :param misses: Lookups that found nothing usable.
+    :param evictions: Entries dropped to stay within the size bounds.
+    :param expirations: Entries dropped because they outlived their stale window.
+    :param refreshes: Background refreshes started.
+    :param entries: Entries currently stored.
+    :param bytes: Approximate memory held by the stored values.
+    """
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    refreshes: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size')
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float, size: int) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+
+
+def _approx_size(value: Any, depth: int = 0) -> int:
+    """
+    Estimate the memory held by a decoded JSON value.
+    """
+    size = sys.getsizeof(value)
+    if depth > 8:
+        return size
+
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, depth + 1) + _approx_size(v, depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(item, depth + 1) for item in value)
+    return size
+
+
+class TTLCache:
+    """
+    LRU cache with per-entry TTL, bounded by entry count and approximate memory.
+
+    An entry is fresh until its TTL passes. With a `stale_ttl`, it can still
+    be served for that much longer while `refresh` loads a new value in the
+    background (stale-while-revalidate), so a hot key never makes a caller
+    wait. Entries past their stale window are dropped on access or by the
+    periodic sweep, and the least recently used entries are evicted when
+    either bound is exceeded.
+
+    :param max_entries: Maximum number of entries.
+    :param max_bytes: Maximum approximate memory held by values.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._stats = CacheStats()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self._sweeper: asyncio.Task | None = None
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+    def lookup(self, key: Hashable) -> tuple[Any, bool]:
+        """
+        Look up a value that may be served, fresh or stale.
+
+        :param key: Cache key.
+        :return: (value, fresh). value is MISSING if there is nothing servable.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is None:
+            self._stats.misses += 1
+            return MISSING, False
+
+        if now >= entry.stale_until:
+            self._remove(key)
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return MISSING, False
+
+        self._entries.move_to_end(key)
+
+        if now < entry.expires_at:
+            self._stats.hits += 1
+            return entry.value, True
+
+        self._stats.stale_hits += 1
+        return entry.value, False
+
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Get a fresh value.
+
+        :param key: Cache key.
+        :param default: Returned when there is no fresh value.
+        :return: The cached value or `default`.
+        """
+        value, fresh = self.lookup(key)
+        if value is MISSING or not fresh:
+            return default
+        return value
+
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """
+        Store a value, evicting least recently used entries if a bound is exceeded.
+
+        :param key: Cache key.
+        :param value: Value to store; None and other falsy values are cached too.
+        :param ttl: Seconds the value is fresh.
+        :param stale_ttl: Further seconds the value may be served while it is refreshed.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.monotonic()
+        entry = _Entry(value, now + ttl, now + ttl + stale_ttl, _approx_size(value))
+        self._entries[key] = entry
+        self._bytes += entry.size
+
+        while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            self._remove(next(iter(self._entries)))
+            self._stats.evictions += 1
+
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a key if present.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        self._entries.clear()
+        self._bytes = 0
+
+
+    def refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Run `loader` in the background to refresh `key`, unless a refresh of it
+        is already running. The loader is responsible for storing the new value.
+
+        :param key: Cache key being refreshed.
+        :param loader: Coroutine function that loads and stores the value.
+        """
+        if key in self._refreshing:
+            return
+
+        async def run() -> None:
+            try:
+                await loader()
+            except Exception as error:
+                logger.warning(f"Background refresh of {key!r} failed: {error!r}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._stats.refreshes += 1
+        self._refreshing[key] = asyncio.create_task(run())
+
+
+    def sweep(self) -> int:
+        """
+        Drop every entry past its stale window.
+
+        :return: Number of entries dropped.
+        """
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now >= entry.stale_until]
+        for key in expired:
+            self._remove(key)
+
+        self._stats.expirations += len(expired)
+        return len(expired)
+
+
+    async def _sweep_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            swept = self.sweep()
+            if swept:
+                logger.debug(f"Swept {swept} expired cache entries")
+
+
+    def start_sweeper(self, interval: float = 60) -> None:
+        """
+        Start sweeping expired entries every `interval` seconds.
+        """
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_periodically(interval))
+
+
+    async def stop(self) -> None:
+        """
+        Stop the sweeper and any running background refreshes.
+        """
+        tasks = [self._sweeper, *self._refreshing.values()]
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+
+        self._sweeper = None
+        self._refreshing.clear()
+
+
+    def stats(self) -> CacheStats:
+        """
+        Return a snapshot of the cache counters.
+
+        :return: CacheStats instance.
+        """
+        return CacheStats(
+            **{**vars(self._stats), 'entries': len(self._entries), 'bytes': self._bytes}
+        )
+
+
+api_cache: TTLCache = TTLCache(
+    max_entries=int(os.getenv('APICACHEENTRIES', 2048)),
+    max_bytes=int(os.getenv('APICACHEBYTES', 32 * 1024 * 1024))
+)
+
+
+def set_cache(key: str, value, ttl: int = 10, stale_ttl: int = 0):
     """
     Store a value in cache with a specified TTL.
 
     :param key: The cache key identifier.
     :param value: The data to store under the key.
     :param ttl: Time-to-live in seconds before the cache expires.
+    :param stale_ttl: Seconds the value may still be served while it is refreshed.
     """
-    _cache[key] = (value, time.time() + ttl)
+    api_cache.set(key, value, ttl, stale_ttl)
 
 
-def get_cache(key: str):
+def get_cache(key: str, default=None):
     """
     Retrieve a cached value if it is still valid.
 
     :param key: The cache key identifier.
-    :return: The cached value or None if expired or missing.
+    :param default: Returned if the value is expired or missing, pass MISSING
+        to tell a cached None apart from a miss.
+    :return: The cached value or `default`.
     """
-    if key not in _cache:
-        return None
-
-    value, expires_at = _cache[key]
-    if time.time() > expires_at:
-        del _cache[key]
-        return None
-
-    return value
\ No newline at end of file
+    return api_cache.get(key, default)
@@ -0,0 +1,82 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+
+@dataclass
+class CoalescerStats:
+    """
+    Counters for request coalescing.
+
+    :param requests: Calls made through the coalescer.
+    :param coalesced: Calls that joined a request already in flight instead of sending their own.
+    :param in_flight: Requests currently in flight.
+    """
+    requests: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """
+    Normalize an API endpoint so equivalent requests share a key: query
+    parameters are sorted and re-encoded consistently.
+
+    :param endpoint: Path with an optional query string, e.g. '/v1/search?type=artist&q=a%20b'.
+    :return: The normalized endpoint.
+    """
+    parts = urlsplit(endpoint)
+    if not parts.query:
+        return parts.path
+
+    params = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    return f"{parts.path}?{urlencode(params, quote_via=quote, safe=':,')}"
+
+
+class Coalescer:
+    """
+    Shares one in-flight call between concurrent callers with the same key.
+
+    The first caller starts the call as a task; callers arriving before it
+    finishes await the same task instead of starting their own. The task is
+    shielded, so a caller being cancelled does not cancel it for the rest.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._requests = 0
+        self._coalesced = 0
+
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the in-flight call for `key`, starting it with `factory` if there is none.
+
+        :param key: Key identifying equivalent calls.
+        :param factory: Coroutine function making the call.
+        :return: The call's result.
+        """
+        self._requests += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            task = asyncio.create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+
+    def stats(self) -> CoalescerStats:
+        """
+        Return a snapshot of the coalescing counters.
+
+        :return: CoalescerStats instance.
+        """
+        return CoalescerStats(requests=self._requests, coalesced=self._coalesced, in_flight=len(self._inflight))
+
+
+coalescer: Coalescer = Coalescer()
@@ -0,0 +1,200 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from enum import IntEnum
+from dataclasses import dataclass
+
+from dotenv import load_dotenv; load_dotenv()
+
+from statlib.logging import logger
+
+
+class Priority(IntEnum):
+    """
+    Request priority classes, lowest value served first.
+    """
+    TRACKER = 0
+    INTERACTIVE = 1
+    BACKGROUND = 2
+
+
+@dataclass
+class SchedulerStats:
+    """
+    Counters for the request scheduler.
+
+    :param granted: Requests let through, per priority name.
+    :param waiting: Requests currently queued.
+    :param tokens: Tokens currently in the bucket.
+    :param rate_limited: 429 responses reported through `pause`.
+    :param paused_for: Seconds left before requests may be sent again.
+    """
+    granted: dict[str, int]
+    waiting: int
+    tokens: float
+    rate_limited: int
+    paused_for: float
+
+
+class RequestScheduler:
+    """
+    Lets requests through at a steady rate, highest priority first.
+
+    A token bucket refills at `rate` tokens per second up to `burst`, and each
+    request takes one token. Waiting requests are served in priority order, so
+    a burst of background lookups queues behind the tracker instead of
+    delaying it. Background requests additionally leave `reserve` tokens in
+    the bucket for the other classes. When Spotify answers 429, `pause`
+    holds every request until its `Retry-After` has passed.
+
+    :param rate: Tokens added per second.
+    :param burst: Bucket capacity.
+    :param reserve: Tokens background requests may not use.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, reserve: int = 2) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._granted = {priority.name: 0 for priority in Priority}
+        self._rate_limited = 0
+
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+
+    def _next_delay(self) -> float | None:
+        """
+        Grant as many waiting requests as the bucket allows.
+
+        :return: Seconds until the next request can be granted, or None if nobody is waiting.
+        """
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            paused_for = self._paused_until - time.monotonic()
+            if paused_for > 0:
+                return paused_for
+
+            self._refill()
+            needed = 1 + (self.reserve if priority == Priority.BACKGROUND else 0)
+            if self._tokens < needed:
+                return (needed - self._tokens) / self.rate
+
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._granted[Priority(priority).name] += 1
+            future.set_result(None)
+
+        return None
+
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wakeup.clear()
+            delay = self._next_delay()
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Wait until a request of the given priority may be sent.
+
+        :param priority: Priority class of the request.
+        """
+        self._ensure_dispatcher()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._counter), future))
+        self._wakeup.set()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The dispatcher skips cancelled futures; a grant that raced the
+            # cancellation is given back.
+            if future.done() and not future.cancelled():
+                self._tokens = min(self.burst, self._tokens + 1)
+            raise
+
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold all requests for `seconds`, e.g. after a 429 with `Retry-After`.
+
+        :param seconds: How long to wait before sending requests again.
+        """
+        self._rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"Spotify rate limit hit, pausing requests for {seconds:.1f}s")
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+
+    def paused_for(self) -> float:
+        """
+        :return: Seconds left before requests may be sent again.
+        """
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+
+    def stats(self) -> SchedulerStats:
+        """
+        Return a snapshot of the scheduler counters.
+
+        :return: SchedulerStats instance.
+        """
+        self._refill()
+        return SchedulerStats(
+            granted=dict(self._granted),
+            waiting=sum(not future.done() for _, _, future in self._waiters),
+            tokens=self._tokens,
+            rate_limited=self._rate_limited,
+            paused_for=self.paused_for()
+        )
+
+
+    async def stop(self) -> None:
+        """
+        Stop the dispatcher. Queued requests are cancelled.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+
+scheduler: RequestScheduler = RequestScheduler(
+    rate=float(os.getenv('SPOTIFYRATE', 5)),
+    burst=int(os.getenv('SPOTIFYBURST', 10))
+)
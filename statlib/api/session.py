@@ -0,0 +1,204 @@
+import os
+import time
+import asyncio
+import aiohttp
+from collections import deque
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from dotenv import load_dotenv; load_dotenv()
+
+from statlib.logging import logger
+
+
+HTTP_LIMIT: int = int(os.getenv('HTTPLIMIT', 20))
+HTTP_LIMIT_PER_HOST: int = int(os.getenv('HTTPLIMITPERHOST', 10))
+HTTP_KEEPALIVE: float = float(os.getenv('HTTPKEEPALIVE', 60))
+HTTP_DNS_TTL: int = int(os.getenv('HTTPDNSTTL', 300))
+HTTP_TIMEOUT: float = float(os.getenv('HTTPTIMEOUT', 10))
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    """
+    Timing of one HTTP request made through the shared session.
+
+    :param method: HTTP method.
+    :param host: Request host.
+    :param path: Request path, without the query string.
+    :param status: Response status, or None if the request failed.
+    :param seconds: Time from sending the request to receiving the response headers.
+    :param connect_seconds: Time spent opening a new connection (DNS, TCP and TLS), 0 when reused.
+    :param reused: Whether an idle keep-alive connection was reused.
+    """
+    method: str
+    host: str
+    path: str
+    status: int | None
+    seconds: float
+    connect_seconds: float
+    reused: bool
+
+
+@dataclass
+class SessionStats:
+    """
+    Counters for the shared HTTP session, used to confirm connections are reused.
+
+    :param requests: Requests sent.
+    :param reused: Requests sent over a reused keep-alive connection.
+    :param connections: New connections opened.
+    :param dns_cache_hits: Host lookups answered from the DNS cache.
+    :param errors: Requests that raised instead of returning a response.
+    :param request_seconds: Total time spent waiting for responses.
+    :param connect_seconds: Total time spent opening connections.
+    """
+    requests: int = 0
+    reused: int = 0
+    connections: int = 0
+    dns_cache_hits: int = 0
+    errors: int = 0
+    request_seconds: float = 0.0
+    connect_seconds: float = 0.0
+
+
+_session: aiohttp.ClientSession | None = None
+_stats = SessionStats()
+_timings: deque[RequestTiming] = deque(maxlen=100)
+
+
+async def _on_request_start(session, context: SimpleNamespace, params) -> None:
+    context.started = time.perf_counter()
+    context.connect_started = None
+    context.connect_seconds = 0.0
+    context.reused = False
+
+
+async def _on_connection_create_start(session, context: SimpleNamespace, params) -> None:
+    context.connect_started = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context: SimpleNamespace, params) -> None:
+    context.connect_seconds = time.perf_counter() - context.connect_started
+    _stats.connections += 1
+    _stats.connect_seconds += context.connect_seconds
+
+
+async def _on_connection_reuseconn(session, context: SimpleNamespace, params) -> None:
+    context.reused = True
+
+
+async def _on_dns_cache_hit(session, context: SimpleNamespace, params) -> None:
+    _stats.dns_cache_hits += 1
+
+
+def _record(context: SimpleNamespace, method: str, url, status: int | None) -> None:
+    timing = RequestTiming(
+        method=method,
+        host=url.host,
+        path=url.path,
+        status=status,
+        seconds=time.perf_counter() - context.started,
+        connect_seconds=context.connect_seconds,
+        reused=context.reused
+    )
+    _timings.append(timing)
+
+    _stats.requests += 1
+    _stats.reused += timing.reused
+    _stats.request_seconds += timing.seconds
+
+    logger.debug(
+        f"{method} {url.host}{url.path} -> {status} in {timing.seconds * 1000:.0f}ms "
+        f"({'reused' if timing.reused else f'new connection {timing.connect_seconds * 1000:.0f}ms'})"
+    )
+
+
+async def _on_request_end(session, context: SimpleNamespace, params) -> None:
+    _record(context, params.method, params.url, params.response.status)
+
+
+async def _on_request_exception(session, context: SimpleNamespace, params) -> None:
+    _stats.errors += 1
+    _record(context, params.method, params.url, None)
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_connection_create_start.append(_on_connection_create_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    trace.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace.on_dns_cache_hit.append(_on_dns_cache_hit)
+    trace.on_request_end.append(_on_request_end)
+    trace.on_request_exception.append(_on_request_exception)
+    return trace
+
+
+async def open_session() -> aiohttp.ClientSession:
+    """
+    Open the shared HTTP session, if it is not open already.
+
+    The connector keeps connections alive between requests, caches DNS
+    lookups and caps concurrent connections per host, so repeated calls to
+    the same API skip DNS, TCP and TLS setup.
+
+    :return: The shared session.
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE,
+            ttl_dns_cache=HTTP_DNS_TTL
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            trace_configs=[_trace_config()]
+        )
+        logger.debug("Opened shared HTTP session")
+
+    return _session
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP session, opening it on first use outside the bot lifecycle.
+
+    :return: The shared session.
+    """
+    if _session is None or _session.closed:
+        return await open_session()
+    return _session
+
+
+async def close_session() -> None:
+    """
+    Close the shared HTTP session and its pooled connections.
+    """
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+        # Give the SSL transports a moment to close cleanly.
+        await asyncio.sleep(0.25)
+        logger.debug("Closed shared HTTP session")
+
+    _session = None
+
+
+def session_stats() -> SessionStats:
+    """
+    :return: A copy of the shared session's counters.
+    """
+    return SessionStats(**vars(_stats))
+
+
+def recent_timings() -> list[RequestTiming]:
+    """
+    :return: Timings of the most recent requests, oldest first.
+    """
+    return list(_timings)
@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from statlib.logging import logger
+from statlib.api import Priority, get_recently_played
+from statlib.database import Cursor, ensure_cursor
+from statlib.database.entries import drop_overlapping, split_by_hour
+from statlib.database.handlers import ArchiveHandler, DimensionHandler, ListeningHandler, StateHandler
+
+
+HIGH_WATER_MARK: str = 'recently_played_after'
+PAGE_SIZE: int = 50
+MAX_PAGES: int = 4
+
+
+@dataclass
+class BackfillStats:
+    """
+    Outcome of a recently-played backfill.
+
+    :param pages: Recently-played pages requested.
+    :param plays: Plays returned after the high-water mark.
+    :param inserted: Listening rows written.
+    :param duplicates: Rows skipped because they overlap stored listening of the same track.
+    :param high_water_mark: Unix milliseconds of the newest play seen, or None if none was ever seen.
+    """
+    pages: int = 0
+    plays: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    high_water_mark: int | None = None
+
+
+def _played_at(item: dict[str, Any]) -> datetime:
+    """
+    Parse `played_at`, the UTC time playback ended, to local time, which is
+    what the tracker stores.
+    """
+    return datetime.fromisoformat(item['played_at']).astimezone().replace(tzinfo=None)
+
+
+def _played_at_millis(item: dict[str, Any]) -> int:
+    return int(datetime.fromisoformat(item['played_at']).timestamp() * 1000)
+
+
+def parse_plays(
+    items: list[dict[str, Any]]
+) -> tuple[list[tuple[datetime, datetime, str, str, float]], dict[tuple[str, str], tuple[str | None, str | None]]]:
+    """
+    Map recently-played items to listening entries.
+
+    Each play is assumed to have lasted the track's duration, cut short where
+    it would overlap the previous play, and is split at hour boundaries like
+    tracker sessions.
+
+    :param items: `items` of recently-played responses, in any order.
+    :return: (started_at, ended_at, track_name, artist_name, duration) tuples, and
+        a mapping of (track_name, artist_name) to (track Spotify id, artist Spotify id).
+    """
+    entries = []
+    spotify_ids = {}
+    previous_end = None
+
+    for item in sorted(items, key=_played_at):
+        track = item.get('track') or {}
+        artists = track.get('artists') or []
+        if not track.get('name') or not artists or not track.get('duration_ms'):
+            continue
+
+        track_name, artist_name = track['name'], artists[0]['name']
+        ended_at = _played_at(item)
+        started_at = ended_at - timedelta(milliseconds=track['duration_ms'])
+        if previous_end is not None:
+            started_at = max(started_at, previous_end)
+        previous_end = ended_at
+
+        entries.extend(split_by_hour(track_name, artist_name, started_at, ended_at))
+        spotify_ids[track_name, artist_name] = (track.get('id'), artists[0].get('id'))
+
+    return entries, spotify_ids
+
+
+@ensure_cursor
+def store_plays(
+    entries: list[tuple[datetime, datetime, str, str, float]],
+    spotify_ids: dict[tuple[str, str], tuple[str | None, str | None]],
+    *,
+    cursor: Cursor = None
+) -> int:
+    """
+    Write backfilled plays in one batch, skipping those that overlap stored
+    listening of the same track or fall inside archived months.
+
+    :param entries: (started_at, ended_at, track_name, artist_name, duration) tuples.
+    :param spotify_ids: Mapping of (track_name, artist_name) to (track Spotify id, artist Spotify id).
+    :param cursor: Database cursor.
+    :return: Number of rows written.
+    """
+    archived_before = ArchiveHandler.get_archived_before(cursor=cursor)
+    if archived_before:
+        entries = [entry for entry in entries if entry[0] >= archived_before]
+
+    if not entries:
+        return 0
+
+    ids = DimensionHandler.resolve_tracks([(entry[2], entry[3]) for entry in entries], cursor=cursor)
+    kept = drop_overlapping(entries, ids, cursor)
+
+    ListeningHandler.insert_entries(kept, spotify_ids=spotify_ids, cursor=cursor)
+    return len(kept)
+
+
+async def backfill_recently_played(priority: Priority = Priority.TRACKER) -> BackfillStats:
+    """
+    Recover plays the tracker missed from Spotify's recently-played history.
+
+    Pages are requested after the persisted high-water mark, following the
+    `after` cursor, for at most `MAX_PAGES` requests however long the gap.
+    The plays are written in one batch and the high-water mark is moved to
+    the newest play, so the same plays are never fetched twice. Plays the
+    tracker already recorded are skipped as overlapping.
+
+    Pending tracker sessions should be flushed first, so they are seen as stored.
+
+    :param priority: Priority class of the Spotify requests.
+    :return: BackfillStats for this run.
+    """
+    stats = BackfillStats()
+
+    stored = await StateHandler.get_state.aio(HIGH_WATER_MARK)
+    after = stats.high_water_mark = int(stored) if stored else None
+
+    items = []
+    for _ in range(MAX_PAGES):
+        data = await get_recently_played(after, PAGE_SIZE, priority)
+        if data is None:
+            break
+
+        stats.pages += 1
+        page = data.get('items') or []
+        items.extend(page)
+
+        next_after = (data.get('cursors') or {}).get('after')
+        if len(page) < PAGE_SIZE or next_after is None or int(next_after) == after:
+            break
+        after = int(next_after)
+
+    items = list({item['played_at']: item for item in items}.values())
+    if stats.high_water_mark is not None:
+        items = [item for item in items if _played_at_millis(item) > stats.high_water_mark]
+    if not items:
+        return stats
+
+    stats.plays = len(items)
+    entries, spotify_ids = parse_plays(items)
+
+    stats.inserted = await store_plays.aio(entries, spotify_ids)
+    stats.duplicates = len(entries) - stats.inserted
+
+    stats.high_water_mark = max(_played_at_millis(item) for item in items)
+    await StateHandler.set_state.aio(HIGH_WATER_MARK, str(stats.high_water_mark))
+
+    logger.info(
+        f"Backfilled {stats.inserted} rows from {stats.plays} recently played tracks "
+        f"({stats.duplicates} duplicates, {stats.pages} requests)"
+    )
+    return stats
@@ -1,9 +1,49 @@
 from .models import *
-from .connection import Cursor, ensure_cursor, async_ensure_cursor
+from .periods import Period, Granularity
+from .backends import Backend, get_backend
+from .connection import (
+    Cursor, PoolStats, PoolTimeoutError, ensure_cursor, ensure_stream_cursor, async_ensure_cursor, transaction,
+    get_pool, get_pool_stats, close_pool, get_executor, shutdown_executor
+)
+from .results import ResultCache, ResultCacheStats, result_cache, cached_result, ALL_TIME_STALENESS
+from .migrations import migrate, get_schema_version
+from .buffer import WriteBehindBuffer, BufferStats, listening_buffer
+from .snapshot import ListeningSnapshot, listening_snapshot, refresh_snapshot
+from .leaderboard import Leaderboard, AllTimeLeaderboards, leaderboards, seed_leaderboards
 
 
 __all__ = [
     'Cursor',
+    'Backend',
+    'get_backend',
+    'Period',
+    'Granularity',
+    'PoolStats',
+    'PoolTimeoutError',
     'ensure_cursor',
-    'async_ensure_cursor'
-]
\ No newline at end of file
+    'ensure_stream_cursor',
+    'async_ensure_cursor',
+    'transaction',
+    'get_pool',
+    'get_pool_stats',
+    'close_pool',
+    'get_executor',
+    'shutdown_executor',
+    'ResultCache',
+    'ResultCacheStats',
+    'result_cache',
+    'cached_result',
+    'ALL_TIME_STALENESS',
+    'migrate',
+    'get_schema_version',
+    'WriteBehindBuffer',
+    'BufferStats',
+    'listening_buffer',
+    'ListeningSnapshot',
+    'listening_snapshot',
+    'refresh_snapshot',
+    'Leaderboard',
+    'AllTimeLeaderboards',
+    'leaderboards',
+    'seed_leaderboards'
+]
@@ -0,0 +1,53 @@
+import os
+import threading
+
+from .base import Backend, Cursor
+
+
+_backend: Backend | None = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str) -> Backend:
+    """
+    Instantiate a storage backend by name.
+
+    Drivers are imported lazily, so PyMySQL is only required for MySQL.
+
+    :param name: Either 'mysql' or 'sqlite'.
+    :return: The backend instance.
+    """
+    if name == 'mysql':
+        from .mysql import MySQLBackend
+        return MySQLBackend()
+
+    if name == 'sqlite':
+        from .sqlite import SQLiteBackend
+        return SQLiteBackend()
+
+    raise ValueError(f"Unknown database backend: {name!r}")
+
+
+def get_backend() -> Backend:
+    """
+    Return the configured storage backend, selected by the DBBACKEND
+    environment variable (defaults to 'mysql').
+
+    :return: The shared Backend instance.
+    """
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.getenv('DBBACKEND', 'mysql').lower())
+
+    return _backend
+
+
+__all__ = [
+    'Backend',
+    'Cursor',
+    'create_backend',
+    'get_backend'
+]
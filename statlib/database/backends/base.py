@@ -0,0 +1,132 @@
+from typing import Any, Iterable, Protocol, Sequence
+
+
+BUCKET_FORMATS: dict[str, str] = {
+    'hour': '%%Y-%%m-%%d %%H:00:00',
+    'day': '%%Y-%%m-%%d 00:00:00',
+    'month': '%%Y-%%m-01 00:00:00'
+}
+
+
+class Cursor(Protocol):
+    """
+    The DB-API cursor surface the handlers rely on.
+
+    Every backend accepts `%s` placeholders, so handler SQL is shared.
+    """
+    connection: Any
+
+    def execute(self, query: str, args: Sequence | None = None) -> Any: ...
+    def executemany(self, query: str, args: Iterable[Sequence]) -> Any: ...
+    def fetchone(self) -> tuple | None: ...
+    def fetchmany(self, size: int) -> Sequence[tuple]: ...
+    def fetchall(self) -> Sequence[tuple]: ...
+
+
+class Backend:
+    """
+    A storage engine the database layer can run on.
+
+    A backend opens raw connections for the connection pool, decides which
+    driver errors make a connection unusable, and renders the few statements
+    whose syntax differs between engines. Time-part functions used in handler
+    SQL (HOUR, WEEKDAY, DAY, MONTH) must be available on every backend.
+
+    `partitioned` is set on engines where `listening_data` is range
+    partitioned by month, so old months can be dropped as a whole partition.
+    """
+    name: str = ''
+    discard_on: tuple[type[BaseException], ...] = ()
+    partitioned: bool = False
+
+
+    def connect(self):
+        """
+        Open a new raw connection.
+
+        It must provide `cursor()`, `begin()`, `commit()`, `rollback()`,
+        `ping(reconnect=False)` and `close()`, and run in autocommit mode.
+        """
+        raise NotImplementedError
+
+
+    def stream_cursor(self, connection) -> Cursor:
+        """
+        Open a cursor that fetches rows from the server as they are read
+        instead of buffering the whole result.
+
+        :param connection: Raw connection from `connect`.
+        :return: Unbuffered cursor.
+        """
+        return connection.cursor()
+
+
+    def upsert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        keys: Sequence[str],
+        *,
+        increment: Sequence[str] = (),
+        replace: Sequence[str] = ()
+    ) -> str:
+        """
+        Render an INSERT that merges into an existing row on a key conflict.
+
+        :param table: Target table.
+        :param columns: Inserted columns, in placeholder order.
+        :param keys: Columns of the unique key that may conflict.
+        :param increment: Columns added to the existing value on conflict.
+        :param replace: Columns overwritten with the new value on conflict.
+        :return: SQL with one `%s` placeholder per column.
+        """
+        raise NotImplementedError
+
+
+    def insert_ignore(self, table: str, columns: Sequence[str]) -> str:
+        """
+        Render an INSERT that silently skips rows violating a unique key.
+
+        :param table: Target table.
+        :param columns: Inserted columns, in placeholder order.
+        :return: SQL with one `%s` placeholder per column.
+        """
+        raise NotImplementedError
+
+
+    def format_datetime(self, column: str, pattern: str) -> str:
+        """
+        Render an expression formatting a DATETIME column as text.
+
+        :param column: Column or expression to format.
+        :param pattern: strftime-style pattern, with `%` escaped as `%%`.
+        :return: SQL expression.
+        """
+        raise NotImplementedError
+
+
+    def bucket(self, column: str, unit: str) -> str:
+        """
+        Render an expression truncating a DATETIME column to the start of its
+        hour, day or month.
+
+        :param column: Column or expression to truncate.
+        :param unit: One of 'hour', 'day' or 'month'.
+        :return: SQL expression.
+        """
+        return self.format_datetime(column, BUCKET_FORMATS[unit])
+
+
+    def hour_bucket(self, column: str) -> str:
+        """
+        Render an expression truncating a DATETIME column to the start of its hour.
+
+        :param column: Column or expression to truncate.
+        :return: SQL expression.
+        """
+        return self.bucket(column, 'hour')
+
+
+    @staticmethod
+    def _placeholders(columns: Sequence[str]) -> str:
+        return ", ".join(["%s"] * len(columns))
@@ -0,0 +1,83 @@
+import os
+from typing import Sequence
+
+import pymysql
+import pymysql.cursors
+
+from .base import Backend
+
+
+def _get_database_credentials() -> tuple[str, str, str, str]:
+    """
+    Load database credentials from environment variables.
+
+    :return: Tuple containing (username, password, database name, endpoint).
+    """
+    db_username = os.getenv('DBUSER')
+    db_password = os.getenv('DBPASS')
+    db_name = os.getenv('DBNAME')
+    db_endpoint = os.getenv('DBENDPOINT')
+
+    return db_username, db_password, db_name, db_endpoint
+
+
+def db_connect():
+    """
+    Create a new connection to the database using environment variables.
+
+    :return: A PyMySQL connection object with autocommit enabled.
+    """
+    db_username, db_password, db_name, db_endpoint = _get_database_credentials()
+    conn = pymysql.connect(
+        host=db_endpoint,
+        port=3306,
+        user=db_username,
+        password=db_password,
+        database=db_name,
+        autocommit=True
+    )
+    return conn
+
+
+class MySQLBackend(Backend):
+    """
+    Remote MySQL server accessed through PyMySQL.
+    """
+    name = 'mysql'
+    discard_on = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+    partitioned = True
+
+
+    def connect(self):
+        return db_connect()
+
+
+    def stream_cursor(self, connection) -> pymysql.cursors.SSCursor:
+        return connection.cursor(pymysql.cursors.SSCursor)
+
+
+    def upsert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        keys: Sequence[str],
+        *,
+        increment: Sequence[str] = (),
+        replace: Sequence[str] = ()
+    ) -> str:
+        updates = [f"{c} = {c} + VALUES({c})" for c in increment]
+        updates += [f"{c} = VALUES({c})" for c in replace]
+
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({self._placeholders(columns)}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+        )
+
+
+    def insert_ignore(self, table: str, columns: Sequence[str]) -> str:
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({self._placeholders(columns)})"
+
+
+    def format_datetime(self, column: str, pattern: str) -> str:
+        return f"DATE_FORMAT({column}, '{pattern}')"
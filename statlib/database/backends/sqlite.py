@@ -0,0 +1,198 @@
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from .base import Backend
+
+
+_PLACEHOLDER = re.compile(r"%(s|%)")
+
+
+def _translate(query: str) -> str:
+    """
+    Convert `%s` placeholders and `%%` escapes to SQLite's qmark style.
+    """
+    return _PLACEHOLDER.sub(lambda match: "?" if match.group(1) == "s" else "%", query)
+
+
+def _parse(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _hour(value: str | None) -> int | None:
+    moment = _parse(value)
+    return moment.hour if moment else None
+
+
+def _day(value: str | None) -> int | None:
+    moment = _parse(value)
+    return moment.day if moment else None
+
+
+def _month(value: str | None) -> int | None:
+    moment = _parse(value)
+    return moment.month if moment else None
+
+
+def _weekday(value: str | None) -> int | None:
+    moment = _parse(value)
+    return moment.weekday() if moment else None
+
+
+sqlite3.register_adapter(datetime, lambda moment: moment.isoformat(" "))
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+class SQLiteCursor:
+    """
+    Wraps a sqlite3 cursor so handler SQL written with `%s` placeholders runs unchanged.
+    """
+
+    def __init__(self, connection: 'SQLiteConnection') -> None:
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+
+
+    def __enter__(self) -> 'SQLiteCursor':
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self._cursor.lastrowid
+
+
+    def execute(self, query: str, args: Sequence | None = None):
+        if args is None:
+            return self._cursor.execute(query)
+        return self._cursor.execute(_translate(query), tuple(args))
+
+
+    def executemany(self, query: str, args: Iterable[Sequence]):
+        return self._cursor.executemany(_translate(query), args)
+
+
+    def fetchone(self) -> tuple | None:
+        return self._cursor.fetchone()
+
+
+    def fetchmany(self, size: int) -> list[tuple]:
+        return self._cursor.fetchmany(size)
+
+
+    def fetchall(self) -> list[tuple]:
+        return self._cursor.fetchall()
+
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    A sqlite3 connection exposing the PyMySQL-style surface the pool expects.
+    """
+
+    def __init__(self, raw: sqlite3.Connection) -> None:
+        self.raw = raw
+
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+
+    def begin(self) -> None:
+        self.raw.execute("BEGIN IMMEDIATE")
+
+
+    def commit(self) -> None:
+        self.raw.execute("COMMIT")
+
+
+    def rollback(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+
+    def ping(self, reconnect: bool = False) -> None:
+        self.raw.execute("SELECT 1")
+
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+class SQLiteBackend(Backend):
+    """
+    Embedded SQLite database file, for single-user deployments and local benchmarks.
+
+    Connections run in WAL mode, so readers never block the tracker's writes.
+    """
+    name = 'sqlite'
+    discard_on = (sqlite3.ProgrammingError,)
+
+
+    def __init__(self, path: str | None = None) -> None:
+        """
+        :param path: Database file, defaults to the DBPATH environment variable.
+        """
+        self.path = path or os.getenv('DBPATH', 'spotifystats.db')
+
+
+    def connect(self) -> SQLiteConnection:
+        raw = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        raw.execute("PRAGMA busy_timeout = 5000")
+
+        for name, func in (("HOUR", _hour), ("DAY", _day), ("MONTH", _month), ("WEEKDAY", _weekday)):
+            raw.create_function(name, 1, func, deterministic=True)
+
+        return SQLiteConnection(raw)
+
+
+    def upsert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        keys: Sequence[str],
+        *,
+        increment: Sequence[str] = (),
+        replace: Sequence[str] = ()
+    ) -> str:
+        updates = [f"{c} = {c} + excluded.{c}" for c in increment]
+        updates += [f"{c} = excluded.{c}" for c in replace]
+
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({self._placeholders(columns)}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(updates)}"
+        )
+
+
+    def insert_ignore(self, table: str, columns: Sequence[str]) -> str:
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({self._placeholders(columns)})"
+
+
+    def format_datetime(self, column: str, pattern: str) -> str:
+        return f"strftime('{pattern}', {column})"
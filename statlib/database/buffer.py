@@ -0,0 +1,211 @@
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from statlib.logging import logger
+from statlib.database.models import ListeningSession
+
+
+@dataclass
+class BufferStats:
+    """
+    Counters describing the write-behind buffer.
+
+    :param pending: Rows waiting to be written.
+    :param flushed_rows: Rows written since startup.
+    :param flushes: Successful flushes since startup.
+    :param failed_flushes: Flushes that raised and were retried later.
+    :param dropped_rows: Rows discarded because the buffer hit `max_pending`.
+    :param last_flush_seconds: Duration of the most recent successful flush.
+    :param max_flush_seconds: Slowest successful flush.
+    :param total_flush_seconds: Time spent in successful flushes.
+    """
+    pending: int
+    flushed_rows: int
+    flushes: int
+    failed_flushes: int
+    dropped_rows: int
+    last_flush_seconds: float
+    max_flush_seconds: float
+    total_flush_seconds: float
+
+
+class WriteBehindBuffer:
+    """
+    Accumulates finished listening sessions in memory and writes them in batches.
+
+    `add` never touches the database. Rows are flushed with a single
+    `ListeningHandler.insert_entries` call once `max_rows` are pending or the
+    oldest row is `max_age` seconds old, so a slow database cannot delay the
+    next tracker poll. Flushes that committed nothing keep their rows for the
+    next attempt; rows are never written twice, since merging adds durations.
+
+    Coroutine functions registered with `on_flush` are awaited after every
+    successful flush, so in-memory views can pick up the new rows.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_rows: int = 60,
+        max_age: float = 60,
+        max_pending: int = 50_000
+    ) -> None:
+        """
+        :param max_rows: Pending row count that triggers a flush.
+        :param max_age: Age in seconds of the oldest pending row that triggers a flush.
+        :param max_pending: Hard cap on buffered rows; the oldest are dropped beyond it.
+        """
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.max_pending = max_pending
+
+        self._rows: list[ListeningSession] = []
+        self._oldest: float | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[], Awaitable[object]]] = []
+
+        self._flushed_rows = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._dropped_rows = 0
+        self._last_flush = 0.0
+        self._max_flush = 0.0
+        self._total_flush = 0.0
+
+
+    def add(self, session: ListeningSession) -> None:
+        """
+        Queue a finished listening session.
+
+        :param session: The session to persist.
+        """
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        self._rows.append(session)
+        self._trim()
+
+
+    def on_flush(self, listener: Callable[[], Awaitable[object]]) -> None:
+        """
+        Register a coroutine function to await after each successful flush.
+
+        :param listener: Called without arguments; errors are logged and ignored.
+        """
+        self._listeners.append(listener)
+
+
+    def _trim(self) -> None:
+        overflow = len(self._rows) - self.max_pending
+        if overflow > 0:
+            del self._rows[:overflow]
+            self._dropped_rows += overflow
+            logger.warning(f"Write-behind buffer full, dropped {overflow} oldest rows")
+
+
+    @property
+    def due(self) -> bool:
+        """
+        Whether the size or age threshold has been reached.
+        """
+        if not self._rows:
+            return False
+
+        return (
+            len(self._rows) >= self.max_rows
+            or time.monotonic() - self._oldest >= self.max_age
+        )
+
+
+    def flush_soon(self) -> None:
+        """
+        Start a background flush if one is due and none is already running.
+        """
+        if self.due and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.flush())
+
+
+    async def flush(self) -> int:
+        """
+        Write every pending row to the database.
+
+        :return: Number of rows written.
+        """
+        written = await self._write()
+
+        if written:
+            for listener in self._listeners:
+                try:
+                    await listener()
+                except Exception as error:
+                    logger.error(f"Flush listener {listener!r} failed: {error}")
+
+        return written
+
+
+    async def _write(self) -> int:
+        from statlib.database.handlers import ListeningHandler, ListeningWriteError
+
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            oldest, self._oldest = self._oldest, None
+
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                await ListeningHandler.insert_entries.aio(
+                    [ListeningHandler.session_row(session) for session in rows],
+                    spotify_ids={
+                        (session.track_name, session.artist_name): (session.track_spotify_id, session.artist_spotify_id)
+                        for session in rows
+                        if session.track_spotify_id or session.artist_spotify_id
+                    }
+                )
+
+            except ListeningWriteError as error:
+                self._failed_flushes += 1
+                self._rows[:0] = rows
+                self._oldest = oldest
+                self._trim()
+
+                logger.error(f"Failed to flush {len(rows)} listening rows: {error}")
+                return 0
+
+            except Exception as error:
+                # The rows are committed; writing them again would count their durations twice.
+                logger.error(f"Flushed {len(rows)} listening rows, but updating derived state failed: {error}")
+
+            elapsed = time.perf_counter() - started
+            self._flushes += 1
+            self._flushed_rows += len(rows)
+            self._last_flush = elapsed
+            self._max_flush = max(self._max_flush, elapsed)
+            self._total_flush += elapsed
+
+            return len(rows)
+
+
+    def stats(self) -> BufferStats:
+        """
+        Return a snapshot of the buffer counters.
+
+        :return: BufferStats instance.
+        """
+        return BufferStats(
+            pending=len(self._rows),
+            flushed_rows=self._flushed_rows,
+            flushes=self._flushes,
+            failed_flushes=self._failed_flushes,
+            dropped_rows=self._dropped_rows,
+            last_flush_seconds=self._last_flush,
+            max_flush_seconds=self._max_flush,
+            total_flush_seconds=self._total_flush
+        )
+
+
+listening_buffer: WriteBehindBuffer = WriteBehindBuffer()
@@ -1,42 +1,480 @@
 import os
+import time
+import asyncio
 import functools
-
-import pymysql
-from pymysql.cursors import Cursor
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
 
 from dotenv import load_dotenv; load_dotenv()
 
+from .backends import Cursor, get_backend
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no pooled connection becomes available within the pool timeout.
+    """
+
+
+@dataclass
+class PoolStats:
+    """
+    Snapshot of connection pool usage, used for sizing the pool under load.
+
+    :param max_size: Maximum number of connections the pool may hold.
+    :param size: Number of open connections (idle and in use).
+    :param in_use: Number of connections currently borrowed.
+    :param idle: Number of connections waiting in the pool.
+    :param creates: Total connections opened since startup.
+    :param waits: Number of borrows that had to wait for a free connection.
+    :param wait_seconds: Total time spent waiting for a free connection.
+    :param recycled: Connections closed because they exceeded the recycle age.
+    :param reaped: Connections closed because they sat idle for too long.
+    :param failed_checks: Connections discarded after a failed health check.
+    """
+    max_size: int
+    size: int
+    in_use: int
+    idle: int
+    creates: int
+    waits: int
+    wait_seconds: float
+    recycled: int
+    reaped: int
+    failed_checks: int
+
+
+class _PooledConnection:
+    """
+    A raw connection with the bookkeeping the pool needs to age it out.
+    """
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw: Any) -> None:
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+def _get_pool_settings() -> dict[str, float]:
+    """
+    Load connection pool settings from environment variables.
+
+    :return: Keyword arguments for ConnectionPool.
+    """
+    return {
+        'max_size': int(os.getenv('DBPOOLSIZE', 5)),
+        'timeout': float(os.getenv('DBPOOLTIMEOUT', 10)),
+        'max_idle': float(os.getenv('DBPOOLIDLE', 300)),
+        'recycle': float(os.getenv('DBPOOLRECYCLE', 3600)),
+        'check_after': float(os.getenv('DBPOOLCHECK', 30)),
+    }
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of database connections.
+
+    Connections are health-checked with a ping when they have been idle for
+    longer than `check_after`, closed once they are older than `recycle`, and
+    reaped when they sit unused in the pool for longer than `max_idle`.
+
+    Expired connections are only closed when `acquire` or `reap` runs, so a
+    long-lived process should call `reap` periodically to release
+    connections left idle after a burst.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        *,
+        discard_on: tuple[type[BaseException], ...] = (),
+        max_size: int = 5,
+        timeout: float = 10,
+        max_idle: float = 300,
+        recycle: float = 3600,
+        check_after: float = 30
+    ) -> None:
+        """
+        :param factory: Callable returning a new raw connection.
+        :param discard_on: Driver errors after which a connection is closed instead of reused.
+        :param max_size: Maximum number of open connections.
+        :param timeout: Seconds to wait for a free connection before failing.
+        :param max_idle: Seconds an unused connection may stay open.
+        :param recycle: Seconds after which a connection is replaced.
+        :param check_after: Idle seconds after which a connection is pinged before reuse.
+        """
+        self.factory = factory
+        self.discard_on = discard_on
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.recycle = recycle
+        self.check_after = check_after
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._creates = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._recycled = 0
+        self._reaped = 0
+        self._failed_checks = 0
+
+
+    def _close_raw(self, pooled: _PooledConnection) -> None:
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+
+    def _discard(self, pooled: _PooledConnection) -> None:
+        """
+        Close a connection and free its slot. Must be called without the lock held.
+        """
+        self._close_raw(pooled)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+    def _reap_locked(self) -> list[_PooledConnection]:
+        """
+        Pop idle connections that exceeded `max_idle` or `recycle`.
+        Must be called with the lock held; the caller closes the returned connections.
+        """
+        now = time.monotonic()
+        expired = []
+
+        for pooled in list(self._idle):
+            if now - pooled.last_used > self.max_idle:
+                self._reaped += 1
+            elif now - pooled.created_at > self.recycle:
+                self._recycled += 1
+            else:
+                continue
+
+            self._idle.remove(pooled)
+            self._size -= 1
+            expired.append(pooled)
+
+        if expired:
+            self._cond.notify(len(expired))
+
+        return expired
+
+
+    def reap(self) -> int:
+        """
+        Close every idle connection that exceeded the idle or recycle limits.
+
+        :return: Number of connections closed.
+        """
+        with self._cond:
+            expired = self._reap_locked()
+
+        for pooled in expired:
+            self._close_raw(pooled)
+
+        return len(expired)
+
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_used < self.check_after:
+            return True
+
+        try:
+            pooled.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+
+    def acquire(self) -> _PooledConnection:
+        """
+        Borrow a connection, opening a new one if the pool has room.
+
+        :return: A healthy pooled connection.
+        :raises PoolTimeoutError: If no connection frees up within `timeout` seconds.
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+
+                expired = self._reap_locked()
+                pooled = None
+                create = False
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+
+                elif self._size < self.max_size:
+                    self._size += 1
+                    self._in_use += 1
+                    create = True
+
+                else:
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s "
+                            f"({self._in_use}/{self.max_size} in use)."
+                        )
+
+                    started = time.monotonic()
+                    self._cond.wait(remaining)
+                    self._wait_seconds += time.monotonic() - started
+
+            for stale in expired:
+                self._close_raw(stale)
+
+            if create:
+                try:
+                    pooled = _PooledConnection(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+
+                with self._cond:
+                    self._creates += 1
+                return pooled
+
+            if pooled is None:
+                continue
+
+            if self._is_healthy(pooled):
+                return pooled
+
+            with self._cond:
+                self._failed_checks += 1
+                self._in_use -= 1
+            self._discard(pooled)
+
+
+    def release(self, pooled: _PooledConnection, *, discard: bool = False) -> None:
+        """
+        Return a borrowed connection to the pool.
+
+        :param pooled: The connection returned by `acquire`.
+        :param discard: Close the connection instead of reusing it, e.g. after a network error.
+        """
+        now = time.monotonic()
+
+        with self._cond:
+            self._in_use -= 1
 
-def _get_database_credentials() -> tuple[str, str, str, str]:
+            if not discard and not self._closed and now - pooled.created_at <= self.recycle:
+                pooled.last_used = now
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+
+            if not discard and not self._closed:
+                self._recycled += 1
+
+        self._discard(pooled)
+
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Context manager that borrows a connection and returns it afterwards.
+
+        Connections that raised one of the `discard_on` errors are discarded
+        rather than returned, since their state is unknown.
+
+        :return: A raw backend connection.
+        """
+        pooled = self.acquire()
+        try:
+            yield pooled.raw
+        except self.discard_on:
+            self.release(pooled, discard=True)
+            raise
+        except BaseException:
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+
+    def stats(self) -> PoolStats:
+        """
+        Return a snapshot of the current pool usage counters.
+
+        :return: PoolStats instance.
+        """
+        with self._cond:
+            return PoolStats(
+                max_size=self.max_size,
+                size=self._size,
+                in_use=self._in_use,
+                idle=len(self._idle),
+                creates=self._creates,
+                waits=self._waits,
+                wait_seconds=self._wait_seconds,
+                recycled=self._recycled,
+                reaped=self._reaped,
+                failed_checks=self._failed_checks
+            )
+
+
+    def close(self) -> None:
+        """
+        Close every idle connection and refuse further borrows.
+        Connections still in use are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for pooled in idle:
+            self._close_raw(pooled)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool for the configured backend,
+    creating it on first use.
+
+    :return: The shared ConnectionPool.
     """
-    Load database credentials from environment variables.
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                backend = get_backend()
+                _pool = ConnectionPool(
+                    backend.connect,
+                    discard_on=backend.discard_on,
+                    **_get_pool_settings()
+                )
+
+    return _pool
 
-    :return: Tuple containing (username, password, database name, endpoint).
+
+def get_pool_stats() -> PoolStats:
     """
-    db_username = os.getenv('DBUSER')
-    db_password = os.getenv('DBPASS')
-    db_name = os.getenv('DBNAME')
-    db_endpoint = os.getenv('DBENDPOINT')
-    
-    return db_username, db_password, db_name, db_endpoint
+    Return usage counters for the shared connection pool.
 
+    :return: PoolStats instance.
+    """
+    return get_pool().stats()
 
-def db_connect():
+
+def close_pool() -> None:
+    """
+    Close the shared connection pool. A new pool is created on next use.
     """
-    Create a new connection to the database using environment variables.
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 
-    :return: A PyMySQL connection object with autocommit enabled.
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool that runs database calls for async callers.
+
+    It has one worker per pooled connection. Synchronous callers borrow from
+    the same pool, so a worker can still wait in `acquire` while they hold
+    connections, up to the pool timeout.
+
+    :return: The shared ThreadPoolExecutor.
     """
-    db_username, db_password, db_name, db_endpoint = _get_database_credentials()
-    conn = pymysql.connect(
-        host=db_endpoint,
-        port=3306,
-        user=db_username,
-        password=db_password,
-        database=db_name,
-        autocommit=True
-    )
-    return conn
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_pool().max_size,
+                    thread_name_prefix='statlib-db'
+                )
+
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Wait for queued database calls to finish and stop the executor threads.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _call_with_cursor(func, args: tuple, kwargs: dict, streaming: bool = False):
+    """
+    Call `func` with a cursor borrowed from the shared pool.
+
+    With `streaming`, the cursor is the backend's unbuffered cursor.
+    """
+    with get_pool().connection() as conn:
+        cursor = get_backend().stream_cursor(conn) if streaming else conn.cursor()
+        with cursor:
+            return func(*args, **kwargs, cursor=cursor)
+
+
+@contextmanager
+def transaction(cursor: Cursor) -> Iterator[Cursor]:
+    """
+    Run the enclosed statements on `cursor` as a single transaction.
+
+    Pooled connections run in autocommit mode, so an explicit BEGIN is issued
+    and the transaction is committed on success or rolled back on error.
+
+    :param cursor: Database cursor whose connection hosts the transaction.
+    :return: The same cursor.
+    """
+    conn = cursor.connection
+    conn.begin()
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
 
 
 def ensure_cursor(func):
@@ -44,7 +482,10 @@ def ensure_cursor(func):
     Decorator that ensures a database cursor is available for the wrapped function.
 
     If a `cursor` keyword argument is provided, it is reused.
-    Otherwise, a new database connection and cursor are created.
+    Otherwise, a connection is borrowed from the shared pool for the duration of the call.
+
+    The wrapper also exposes an awaitable variant as `.aio`, which runs the
+    same call on the database executor (see `async_ensure_cursor`).
 
     :param func: The function to wrap. Must accept a `cursor` keyword argument.
     :return: Wrapped function with a guaranteed cursor.
@@ -55,35 +496,56 @@ def ensure_cursor(func):
         if cursor:
             return func(*args, **kwargs)
 
-        with db_connect() as conn:
-            conn.autocommit = True
-            cursor = conn.cursor()
-            kwargs['cursor'] = cursor
+        return _call_with_cursor(func, args, kwargs)
+
+    wrapper.aio = async_ensure_cursor(func)
+    return wrapper
+
+
+def ensure_stream_cursor(func):
+    """
+    Like `ensure_cursor`, but a borrowed cursor is unbuffered: rows are
+    fetched from the server as they are read, so results larger than memory
+    can be walked with `fetchmany`. The connection cannot run other queries
+    until the result is consumed.
+
+    :param func: The function to wrap. Must accept a `cursor` keyword argument.
+    :return: Wrapped function with a guaranteed cursor.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cursor: Cursor | None = kwargs.get('cursor')
+        if cursor:
             return func(*args, **kwargs)
 
+        return _call_with_cursor(func, args, kwargs, streaming=True)
+
+    wrapper.aio = async_ensure_cursor(func, streaming=True)
     return wrapper
 
 
-def async_ensure_cursor(func):
+def async_ensure_cursor(func, streaming: bool = False):
     """
-    Async decorator that ensures a database cursor is available for the coroutine.
+    Decorator that turns a cursor-consuming function into an awaitable.
 
-    If a `cursor` keyword argument is provided, it is reused.
-    Otherwise, a new database connection and cursor are created.
+    The wrapped function runs on the dedicated database executor, so query
+    latency never blocks the event loop. If a `cursor` keyword argument is
+    provided, it is reused; otherwise a connection is borrowed from the shared
+    pool inside the worker thread.
 
-    :param func: The coroutine function to wrap. Must accept a `cursor` keyword argument.
-    :return: Wrapped coroutine with a guaranteed cursor.
+    :param func: The function to wrap. Must accept a `cursor` keyword argument.
+    :param streaming: Borrow an unbuffered cursor, see `ensure_stream_cursor`.
+    :return: Coroutine function returning the wrapped function's result.
     """
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         cursor: Cursor | None = kwargs.get('cursor')
         if cursor:
-            return await func(*args, **kwargs)
+            call = functools.partial(func, *args, **kwargs)
+        else:
+            call = functools.partial(_call_with_cursor, func, args, kwargs, streaming)
 
-        with db_connect() as conn:
-            conn.autocommit = True
-            cursor = conn.cursor()
-            kwargs['cursor'] = cursor
-            return await func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), call)
 
-    return wrapper
\ No newline at end of file
+    return wrapper
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from statlib.database import Cursor
+
+
+def split_by_hour(
+    track_name: str,
+    artist_name: str,
+    started_at: datetime,
+    ended_at: datetime
+) -> Iterator[tuple[datetime, datetime, str, str, float]]:
+    """
+    Cut a play into entries that never cross an hour boundary, like tracker sessions.
+
+    :param track_name: Name of the track.
+    :param artist_name: Name of the artist.
+    :param started_at: When playback started.
+    :param ended_at: When playback ended.
+    :return: Iterator of (started_at, ended_at, track_name, artist_name, duration) tuples.
+    """
+    while started_at < ended_at:
+        boundary = started_at.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        end = min(boundary, ended_at)
+        yield started_at, end, track_name, artist_name, (end - started_at).total_seconds()
+        started_at = end
+
+
+def drop_overlapping(
+    rows: list[tuple[datetime, datetime, str, str, float]],
+    ids: dict[tuple[str, str], tuple[int, int]],
+    cursor: Cursor
+) -> list[tuple[datetime, datetime, str, str, float]]:
+    """
+    Remove entries overlapping stored or earlier listening of the same track.
+
+    This skips plays the tracker already recorded as well as re-imported
+    files and re-fetched plays.
+
+    :param rows: (started_at, ended_at, track_name, artist_name, duration) tuples.
+    :param ids: Mapping of (track_name, artist_name) to (track id, artist id),
+        as returned by `DimensionHandler.resolve_tracks`.
+    :param cursor: Database cursor.
+    :return: The rows that overlap nothing, in their original order.
+    """
+    start = min(row[0] for row in rows) - timedelta(hours=1)
+    end = max(row[1] for row in rows)
+
+    cursor.execute(
+        """
+        SELECT track_id, timestamp, ended_at, duration
+        FROM listening_data
+        WHERE timestamp >= %s AND timestamp < %s
+        """,
+        (start, end)
+    )
+
+    intervals: dict[int, list[tuple[datetime, datetime]]] = {}
+    for track_id, started_at, ended_at, duration in cursor.fetchall():
+        stop = max(ended_at or started_at, started_at + timedelta(seconds=duration))
+        intervals.setdefault(track_id, []).append((started_at, stop))
+
+    kept = []
+    for row in rows:
+        started_at, ended_at, track_name, artist_name, _ = row
+        seen = intervals.setdefault(ids[track_name, artist_name][0], [])
+
+        if any(other_start < ended_at and other_end > started_at for other_start, other_end in seen):
+            continue
+
+        seen.append((started_at, ended_at))
+        kept.append(row)
+
+    return kept
@@ -0,0 +1,258 @@
+import os
+import csv
+import gzip
+import json
+import argparse
+from enum import Enum
+from io import StringIO
+from datetime import datetime
+from typing import Iterator
+
+from statlib.logging import logger
+from statlib.database.periods import Period
+from statlib.database.backends import get_backend
+from statlib.database.connection import Cursor, ensure_stream_cursor
+
+
+FETCH_SIZE: int = 1_000
+MAX_BYTES: int = 10 * 1024 * 1024
+SPLIT_MARGIN: int = 256 * 1024
+
+
+class ExportFormat(Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+
+class Aggregation(Enum):
+    """
+    Row level of an export: one row per stored session, or listening time per
+    track summed over each hour, day or month.
+    """
+    SESSION = 'session'
+    HOUR = 'hour'
+    DAY = 'day'
+    MONTH = 'month'
+
+
+SESSION_COLUMNS: tuple[str, ...] = ('started_at', 'ended_at', 'track', 'artist', 'seconds')
+AGGREGATE_COLUMNS: tuple[str, ...] = ('bucket', 'track', 'artist', 'seconds')
+
+
+def _query(aggregation: Aggregation, period: Period | None) -> tuple[str, list]:
+    """
+    Build the export query. Sessions are read from `listening_data`, every
+    other level from the hourly rollups.
+
+    An argument list is always returned, even when empty, so the drivers
+    unescape the `%%` in bucket expressions.
+    """
+    args = []
+
+    if aggregation is Aggregation.SESSION:
+        where = ''
+        if period:
+            where = 'WHERE ld.timestamp >= %s AND ld.timestamp < %s'
+            args = [period.start, period.end]
+
+        return f"""
+            SELECT ld.timestamp, ld.ended_at, t.name, a.name, ld.duration
+            FROM listening_data ld
+            JOIN tracks t ON t.id = ld.track_id
+            JOIN artists a ON a.id = ld.artist_id
+            {where}
+            ORDER BY ld.timestamp, ld.id
+        """, args
+
+    where = ''
+    if period:
+        where = 'WHERE h.hour_start >= %s AND h.hour_start < %s'
+        args = [period.start, period.end]
+
+    bucket = get_backend().bucket('h.hour_start', aggregation.value)
+
+    return f"""
+        SELECT totals.bucket, t.name, a.name, totals.seconds
+        FROM (
+            SELECT {bucket} AS bucket, h.track_id, h.artist_id, SUM(h.total_seconds) AS seconds
+            FROM hourly_track_artist_totals h
+            {where}
+            GROUP BY bucket, h.track_id, h.artist_id
+        ) AS totals
+        JOIN tracks t ON t.id = totals.track_id
+        JOIN artists a ON a.id = totals.artist_id
+        ORDER BY totals.bucket, totals.seconds DESC
+    """, args
+
+
+def _iter_rows(cursor: Cursor, fetch_size: int) -> Iterator[tuple]:
+    """
+    Yield result rows `fetch_size` at a time.
+    """
+    while rows := cursor.fetchmany(fetch_size):
+        yield from rows
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, float):
+        return round(value, 3)
+    return value
+
+
+def _encode(row: tuple, columns: tuple[str, ...], export_format: ExportFormat) -> str:
+    values = [_value(value) for value in row]
+
+    if export_format is ExportFormat.NDJSON:
+        return json.dumps(dict(zip(columns, values)), ensure_ascii=False) + '\n'
+
+    line = StringIO()
+    csv.writer(line, lineterminator='\n').writerow(values)
+    return line.getvalue()
+
+
+def _header(columns: tuple[str, ...], export_format: ExportFormat) -> str:
+    if export_format is ExportFormat.CSV:
+        return ','.join(columns) + '\n'
+    return ''
+
+
+class _PartWriter:
+    """
+    Write text into numbered gzip files, starting a new file before the
+    compressed size of the current one reaches `max_bytes`.
+
+    Compressed output lags behind the input by what zlib still holds, so parts
+    are cut `SPLIT_MARGIN` bytes early.
+    """
+
+    def __init__(self, stem: str, extension: str, header: str, max_bytes: int) -> None:
+        self.stem = stem
+        self.extension = extension
+        self.header = header
+        self.limit = max_bytes - min(SPLIT_MARGIN, max_bytes // 2)
+        self.paths: list[str] = []
+        self._raw = None
+        self._file = None
+        self._rows = 0
+
+
+    def _open(self) -> None:
+        self.close()
+
+        path = f"{self.stem}.part{len(self.paths) + 1}.{self.extension}.gz"
+        self.paths.append(path)
+        self._raw = open(path, 'wb')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        self._file.write(self.header.encode())
+        self._rows = 0
+
+
+    def write(self, line: str) -> None:
+        if self._file is None or (self._rows and self._raw.tell() >= self.limit):
+            self._open()
+
+        self._file.write(line.encode())
+        self._rows += 1
+
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+
+    def finish(self) -> list[str]:
+        """
+        Close the last part, naming a single part without its part number.
+
+        :return: Paths of the written files.
+        """
+        if not self.paths:
+            self._open()
+        self.close()
+
+        if len(self.paths) == 1:
+            single = f"{self.stem}.{self.extension}.gz"
+            os.replace(self.paths[0], single)
+            self.paths[0] = single
+
+        return self.paths
+
+
+@ensure_stream_cursor
+def export_listening(
+    directory: str,
+    *,
+    period: Period | None = None,
+    aggregation: Aggregation = Aggregation.SESSION,
+    export_format: ExportFormat = ExportFormat.CSV,
+    max_bytes: int = MAX_BYTES,
+    fetch_size: int = FETCH_SIZE,
+    cursor: Cursor = None
+) -> list[str]:
+    """
+    Export listening history to gzip-compressed CSV or NDJSON files.
+
+    Rows are streamed from an unbuffered cursor `fetch_size` at a time and
+    written straight to disk, so memory use does not grow with the history.
+    Output larger than `max_bytes` is split into numbered parts, each one a
+    complete file with its own CSV header.
+
+    :param directory: Directory to write the files to.
+    :param period: Only export this period, defaults to all history.
+    :param aggregation: Sessions or per-track totals per hour, day or month.
+    :param export_format: File format.
+    :param max_bytes: Maximum compressed size of one file.
+    :param fetch_size: Rows fetched from the server at a time.
+    :param cursor: Database cursor.
+    :return: Paths of the written files.
+    """
+    columns = SESSION_COLUMNS if aggregation is Aggregation.SESSION else AGGREGATE_COLUMNS
+    stem = os.path.join(directory, f"listening_{aggregation.value}")
+    if period:
+        stem += f"_{period.start:%Y%m%d}-{period.end:%Y%m%d}"
+
+    writer = _PartWriter(stem, export_format.value, _header(columns, export_format), max_bytes)
+
+    query, args = _query(aggregation, period)
+    cursor.execute(query, args)
+
+    rows = 0
+    try:
+        for row in _iter_rows(cursor, fetch_size):
+            writer.write(_encode(row, columns, export_format))
+            rows += 1
+    finally:
+        writer.close()
+
+    paths = writer.finish()
+    logger.info(f"Exported {rows:,} {aggregation.value} rows to {len(paths)} file(s)")
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export listening history to compressed CSV or NDJSON.")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="Inclusive start, e.g. 2024-01-01")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Exclusive end, defaults to now")
+    parser.add_argument('--aggregation', choices=[a.value for a in Aggregation], default=Aggregation.SESSION.value)
+    parser.add_argument('--format', choices=[f.value for f in ExportFormat], default=ExportFormat.CSV.value)
+    parser.add_argument('--output', default='.', help="Output directory")
+    parser.add_argument('--max-bytes', type=int, default=0, help="Split files above this compressed size, 0 to never split")
+    options = parser.parse_args()
+
+    export_period = None
+    if options.start or options.end:
+        export_period = Period(options.start or datetime(1970, 1, 1), options.end or datetime.now())
+
+    os.makedirs(options.output, exist_ok=True)
+    for written in export_listening(
+        options.output,
+        period=export_period,
+        aggregation=Aggregation(options.aggregation),
+        export_format=ExportFormat(options.format),
+        max_bytes=options.max_bytes or 1 << 62
+    ):
+        logger.info(f"Wrote {written}")
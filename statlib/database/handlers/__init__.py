@@ -1,12 +1,29 @@
-from .listening import ListeningHandler
+from .archive import ArchiveHandler
+from .dimensions import DimensionHandler
+from .genres import GenreHandler
+from .listening import ListeningHandler, ListeningWriteError
+from .metadata import MetadataHandler
 from .overview import OverviewHandler
+from .partitions import PartitionHandler
+from .reports import ReportHandler
+from .rollups import RollupHandler
+from .state import StateHandler
 from .stats import StatsHandler
 from .tracks import TracksHandler
 
 
 __all__ = [
+    'ArchiveHandler',
+    'DimensionHandler',
+    'GenreHandler',
     'ListeningHandler',
+    'ListeningWriteError',
+    'MetadataHandler',
     'OverviewHandler',
+    'PartitionHandler',
+    'ReportHandler',
+    'RollupHandler',
+    'StateHandler',
     'StatsHandler',
     'TracksHandler'
 ]
\ No newline at end of file
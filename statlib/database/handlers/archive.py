@@ -0,0 +1,158 @@
+import os
+from datetime import datetime
+
+import numpy as np
+
+from statlib.logging import logger
+from statlib.database import Cursor, ensure_cursor, Period
+from .partitions import PartitionHandler
+
+
+ARCHIVE_DIR: str = os.getenv('DBARCHIVEDIR', 'archive')
+RETENTION_MONTHS: int = int(os.getenv('DBRETENTIONMONTHS', 0))
+
+
+class ArchiveHandler:
+    """
+    Moves closed months of `listening_data` out of the hot table.
+
+    Each archived month is exported to a compressed NumPy file and recorded
+    in `archived_months` before the month's rows are dropped. The hourly
+    rollups are kept, so period stats and all-time rankings are unaffected.
+    Months are archived oldest first, so every month before the newest
+    `archived_months` entry is archived.
+    """
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_archived_before(*, cursor: Cursor = None) -> datetime | None:
+        """
+        Retrieve the end of the newest archived month.
+
+        :param cursor: Database cursor.
+        :return: Exclusive upper bound of archived data, or None if nothing is archived.
+        """
+        cursor.execute("SELECT month_end FROM archived_months ORDER BY month_start DESC LIMIT 1")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+    @staticmethod
+    def _export(path: str, rows: list[tuple]) -> None:
+        """
+        Write archived rows to `path` as compressed columns, atomically.
+        """
+        ids, timestamps, ended_at, track_ids, artist_ids, durations, track_names, artist_names = zip(*rows)
+
+        partial = f"{path}.partial"
+        with open(partial, 'wb') as file:
+            np.savez_compressed(
+                file,
+                id=np.array(ids, dtype=np.int64),
+                timestamp=np.array(timestamps, dtype='datetime64[us]'),
+                ended_at=np.array(ended_at, dtype='datetime64[us]'),
+                track_id=np.array(track_ids, dtype=np.int64),
+                artist_id=np.array(artist_ids, dtype=np.int64),
+                duration=np.array(durations, dtype=np.float64),
+                track_name=np.array(track_names, dtype=np.str_),
+                artist_name=np.array(artist_names, dtype=np.str_)
+            )
+        os.replace(partial, path)
+
+
+    @staticmethod
+    @ensure_cursor
+    def archive_month(period: Period, directory: str = ARCHIVE_DIR, *, cursor: Cursor = None) -> int:
+        """
+        Archive one calendar month and drop it from `listening_data`.
+
+        A month already recorded in `archived_months` is only dropped, so an
+        interrupted run can be repeated safely.
+
+        :param period: Monthly period to archive.
+        :param directory: Directory receiving the archive file.
+        :param cursor: Database cursor.
+        :return: Number of rows archived.
+        """
+        cursor.execute("SELECT 1 FROM archived_months WHERE month_start = %s", (period.start,))
+        if cursor.fetchone():
+            PartitionHandler.drop_month(period, cursor=cursor)
+            return 0
+
+        cursor.execute(
+            """
+            SELECT l.id, l.timestamp, l.ended_at, l.track_id, l.artist_id, l.duration, t.name, a.name
+            FROM listening_data l
+            JOIN tracks t ON t.id = l.track_id
+            JOIN artists a ON a.id = l.artist_id
+            WHERE l.timestamp >= %s AND l.timestamp < %s
+            ORDER BY l.id
+            """,
+            (period.start, period.end)
+        )
+        rows = cursor.fetchall()
+
+        path = None
+        if rows:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"listening_{period.start:%Y_%m}.npz")
+            ArchiveHandler._export(path, rows)
+
+        cursor.execute(
+            """
+            INSERT INTO archived_months (month_start, month_end, row_count, total_seconds, path)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (period.start, period.end, len(rows), sum(row[5] for row in rows), path)
+        )
+
+        PartitionHandler.drop_month(period, cursor=cursor)
+        logger.info(f"Archived {len(rows)} rows for {period.start:%Y-%m} to {path}")
+
+        return len(rows)
+
+
+    @staticmethod
+    @ensure_cursor
+    def archive_expired(
+        retention_months: int = RETENTION_MONTHS,
+        directory: str = ARCHIVE_DIR,
+        *,
+        cursor: Cursor = None
+    ) -> int:
+        """
+        Archive every month older than the retention window.
+
+        :param retention_months: Closed months to keep in `listening_data`
+            besides the current one; 0 disables archiving.
+        :param directory: Directory receiving the archive files.
+        :param cursor: Database cursor.
+        :return: Number of rows archived.
+        """
+        if retention_months <= 0:
+            return 0
+
+        cutoff = Period.this_month().start
+        for _ in range(retention_months):
+            cutoff = Period.last_month(cutoff).start
+
+        first = ArchiveHandler.get_archived_before(cursor=cursor)
+        if first is None:
+            cursor.execute("SELECT timestamp FROM listening_data ORDER BY timestamp LIMIT 1")
+            row = cursor.fetchone()
+            if row is None:
+                return 0
+            first = row[0]
+
+        archived = 0
+        for period in Period.months(first, cutoff):
+            if period.end > cutoff:
+                break
+            archived += ArchiveHandler.archive_month(period, directory, cursor=cursor)
+
+        return archived
+
+
+if __name__ == '__main__':
+    logger.info(f"Archived {ArchiveHandler.archive_expired()} rows")
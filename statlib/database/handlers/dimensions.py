@@ -0,0 +1,307 @@
+from typing import Iterable
+from statlib.database import Cursor, ensure_cursor, transaction, get_backend
+
+
+RESOLVE_CHUNK: int = 500
+
+
+class DimensionHandler:
+    """
+    Maps track and artist names to the integer keys stored in fact tables.
+
+    Resolved ids are cached in-process for the lifetime of the bot, since
+    dimension rows are never deleted or renumbered. Only names not seen
+    before cost a database round-trip.
+    """
+
+    _artist_ids: dict[str, int] = {}
+    _track_ids: dict[tuple[str, str], int] = {}
+    _artist_names: dict[int, str] = {}
+    _track_names: dict[int, tuple[str, str]] = {}
+    _artist_spotify_ids: dict[int, str] = {}
+    _track_spotify_ids: dict[int, str] = {}
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_artist_id(artist_name: str, *, cursor: Cursor = None) -> int:
+        """
+        Retrieve the id for an artist, creating the artist if needed.
+
+        :param artist_name: Name of the artist.
+        :param cursor: Database cursor.
+        :return: The artist id.
+        """
+        cached = DimensionHandler._artist_ids.get(artist_name)
+        if cached is not None:
+            return cached
+
+        cursor.execute(get_backend().insert_ignore('artists', ('name',)), (artist_name,))
+        cursor.execute("SELECT id FROM artists WHERE name = %s", (artist_name,))
+        (artist_id,) = cursor.fetchone()
+
+        DimensionHandler._artist_ids[artist_name] = artist_id
+        return artist_id
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_track_id(track_name: str, artist_name: str, *, cursor: Cursor = None) -> tuple[int, int]:
+        """
+        Retrieve the ids for a track and its artist, creating them if needed.
+
+        :param track_name: Name of the track.
+        :param artist_name: Name of the artist.
+        :param cursor: Database cursor.
+        :return: Tuple of (track id, artist id).
+        """
+        artist_id = DimensionHandler.get_artist_id(artist_name, cursor=cursor)
+
+        cached = DimensionHandler._track_ids.get((track_name, artist_name))
+        if cached is not None:
+            return cached, artist_id
+
+        cursor.execute(
+            get_backend().insert_ignore('tracks', ('artist_id', 'name')),
+            (artist_id, track_name)
+        )
+        cursor.execute(
+            "SELECT id FROM tracks WHERE artist_id = %s AND name = %s",
+            (artist_id, track_name)
+        )
+        (track_id,) = cursor.fetchone()
+
+        DimensionHandler._track_ids[track_name, artist_name] = track_id
+        return track_id, artist_id
+
+
+    @staticmethod
+    @ensure_cursor
+    def resolve_tracks(
+        pairs: Iterable[tuple[str, str]],
+        *,
+        cursor: Cursor = None
+    ) -> dict[tuple[str, str], tuple[int, int]]:
+        """
+        Retrieve the ids for many (track, artist) pairs, creating them if needed.
+
+        Unknown names are inserted and looked up in chunks, one transaction
+        per chunk, so a batch costs a few round-trips instead of two per new
+        name. It must not be called inside a transaction. Names the database
+        matches under a different spelling (e.g. case-insensitive collations)
+        fall back to the single-name lookups.
+
+        :param pairs: (track name, artist name) tuples.
+        :param cursor: Database cursor.
+        :return: Mapping of (track name, artist name) to (track id, artist id).
+        """
+        pairs = set(pairs)
+        backend = get_backend()
+
+        artists = list({artist for _, artist in pairs if artist not in DimensionHandler._artist_ids})
+        for i in range(0, len(artists), RESOLVE_CHUNK):
+            chunk = artists[i:i + RESOLVE_CHUNK]
+            with transaction(cursor):
+                cursor.executemany(backend.insert_ignore('artists', ('name',)), [(name,) for name in chunk])
+            cursor.execute(
+                f"SELECT id, name FROM artists WHERE name IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            for artist_id, name in cursor.fetchall():
+                DimensionHandler._artist_ids[name] = artist_id
+
+        for artist in artists:
+            if artist not in DimensionHandler._artist_ids:
+                DimensionHandler.get_artist_id(artist, cursor=cursor)
+
+        tracks = [pair for pair in pairs if pair not in DimensionHandler._track_ids]
+        for i in range(0, len(tracks), RESOLVE_CHUNK):
+            chunk = [(DimensionHandler._artist_ids[artist], track) for track, artist in tracks[i:i + RESOLVE_CHUNK]]
+            with transaction(cursor):
+                cursor.executemany(backend.insert_ignore('tracks', ('artist_id', 'name')), chunk)
+
+            # An OR of equality pairs is answered with one (artist_id, name)
+            # index lookup per pair; a row-value IN list is not, on SQLite.
+            cursor.execute(
+                f"""
+                SELECT t.id, t.name, a.name
+                FROM tracks t
+                JOIN artists a ON a.id = t.artist_id
+                WHERE {' OR '.join(['(t.artist_id = %s AND t.name = %s)'] * len(chunk))}
+                """,
+                [value for row in chunk for value in row]
+            )
+            for track_id, track_name, artist_name in cursor.fetchall():
+                DimensionHandler._track_ids[track_name, artist_name] = track_id
+
+        resolved = {}
+        for track, artist in pairs:
+            track_id = DimensionHandler._track_ids.get((track, artist))
+            artist_id = DimensionHandler._artist_ids.get(artist)
+
+            if track_id is None or artist_id is None:
+                track_id, artist_id = DimensionHandler.get_track_id(track, artist, cursor=cursor)
+
+            resolved[track, artist] = (track_id, artist_id)
+
+        return resolved
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_artist_names(artist_ids: list[int], *, cursor: Cursor = None) -> dict[int, str]:
+        """
+        Retrieve artist names for a set of ids.
+
+        :param artist_ids: Artist ids to look up.
+        :param cursor: Database cursor.
+        :return: Mapping of artist id to name.
+        """
+        missing = [i for i in set(artist_ids) if i not in DimensionHandler._artist_names]
+
+        if missing:
+            placeholders = ", ".join(["%s"] * len(missing))
+            cursor.execute(f"SELECT id, name FROM artists WHERE id IN ({placeholders})", missing)
+            DimensionHandler._artist_names.update(cursor.fetchall())
+
+        return {i: DimensionHandler._artist_names[i] for i in artist_ids if i in DimensionHandler._artist_names}
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_track_names(track_ids: list[int], *, cursor: Cursor = None) -> dict[int, tuple[str, str]]:
+        """
+        Retrieve track and artist names for a set of track ids.
+
+        :param track_ids: Track ids to look up.
+        :param cursor: Database cursor.
+        :return: Mapping of track id to (track name, artist name).
+        """
+        missing = [i for i in set(track_ids) if i not in DimensionHandler._track_names]
+
+        if missing:
+            placeholders = ", ".join(["%s"] * len(missing))
+            cursor.execute(
+                f"""
+                SELECT t.id, t.name, a.name
+                FROM tracks t
+                JOIN artists a ON a.id = t.artist_id
+                WHERE t.id IN ({placeholders})
+                """,
+                missing
+            )
+            for track_id, track_name, artist_name in cursor.fetchall():
+                DimensionHandler._track_names[track_id] = (track_name, artist_name)
+
+        return {i: DimensionHandler._track_names[i] for i in track_ids if i in DimensionHandler._track_names}
+
+
+    @staticmethod
+    @ensure_cursor
+    def record_spotify_ids(
+        track_ids: dict[int, str],
+        artist_ids: dict[int, str],
+        *,
+        cursor: Cursor = None
+    ) -> tuple[dict[int, str], dict[int, str]]:
+        """
+        Store Spotify ids for tracks and artists. Ids already recorded by this
+        process are skipped, so repeated plays cost nothing.
+
+        Can run inside the caller's transaction. Pass the returned ids to
+        `remember_spotify_ids` once it has committed.
+
+        :param track_ids: Mapping of track id to Spotify track id.
+        :param artist_ids: Mapping of artist id to Spotify artist id.
+        :param cursor: Database cursor.
+        :return: The track and artist ids that were written.
+        """
+        tracks = {i: sid for i, sid in track_ids.items() if DimensionHandler._track_spotify_ids.get(i) != sid}
+        artists = {i: sid for i, sid in artist_ids.items() if DimensionHandler._artist_spotify_ids.get(i) != sid}
+
+        if tracks:
+            cursor.executemany(
+                "UPDATE tracks SET spotify_id = %s WHERE id = %s",
+                [(sid, i) for i, sid in tracks.items()]
+            )
+        if artists:
+            cursor.executemany(
+                "UPDATE artists SET spotify_id = %s WHERE id = %s",
+                [(sid, i) for i, sid in artists.items()]
+            )
+
+        return tracks, artists
+
+
+    @staticmethod
+    def remember_spotify_ids(track_ids: dict[int, str], artist_ids: dict[int, str]) -> None:
+        """
+        Mark committed Spotify ids as recorded, so `record_spotify_ids` skips them.
+
+        :param track_ids: Mapping of track id to Spotify track id.
+        :param artist_ids: Mapping of artist id to Spotify artist id.
+        """
+        DimensionHandler._track_spotify_ids.update(track_ids)
+        DimensionHandler._artist_spotify_ids.update(artist_ids)
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_artist_spotify_ids(artist_names: Iterable[str], *, cursor: Cursor = None) -> dict[str, str]:
+        """
+        Retrieve the recorded Spotify ids of artists.
+
+        :param artist_names: Artist names to look up.
+        :param cursor: Database cursor.
+        :return: Mapping of artist name to Spotify id, for artists with a recorded id.
+        """
+        names = list(set(artist_names))
+        found = {}
+
+        for i in range(0, len(names), RESOLVE_CHUNK):
+            chunk = names[i:i + RESOLVE_CHUNK]
+            cursor.execute(
+                f"""
+                SELECT name, spotify_id FROM artists
+                WHERE spotify_id IS NOT NULL AND name IN ({', '.join(['%s'] * len(chunk))})
+                """,
+                chunk
+            )
+            found.update(cursor.fetchall())
+
+        return found
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_track_spotify_ids(
+        pairs: Iterable[tuple[str, str]],
+        *,
+        cursor: Cursor = None
+    ) -> dict[tuple[str, str], str]:
+        """
+        Retrieve the recorded Spotify ids of tracks.
+
+        :param pairs: (track name, artist name) tuples to look up.
+        :param cursor: Database cursor.
+        :return: Mapping of (track name, artist name) to Spotify id, for tracks with a recorded id.
+        """
+        pairs = list(set(pairs))
+        found = {}
+
+        for i in range(0, len(pairs), RESOLVE_CHUNK):
+            chunk = pairs[i:i + RESOLVE_CHUNK]
+            cursor.execute(
+                f"""
+                SELECT t.name, a.name, t.spotify_id
+                FROM tracks t
+                JOIN artists a ON a.id = t.artist_id
+                WHERE t.spotify_id IS NOT NULL
+                AND ({' OR '.join(['(t.name = %s AND a.name = %s)'] * len(chunk))})
+                """,
+                [value for pair in chunk for value in pair]
+            )
+            for track_name, artist_name, spotify_id in cursor.fetchall():
+                found[track_name, artist_name] = spotify_id
+
+        return found
@@ -0,0 +1,278 @@
+from datetime import datetime
+from collections import defaultdict
+from typing import Iterable
+
+from statlib.database import (
+    Cursor, ensure_cursor, transaction, cached_result, get_backend, result_cache, leaderboards, TopGenre, Period
+)
+
+
+GENRE_CHUNK: int = 500
+
+
+class GenreHandler:
+    """
+    Maintains the artist to genre mapping and the `hourly_genre_totals` rollup.
+
+    Genres are filled in by background enrichment through `set_artist_genres`,
+    which also moves the artist's existing listening time into the rollup.
+    From then on `record`, run inside the listening insert transaction, adds
+    new listening time for artists with known genres. Both run under the
+    listening writer lock, so no listening is missed or counted twice.
+    """
+
+    _genre_ids: dict[str, int] = {}
+    _artist_genres: dict[int, tuple[int, ...]] = {}
+
+
+    @staticmethod
+    def _load_artist_genres(artist_ids: Iterable[int], cursor: Cursor) -> dict[int, tuple[int, ...]]:
+        """
+        Read the genre ids of artists from the database, bypassing the cache.
+        """
+        artist_ids = list(set(artist_ids))
+        found: dict[int, list[int]] = {artist_id: [] for artist_id in artist_ids}
+
+        for i in range(0, len(artist_ids), GENRE_CHUNK):
+            chunk = artist_ids[i:i + GENRE_CHUNK]
+            cursor.execute(
+                f"SELECT artist_id, genre_id FROM artist_genres WHERE artist_id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            for artist_id, genre_id in cursor.fetchall():
+                found[artist_id].append(genre_id)
+
+        return {artist_id: tuple(sorted(genre_ids)) for artist_id, genre_ids in found.items()}
+
+
+    @staticmethod
+    def get_artist_genres(artist_ids: Iterable[int], *, cursor: Cursor) -> dict[int, tuple[int, ...]]:
+        """
+        Retrieve the genre ids of artists, cached in-process.
+
+        :param artist_ids: Artist ids.
+        :param cursor: Database cursor.
+        :return: Mapping of artist id to genre ids, empty for artists without known genres.
+        """
+        artist_ids = set(artist_ids)
+        missing = [artist_id for artist_id in artist_ids if artist_id not in GenreHandler._artist_genres]
+
+        if missing:
+            GenreHandler._artist_genres.update(GenreHandler._load_artist_genres(missing, cursor))
+
+        return {artist_id: GenreHandler._artist_genres[artist_id] for artist_id in artist_ids}
+
+
+    @staticmethod
+    def record(artist_hours: dict[tuple[datetime, int], float], *, cursor: Cursor) -> None:
+        """
+        Add listening time to the genre rollup. Run inside the transaction
+        that inserts the listening.
+
+        :param artist_hours: Mapping of (hour start, artist id) to seconds listened.
+        :param cursor: Database cursor.
+        """
+        genres = GenreHandler.get_artist_genres([artist_id for _, artist_id in artist_hours], cursor=cursor)
+
+        totals = defaultdict(float)
+        for (hour, artist_id), seconds in artist_hours.items():
+            for genre_id in genres[artist_id]:
+                totals[hour, genre_id] += seconds
+
+        if totals:
+            cursor.executemany(
+                get_backend().upsert(
+                    'hourly_genre_totals',
+                    ('hour_start', 'genre_id', 'total_seconds'),
+                    ('hour_start', 'genre_id'),
+                    increment=('total_seconds',)
+                ),
+                [(*key, seconds) for key, seconds in totals.items()]
+            )
+
+
+    @staticmethod
+    def rebuild(period: Period, *, cursor: Cursor) -> None:
+        """
+        Recompute the genre rollup for a period from `hourly_track_artist_totals`.
+        Run after that rollup has been rebuilt for the same period.
+
+        :param period: Half-open, hour-aligned time range to rebuild.
+        :param cursor: Database cursor.
+        """
+        cursor.execute(
+            "DELETE FROM hourly_genre_totals WHERE hour_start >= %s AND hour_start < %s",
+            (period.start, period.end)
+        )
+        cursor.execute(
+            """
+            INSERT INTO hourly_genre_totals (hour_start, genre_id, total_seconds)
+            SELECT h.hour_start, ag.genre_id, SUM(h.total_seconds)
+            FROM hourly_track_artist_totals h
+            JOIN artist_genres ag ON ag.artist_id = h.artist_id
+            WHERE h.hour_start >= %s AND h.hour_start < %s
+            GROUP BY h.hour_start, ag.genre_id
+            """,
+            (period.start, period.end)
+        )
+
+
+    @staticmethod
+    def _resolve_genres(names: set[str], cursor: Cursor) -> dict[str, int]:
+        """
+        Map genre names to ids, creating genres as needed, one committed
+        transaction per chunk. Must not be called inside a transaction.
+        """
+        missing = [name for name in names if name not in GenreHandler._genre_ids]
+
+        for i in range(0, len(missing), GENRE_CHUNK):
+            chunk = missing[i:i + GENRE_CHUNK]
+            with transaction(cursor):
+                cursor.executemany(get_backend().insert_ignore('genres', ('name',)), [(name,) for name in chunk])
+            cursor.execute(
+                f"SELECT id, name FROM genres WHERE name IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            for genre_id, name in cursor.fetchall():
+                GenreHandler._genre_ids[name] = genre_id
+
+        return {name: GenreHandler._genre_ids[name] for name in names}
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_artists_to_enrich(older_than: datetime, limit: int = 500, *, cursor: Cursor = None) -> list[tuple[int, str]]:
+        """
+        Retrieve artists whose genres were never fetched or were fetched before `older_than`.
+
+        :param older_than: Refetch genres fetched before this time.
+        :param limit: Maximum number of artists to return.
+        :param cursor: Database cursor.
+        :return: (artist id, artist name) tuples.
+        """
+        cursor.execute(
+            """
+            SELECT id, name FROM artists
+            WHERE genres_fetched_at IS NULL OR genres_fetched_at < %s
+            ORDER BY genres_fetched_at IS NOT NULL, genres_fetched_at, id
+            LIMIT %s
+            """,
+            (older_than, limit)
+        )
+        return cursor.fetchall()
+
+
+    @staticmethod
+    @ensure_cursor
+    def set_artist_genres(genres: dict[int, list[str]], *, cursor: Cursor = None) -> int:
+        """
+        Store the genres of artists and move their listening time in the
+        genre rollup accordingly.
+
+        For every artist whose genres changed, its hourly listening time is
+        subtracted from the genres it lost and added to the genres it gained,
+        in the same transaction as the mapping change.
+
+        :param genres: Mapping of artist id to genre names.
+        :param cursor: Database cursor.
+        :return: Number of artists whose genres changed.
+        """
+        if not genres:
+            return 0
+
+        backend = get_backend()
+        now = datetime.now()
+
+        genre_ids = GenreHandler._resolve_genres({name for names in genres.values() for name in names}, cursor)
+        new = {artist_id: tuple(sorted({genre_ids[name] for name in names})) for artist_id, names in genres.items()}
+
+        with leaderboards.lock:
+            with transaction(cursor):
+                old = GenreHandler._load_artist_genres(genres, cursor)
+                changed = [artist_id for artist_id in genres if new[artist_id] != old[artist_id]]
+
+                for i in range(0, len(changed), GENRE_CHUNK):
+                    chunk = changed[i:i + GENRE_CHUNK]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+
+                    cursor.execute(
+                        f"""
+                        SELECT hour_start, artist_id, SUM(total_seconds)
+                        FROM hourly_track_artist_totals
+                        WHERE artist_id IN ({placeholders})
+                        GROUP BY hour_start, artist_id
+                        """,
+                        chunk
+                    )
+                    deltas = defaultdict(float)
+                    for hour, artist_id, seconds in cursor.fetchall():
+                        for genre_id in set(new[artist_id]) - set(old[artist_id]):
+                            deltas[hour, genre_id] += seconds
+                        for genre_id in set(old[artist_id]) - set(new[artist_id]):
+                            deltas[hour, genre_id] -= seconds
+
+                    cursor.executemany(
+                        backend.upsert(
+                            'hourly_genre_totals',
+                            ('hour_start', 'genre_id', 'total_seconds'),
+                            ('hour_start', 'genre_id'),
+                            increment=('total_seconds',)
+                        ),
+                        [(*key, seconds) for key, seconds in deltas.items() if seconds]
+                    )
+
+                    cursor.execute(f"DELETE FROM artist_genres WHERE artist_id IN ({placeholders})", chunk)
+                    cursor.executemany(
+                        "INSERT INTO artist_genres (artist_id, genre_id) VALUES (%s, %s)",
+                        [(artist_id, genre_id) for artist_id in chunk for genre_id in new[artist_id]]
+                    )
+
+                cursor.executemany(
+                    "UPDATE artists SET genres_fetched_at = %s WHERE id = %s",
+                    [(now, artist_id) for artist_id in genres]
+                )
+
+            GenreHandler._artist_genres.update(new)
+
+        if changed:
+            result_cache.bump()
+        return len(changed)
+
+
+    @staticmethod
+    @cached_result()
+    @ensure_cursor
+    def get_top_genres(period: Period | None = None, limit: int = 10, *, cursor: Cursor = None) -> list[TopGenre]:
+        """
+        Retrieve the most listened-to genres from the genre rollup.
+
+        Only artists with enriched genres are counted.
+
+        :param period: Period to rank, defaults to all time.
+        :param limit: Number of genres to return.
+        :param cursor: Database cursor.
+        :return: List of TopGenre instances.
+        """
+        where, args = '', []
+        if period:
+            where = 'WHERE hour_start >= %s AND hour_start < %s'
+            args = [period.start, period.end]
+
+        cursor.execute(
+            f"""
+            SELECT g.name, top.total
+            FROM (
+                SELECT genre_id, SUM(total_seconds) AS total
+                FROM hourly_genre_totals
+                {where}
+                GROUP BY genre_id
+                HAVING SUM(total_seconds) > 0.5
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN genres g ON g.id = top.genre_id
+            ORDER BY top.total DESC
+            """,
+            [*args, limit]
+        )
+        return [TopGenre(genre_name=row[0], total_seconds=row[1]) for row in cursor.fetchall()]
@@ -1,9 +1,31 @@
-from statlib.database import Cursor, ensure_cursor, ListeningEntry
+from datetime import datetime
+from statlib.database import (
+    Cursor, ensure_cursor, transaction, get_backend, result_cache, leaderboards, listening_snapshot,
+    ListeningEntry, ListeningSession
+)
+from .dimensions import DimensionHandler
+from .rollups import RollupHandler
+
+
+SESSION_MAX_SECONDS: int = 1800
+
+
+class ListeningWriteError(Exception):
+    """
+    Raised by `ListeningHandler.insert_entries` when no listening was
+    committed, so the entries can safely be written again.
+    """
 
 
 class ListeningHandler:
     """
     Handles raw listening entry inserts and retrieval.
+
+    Each row in `listening_data` is one listening session: `timestamp` is when
+    playback started, `ended_at` when it was last observed and `duration` the
+    seconds listened. Sessions never cross an hour boundary, so every row
+    belongs to exactly one hourly rollup bucket. Tracks and artists are
+    stored as integer keys into the `tracks` and `artists` tables.
     """
 
     @staticmethod
@@ -16,23 +38,116 @@ class ListeningHandler:
         cursor: Cursor = None
     ) -> None:
         """
-        Insert or merge a listening entry.
-
-        Uses NOW(6) for microsecond precision and merges entries that collide
-        with the UNIQUE KEY using ON DUPLICATE KEY UPDATE.
+        Insert or merge a listening entry stamped with the current local time.
 
         :param track_name: Name of the track.
         :param artist_name: Name of the artist.
         :param duration: Duration listened in seconds.
         :param cursor: Database cursor.
         """
-        cursor.execute(
-            """
-            INSERT INTO listening_data (timestamp, track_name, artist_name, duration)
-            VALUES (NOW(6), %s, %s, %s)
-            ON DUPLICATE KEY UPDATE duration = duration + VALUES(duration)
-            """,
-            (track_name, artist_name, duration)
+        now = datetime.now()
+        ListeningHandler.insert_entries(
+            [(now, now, track_name, artist_name, duration)], cursor=cursor
+        )
+
+    @staticmethod
+    @ensure_cursor
+    def insert_entries(
+        entries: list[tuple[datetime, datetime, str, str, float]],
+        *,
+        spotify_ids: dict[tuple[str, str], tuple[str | None, str | None]] | None = None,
+        cursor: Cursor = None
+    ) -> None:
+        """
+        Insert or merge a batch of listening entries and update the hourly rollups.
+
+        Names are resolved to dimension ids before the transaction starts.
+        Entries that collide with the UNIQUE KEY are merged into the existing
+        row. The raw rows, the rollups and any Spotify ids are written in one
+        transaction, after which the all-time leaderboards are updated and
+        cached query results are invalidated. If any entry was merged, the
+        listening snapshot is invalidated too, as it only appends new rows.
+
+        Merging adds durations, so writing the same entries twice counts them
+        twice. Only a `ListeningWriteError` means nothing was committed; any
+        other error is raised after the commit.
+
+        :param entries: (started_at, ended_at, track_name, artist_name, duration) tuples.
+        :param spotify_ids: Optional mapping of (track_name, artist_name) to
+            (track Spotify id, artist Spotify id), recorded on the dimension rows.
+        :param cursor: Database cursor.
+        :raises ListeningWriteError: If the entries were not committed.
+        """
+        if not entries:
+            return
+
+        try:
+            ids = DimensionHandler.resolve_tracks(
+                [(track_name, artist_name) for _, _, track_name, artist_name, _ in entries],
+                cursor=cursor
+            )
+        except Exception as error:
+            raise ListeningWriteError(f"Could not resolve tracks: {error}") from error
+
+        rows = []
+        plays = []
+        for started_at, ended_at, track_name, artist_name, duration in entries:
+            track_id, artist_id = ids[track_name, artist_name]
+            rows.append((started_at, ended_at, track_id, artist_id, duration))
+            plays.append((track_id, artist_id, track_name, artist_name, duration))
+
+        spotify_ids = {pair: sids for pair, sids in (spotify_ids or {}).items() if pair in ids}
+        track_sids = {ids[pair][0]: track_sid for pair, (track_sid, _) in spotify_ids.items() if track_sid}
+        artist_sids = {ids[pair][1]: artist_sid for pair, (_, artist_sid) in spotify_ids.items() if artist_sid}
+
+        with leaderboards.lock:
+            try:
+                with transaction(cursor):
+                    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM listening_data")
+                    last_id = cursor.fetchone()[0]
+
+                    cursor.executemany(
+                        get_backend().upsert(
+                            'listening_data',
+                            ('timestamp', 'ended_at', 'track_id', 'artist_id', 'duration'),
+                            ('timestamp', 'track_id', 'artist_id'),
+                            increment=('duration',),
+                            replace=('ended_at',)
+                        ),
+                        rows
+                    )
+                    cursor.execute("SELECT COUNT(*) FROM listening_data WHERE id > %s", (last_id,))
+                    merged = cursor.fetchone()[0] < len(rows)
+
+                    RollupHandler.record(rows, cursor=cursor)
+
+                    recorded = DimensionHandler.record_spotify_ids(track_sids, artist_sids, cursor=cursor)
+
+            except Exception as error:
+                raise ListeningWriteError(f"Listening insert rolled back: {error}") from error
+
+            leaderboards.record(plays)
+
+        if merged:
+            listening_snapshot.invalidate()
+
+        DimensionHandler.remember_spotify_ids(*recorded)
+        result_cache.bump()
+
+    @staticmethod
+    def session_row(session: ListeningSession) -> tuple[datetime, datetime, str, str, float]:
+        """
+        Convert a session into the row tuple accepted by `insert_entries`.
+
+        :param session: The session to persist.
+        :return: (started_at, ended_at, track_name, artist_name, duration) tuple.
+        """
+        return (
+            session.started_at,
+            session.ended_at,
+            session.track_name,
+            session.artist_name,
+            session.duration
         )
 
     @staticmethod
@@ -45,7 +160,14 @@ class ListeningHandler:
         :return: ListeningEntry instance or None.
         """
         cursor.execute(
-            "SELECT * FROM listening_data ORDER BY id DESC LIMIT 1"
+            """
+            SELECT l.id, l.timestamp, t.name, a.name, l.duration, l.ended_at
+            FROM listening_data l
+            JOIN tracks t ON t.id = l.track_id
+            JOIN artists a ON a.id = l.artist_id
+            ORDER BY l.id DESC
+            LIMIT 1
+            """
         )
         row = cursor.fetchone()
 
@@ -57,5 +179,6 @@ class ListeningHandler:
             timestamp=row[1],
             track_name=row[2],
             artist_name=row[3],
-            duration=row[4]
+            duration=row[4],
+            ended_at=row[5]
         )
@@ -0,0 +1,80 @@
+import json
+from typing import Iterable
+
+from statlib.database import Cursor, ensure_cursor, get_backend
+from statlib.database.models import SpotifyMetadata
+
+
+LOOKUP_CHUNK: int = 500
+
+
+class MetadataHandler:
+    """
+    Reads and writes the persistent Spotify metadata cache.
+    """
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_metadata(kind: str, keys: Iterable[str], *, cursor: Cursor = None) -> dict[str, SpotifyMetadata]:
+        """
+        Retrieve cached metadata for many keys of one kind.
+
+        :param kind: Either 'artist' or 'track'.
+        :param keys: Normalized lookup keys.
+        :param cursor: Database cursor.
+        :return: Mapping of key to metadata, for the keys that are cached.
+        """
+        keys = list(set(keys))
+        found = {}
+
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            cursor.execute(
+                f"""
+                SELECT lookup_key, found, spotify_id, image_url, genres, fetched_at
+                FROM spotify_metadata
+                WHERE kind = %s AND lookup_key IN ({', '.join(['%s'] * len(chunk))})
+                """,
+                [kind, *chunk]
+            )
+            for key, hit, spotify_id, image_url, genres, fetched_at in cursor.fetchall():
+                found[key] = SpotifyMetadata(
+                    kind=kind,
+                    key=key,
+                    found=bool(hit),
+                    spotify_id=spotify_id,
+                    image_url=image_url,
+                    genres=json.loads(genres) if genres else [],
+                    fetched_at=fetched_at
+                )
+
+        return found
+
+
+    @staticmethod
+    @ensure_cursor
+    def put_metadata(entries: list[SpotifyMetadata], *, cursor: Cursor = None) -> None:
+        """
+        Store metadata, replacing cached entries with the same key.
+
+        :param entries: Metadata to store; `fetched_at` must be set.
+        :param cursor: Database cursor.
+        """
+        columns = ('kind', 'lookup_key', 'found', 'spotify_id', 'image_url', 'genres', 'fetched_at')
+
+        cursor.executemany(
+            get_backend().upsert('spotify_metadata', columns, ('kind', 'lookup_key'), replace=columns[2:]),
+            [
+                (
+                    entry.kind,
+                    entry.key,
+                    entry.found,
+                    entry.spotify_id,
+                    entry.image_url,
+                    json.dumps(entry.genres) if entry.genres else None,
+                    entry.fetched_at
+                )
+                for entry in entries
+            ]
+        )
@@ -1,4 +1,6 @@
-from statlib.database import Cursor, ensure_cursor, TimeSummary, TopArtist, TopTrack
+from statlib.database import (
+    Cursor, ensure_cursor, cached_result, ALL_TIME_STALENESS, TimeSummary, TopArtist, TopTrack, Period
+)
 
 
 class OverviewHandler:
@@ -9,6 +11,7 @@ class OverviewHandler:
 
 
     @staticmethod
+    @cached_result()
     @ensure_cursor
     def get_year_total(year: int, *, cursor: Cursor = None) -> TimeSummary:
         """
@@ -18,13 +21,14 @@ class OverviewHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
+        period = Period.year(year)
         cursor.execute(
             """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEAR(timestamp) = %s
+            SELECT COALESCE(SUM(total_seconds), 0)
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
             """,
-            (year,)
+            (period.start, period.end)
         )
         (total,) = cursor.fetchone()
         return TimeSummary(total_seconds=total)
@@ -32,6 +36,7 @@ class OverviewHandler:
 
 
     @staticmethod
+    @cached_result(max_stale=ALL_TIME_STALENESS)
     @ensure_cursor
     def get_top_tracks(limit: int = 5, *, cursor: Cursor = None) -> list[TopTrack]:
         """
@@ -43,20 +48,27 @@ class OverviewHandler:
         """
         cursor.execute(
             """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT t.name, a.name, top.total
+            FROM (
+                SELECT track_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                GROUP BY track_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN tracks t ON t.id = top.track_id
+            JOIN artists a ON a.id = t.artist_id
+            ORDER BY top.total DESC
             """,
             (limit,)
         )
         rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return [TopTrack(track_name=row[0], artist_name=row[1], total_seconds=row[2]) for row in rows]
 
 
 
     @staticmethod
+    @cached_result(max_stale=ALL_TIME_STALENESS)
     @ensure_cursor
     def get_top_artists(limit: int = 5, *, cursor: Cursor = None) -> list[TopArtist]:
         """
@@ -68,11 +80,16 @@ class OverviewHandler:
         """
         cursor.execute(
             """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT a.name, top.total
+            FROM (
+                SELECT artist_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                GROUP BY artist_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN artists a ON a.id = top.artist_id
+            ORDER BY top.total DESC
             """,
             (limit,)
         )
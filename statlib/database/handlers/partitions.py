@@ -0,0 +1,119 @@
+from datetime import datetime
+from statlib.logging import logger
+from statlib.database import Cursor, ensure_cursor, get_backend, Period
+
+
+def partition_name(period: Period) -> str:
+    """
+    Name of the partition holding a calendar month.
+
+    :param period: Monthly period.
+    :return: Partition name, e.g. 'p202401'.
+    """
+    return f"p{period.start:%Y%m}"
+
+
+class PartitionHandler:
+    """
+    Maintains the monthly RANGE COLUMNS partitions of `listening_data`.
+
+    Every month lives in its own partition, and new rows past the last month
+    fall into `p_future`. Period filters on `timestamp` then only read the
+    partitions they overlap. On backends without partitioning, every
+    operation falls back to plain row-level statements.
+    """
+
+
+    @staticmethod
+    @ensure_cursor
+    def list_partitions(*, cursor: Cursor = None) -> list[tuple[str, int]]:
+        """
+        Retrieve the partitions of `listening_data`.
+
+        :param cursor: Database cursor.
+        :return: (partition name, approximate row count) tuples in range order.
+        """
+        if not get_backend().partitioned:
+            return []
+
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME, TABLE_ROWS
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = 'listening_data'
+              AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """
+        )
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+    @staticmethod
+    @ensure_cursor
+    def ensure_partitions(months_ahead: int = 2, *, cursor: Cursor = None) -> int:
+        """
+        Split monthly partitions out of `p_future` up to `months_ahead` months
+        past the current one.
+
+        :param months_ahead: Number of future months that must have a partition.
+        :param cursor: Database cursor.
+        :return: Number of partitions created.
+        """
+        existing = {name for name, _ in PartitionHandler.list_partitions(cursor=cursor)}
+        if 'p_future' not in existing:
+            return 0
+
+        period = Period.this_month()
+        for _ in range(months_ahead):
+            period = Period.this_month(period.end)
+
+        missing = [
+            month for month in Period.months(datetime.now(), period.start)
+            if partition_name(month) not in existing
+        ]
+        if not missing:
+            return 0
+
+        partitions = [
+            f"PARTITION {partition_name(month)} VALUES LESS THAN ('{month.end:%Y-%m-%d}')"
+            for month in missing
+        ]
+        partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+
+        cursor.execute(
+            f"""
+            ALTER TABLE listening_data
+            REORGANIZE PARTITION p_future INTO (
+                {', '.join(partitions)}
+            )
+            """
+        )
+        logger.info(f"Created partitions {', '.join(partition_name(month) for month in missing)}")
+
+        return len(missing)
+
+
+    @staticmethod
+    @ensure_cursor
+    def drop_month(period: Period, *, cursor: Cursor = None) -> None:
+        """
+        Remove every listening row of a calendar month.
+
+        The month's partition is dropped when it exists, which is a metadata
+        operation regardless of row count; otherwise its rows are deleted.
+
+        :param period: Monthly period to remove.
+        :param cursor: Database cursor.
+        """
+        name = partition_name(period)
+        existing = {partition for partition, _ in PartitionHandler.list_partitions(cursor=cursor)}
+
+        if name in existing:
+            cursor.execute(f"ALTER TABLE listening_data DROP PARTITION {name}")
+            return
+
+        cursor.execute(
+            "DELETE FROM listening_data WHERE timestamp >= %s AND timestamp < %s",
+            (period.start, period.end)
+        )
@@ -0,0 +1,77 @@
+import heapq
+from collections import defaultdict
+from statlib.database import (
+    Cursor, ensure_cursor, cached_result, Period, Granularity, PeriodReport, TopArtist, TopTrack
+)
+from .dimensions import DimensionHandler
+
+
+class ReportHandler:
+    """
+    Builds complete period reports (total, rankings and chart breakdown)
+    for the /daily, /weekly, /monthly and /overview commands.
+    """
+
+
+    @staticmethod
+    @cached_result()
+    @ensure_cursor
+    def get_report(
+        period: Period,
+        granularity: Granularity,
+        limit: int = 5,
+        *,
+        cursor: Cursor = None
+    ) -> PeriodReport:
+        """
+        Retrieve the total, top tracks, top artists and breakdown of a period.
+
+        A single grouped scan over `hourly_track_artist_totals` returns one row
+        per (bucket, track id, artist id); every part of the report is folded
+        from those rows in Python, and names are resolved only for the ranked ids.
+
+        :param period: Half-open, hour-aligned time range to report on.
+        :param granularity: Bucket size for the breakdown.
+        :param limit: Number of tracks and artists to rank.
+        :param cursor: Database cursor.
+        :return: PeriodReport for the period.
+        """
+        cursor.execute(
+            f"""
+            SELECT {granularity.value} AS bucket, track_id, artist_id, SUM(total_seconds)
+            FROM hourly_track_artist_totals
+            WHERE hour_start >= %s AND hour_start < %s
+            GROUP BY bucket, track_id, artist_id
+            """,
+            (period.start, period.end)
+        )
+
+        buckets = [0] * granularity.bucket_count(period)
+        tracks = defaultdict(int)
+        artists = defaultdict(int)
+        total = 0
+
+        for bucket, track_id, artist_id, seconds in cursor.fetchall():
+            buckets[bucket] += seconds
+            tracks[track_id] += seconds
+            artists[artist_id] += seconds
+            total += seconds
+
+        top_tracks = heapq.nlargest(limit, tracks.items(), key=lambda item: item[1])
+        top_artists = heapq.nlargest(limit, artists.items(), key=lambda item: item[1])
+
+        track_names = DimensionHandler.get_track_names([i for i, _ in top_tracks], cursor=cursor)
+        artist_names = DimensionHandler.get_artist_names([i for i, _ in top_artists], cursor=cursor)
+
+        return PeriodReport(
+            total_seconds=total,
+            top_tracks=[
+                TopTrack(track_name=track_names[i][0], artist_name=track_names[i][1], total_seconds=seconds)
+                for i, seconds in top_tracks
+            ],
+            top_artists=[
+                TopArtist(artist_name=artist_names[i], total_seconds=seconds)
+                for i, seconds in top_artists
+            ],
+            breakdown=[round(seconds / 60) for seconds in buckets]
+        )
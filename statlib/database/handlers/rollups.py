@@ -0,0 +1,157 @@
+from datetime import datetime
+from collections import defaultdict
+from statlib.logging import logger
+from statlib.database import Cursor, ensure_cursor, transaction, get_backend, result_cache, Period
+from .archive import ArchiveHandler
+from .genres import GenreHandler
+
+
+def hour_start(timestamp: datetime) -> datetime:
+    """
+    Truncate a timestamp to the start of its hour.
+
+    :param timestamp: Any point in time.
+    :return: The hour bucket the timestamp belongs to.
+    """
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupHandler:
+    """
+    Maintains the hourly rollup tables that period statistics are read from.
+
+    `hourly_totals` holds total seconds per hour and `hourly_track_artist_totals`
+    holds seconds per (hour, track id, artist id). Both, and the genre rollup
+    kept by `GenreHandler`, are kept in step with `listening_data` by
+    `record`, which callers run inside the same transaction as the raw insert.
+    """
+
+
+    @staticmethod
+    @ensure_cursor
+    def record(
+        entries: list[tuple[datetime, datetime, int, int, float]],
+        *,
+        cursor: Cursor = None
+    ) -> None:
+        """
+        Add listening time to the hourly rollups.
+
+        Entries are summed per hour bucket first, so a batch touches each
+        rollup row at most once.
+
+        :param entries: (started_at, ended_at, track_id, artist_id, duration) tuples,
+            bucketed by their start time.
+        :param cursor: Database cursor.
+        """
+        hours = defaultdict(float)
+        track_artists = defaultdict(float)
+        artists = defaultdict(float)
+
+        for started_at, _, track_id, artist_id, duration in entries:
+            bucket = hour_start(started_at)
+            hours[bucket] += duration
+            track_artists[bucket, track_id, artist_id] += duration
+            artists[bucket, artist_id] += duration
+
+        backend = get_backend()
+
+        cursor.executemany(
+            backend.upsert(
+                'hourly_totals',
+                ('hour_start', 'total_seconds'),
+                ('hour_start',),
+                increment=('total_seconds',)
+            ),
+            list(hours.items())
+        )
+        cursor.executemany(
+            backend.upsert(
+                'hourly_track_artist_totals',
+                ('hour_start', 'track_id', 'artist_id', 'total_seconds'),
+                ('hour_start', 'track_id'),
+                increment=('total_seconds',)
+            ),
+            [(*key, seconds) for key, seconds in track_artists.items()]
+        )
+        GenreHandler.record(artists, cursor=cursor)
+
+
+    @staticmethod
+    @ensure_cursor
+    def rebuild(period: Period, *, cursor: Cursor = None) -> None:
+        """
+        Recompute the rollups for a period from `listening_data`.
+
+        Existing buckets inside the period are replaced, so the rebuild is
+        idempotent. The period should be hour-aligned.
+
+        :param period: Half-open time range to rebuild.
+        :param cursor: Database cursor.
+        """
+        cursor.execute(
+            "DELETE FROM hourly_totals WHERE hour_start >= %s AND hour_start < %s",
+            (period.start, period.end)
+        )
+        cursor.execute(
+            "DELETE FROM hourly_track_artist_totals WHERE hour_start >= %s AND hour_start < %s",
+            (period.start, period.end)
+        )
+        bucket = get_backend().hour_bucket('timestamp')
+
+        cursor.execute(
+            f"""
+            INSERT INTO hourly_totals (hour_start, total_seconds)
+            SELECT {bucket} AS bucket, SUM(duration)
+            FROM listening_data
+            WHERE timestamp >= %s AND timestamp < %s
+            GROUP BY bucket
+            """,
+            (period.start, period.end)
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO hourly_track_artist_totals (hour_start, track_id, artist_id, total_seconds)
+            SELECT {bucket} AS bucket, track_id, artist_id, SUM(duration)
+            FROM listening_data
+            WHERE timestamp >= %s AND timestamp < %s
+            GROUP BY bucket, track_id, artist_id
+            """,
+            (period.start, period.end)
+        )
+        GenreHandler.rebuild(period, cursor=cursor)
+
+
+    @staticmethod
+    @ensure_cursor
+    def backfill(*, cursor: Cursor = None) -> int:
+        """
+        Build the rollups from the full listening history, one month at a time
+        so no single statement holds locks over the whole table. Archived
+        months are skipped, since their raw rows are gone.
+
+        :param cursor: Database cursor.
+        :return: Number of months rebuilt.
+        """
+        cursor.execute("SELECT timestamp FROM listening_data ORDER BY timestamp LIMIT 1")
+        first = cursor.fetchone()
+        cursor.execute("SELECT timestamp FROM listening_data ORDER BY timestamp DESC LIMIT 1")
+        last = cursor.fetchone()
+
+        if first is None:
+            return 0
+
+        archived_before = ArchiveHandler.get_archived_before(cursor=cursor)
+        start = max(first[0], archived_before) if archived_before else first[0]
+
+        months = 0
+
+        for period in Period.months(start, last[0]):
+            with transaction(cursor):
+                RollupHandler.rebuild(period, cursor=cursor)
+            result_cache.bump()
+            logger.info(f"Rebuilt rollups for {period.start:%Y-%m}")
+
+            months += 1
+
+        return months
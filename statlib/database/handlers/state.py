@@ -0,0 +1,45 @@
+from datetime import datetime
+from statlib.database import Cursor, ensure_cursor, get_backend
+
+
+class StateHandler:
+    """
+    Reads and writes named values in the `tracker_state` table, such as the
+    recently-played high-water mark.
+    """
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_state(name: str, *, cursor: Cursor = None) -> str | None:
+        """
+        Retrieve a stored value.
+
+        :param name: Name of the value.
+        :param cursor: Database cursor.
+        :return: The stored value, or None if it was never set.
+        """
+        cursor.execute("SELECT value FROM tracker_state WHERE name = %s", (name,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+    @staticmethod
+    @ensure_cursor
+    def set_state(name: str, value: str, *, cursor: Cursor = None) -> None:
+        """
+        Store a value, replacing any previous one.
+
+        :param name: Name of the value.
+        :param value: Value to store.
+        :param cursor: Database cursor.
+        """
+        cursor.execute(
+            get_backend().upsert(
+                'tracker_state',
+                ('name', 'value', 'updated_at'),
+                ('name',),
+                replace=('value', 'updated_at')
+            ),
+            (name, value, datetime.now())
+        )
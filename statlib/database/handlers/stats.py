@@ -1,34 +1,53 @@
-from datetime import date
-from statlib.database import Cursor, ensure_cursor, TimeSummary
+import calendar
+from statlib.database import Cursor, ensure_cursor, cached_result, TimeSummary, Period
 
 
 class StatsHandler:
     """
     Provides listening statistics for daily, weekly, and monthly periods.
+
+    Totals are read from the `hourly_totals` rollup, so every period must be
+    hour-aligned (all Period constructors are).
     """
 
 
     @staticmethod
+    @cached_result()
     @ensure_cursor
-    def get_today(*, cursor: Cursor = None) -> TimeSummary:
+    def get_total(period: Period, *, cursor: Cursor = None) -> TimeSummary:
         """
-        Retrieve total listening time for today.
+        Retrieve total listening time within a period.
 
+        :param period: Half-open time range to sum over.
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
         cursor.execute(
             """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE DATE(timestamp) = CURDATE()
-            """
+            SELECT COALESCE(SUM(total_seconds), 0)
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
+            """,
+            (period.start, period.end)
         )
         (total,) = cursor.fetchone()
         return TimeSummary(total_seconds=total)
 
 
 
+    @staticmethod
+    @ensure_cursor
+    def get_today(*, cursor: Cursor = None) -> TimeSummary:
+        """
+        Retrieve total listening time for today.
+
+        :param cursor: Database cursor.
+        :return: TimeSummary containing total seconds.
+        """
+        return StatsHandler.get_total(Period.today(), cursor=cursor)
+
+
+
     @staticmethod
     @ensure_cursor
     def get_yesterday(*, cursor: Cursor = None) -> TimeSummary:
@@ -38,15 +57,7 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE DATE(timestamp) = CURDATE() - INTERVAL 1 DAY
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
+        return StatsHandler.get_total(Period.yesterday(), cursor=cursor)
 
 
 
@@ -59,15 +70,7 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEARWEEK(timestamp, 1) = YEARWEEK(CURDATE(), 1)
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
+        return StatsHandler.get_total(Period.this_week(), cursor=cursor)
 
 
 
@@ -80,15 +83,7 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEARWEEK(timestamp, 1) = YEARWEEK(CURDATE(), 1) - 1
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
+        return StatsHandler.get_total(Period.last_week(), cursor=cursor)
 
 
 
@@ -101,16 +96,7 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-              AND MONTH(timestamp) = MONTH(CURDATE())
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
+        return StatsHandler.get_total(Period.this_month(), cursor=cursor)
 
 
 
@@ -123,17 +109,8 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: TimeSummary containing total seconds.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE() - INTERVAL 1 MONTH)
-              AND MONTH(timestamp) = MONTH(CURDATE() - INTERVAL 1 MONTH)
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
-    
+        return StatsHandler.get_total(Period.last_month(), cursor=cursor)
+
 
     @staticmethod
     @ensure_cursor
@@ -144,16 +121,8 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: A TimeSummary containing total seconds listened in the year.
         """
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(duration), 0)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-            """
-        )
-        (total,) = cursor.fetchone()
-        return TimeSummary(total_seconds=total)
-    
+        return StatsHandler.get_total(Period.this_year(), cursor=cursor)
+
 
     @staticmethod
     @ensure_cursor
@@ -162,14 +131,16 @@ class StatsHandler:
         Return a list of 24 integers representing minutes listened per hour today.
         Index 0 = 00:00–00:59, index 23 = 23:00–23:59.
         """
+        period = Period.today()
         cursor.execute(
             """
-            SELECT HOUR(timestamp) AS hour, SUM(duration)
-            FROM listening_data
-            WHERE DATE(timestamp) = CURDATE()
+            SELECT HOUR(hour_start) AS hour, SUM(total_seconds)
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
             GROUP BY hour
             ORDER BY hour
-            """
+            """,
+            (period.start, period.end)
         )
 
         results = cursor.fetchall()
@@ -193,16 +164,18 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: List of minutes listened each day.
         """
+        period = Period.this_week()
         cursor.execute(
             """
-            SELECT 
-                WEEKDAY(timestamp) AS day_index,
-                SUM(duration) AS total_seconds
-            FROM listening_data
-            WHERE YEARWEEK(timestamp, 1) = YEARWEEK(CURDATE(), 1)
-            GROUP BY WEEKDAY(timestamp)
+            SELECT
+                WEEKDAY(hour_start) AS day_index,
+                SUM(total_seconds) AS total_seconds
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
+            GROUP BY day_index
             ORDER BY day_index
-            """
+            """,
+            (period.start, period.end)
         )
 
         rows = cursor.fetchall()
@@ -212,7 +185,7 @@ class StatsHandler:
             result[day_index] = round(total_seconds / 60)
 
         return result
-    
+
 
     @staticmethod
     @ensure_cursor
@@ -222,37 +195,35 @@ class StatsHandler:
 
         Each index represents a day of the month (1–31 depending on month length).
         Values are rounded minutes listened.
-        
+
         :param cursor: Database cursor (automatically injected by ensure_cursor)
         :return: List of integers representing minutes listened per day.
         """
-        cursor.execute("""
-            SELECT 
-                DAY(timestamp) AS day,
-                SUM(duration) AS total_seconds
-            FROM listening_data
-            WHERE 
-                YEAR(timestamp) = YEAR(CURRENT_DATE())
-                AND MONTH(timestamp) = MONTH(CURRENT_DATE())
+        period = Period.this_month()
+        cursor.execute(
+            """
+            SELECT
+                DAY(hour_start) AS day,
+                SUM(total_seconds) AS total_seconds
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
             GROUP BY day
-            ORDER BY day;
-        """)
+            ORDER BY day
+            """,
+            (period.start, period.end)
+        )
 
         rows = cursor.fetchall()
         days = {day: total for day, total in rows}
 
-        from datetime import datetime
-        import calendar
-
-        now = datetime.now()
-        days_in_month = calendar.monthrange(now.year, now.month)[1]
+        days_in_month = calendar.monthrange(period.start.year, period.start.month)[1]
 
         result = []
         for d in range(1, days_in_month + 1):
             result.append(round(days.get(d, 0) / 60))
 
         return result
-    
+
 
     @staticmethod
     @ensure_cursor
@@ -267,15 +238,19 @@ class StatsHandler:
         :param cursor: Database cursor.
         :return: List of minutes listened each month.
         """
-        cursor.execute("""
-            SELECT 
-                MONTH(timestamp) AS month,
-                SUM(duration) AS total_seconds
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURRENT_DATE())
+        period = Period.this_year()
+        cursor.execute(
+            """
+            SELECT
+                MONTH(hour_start) AS month,
+                SUM(total_seconds) AS total_seconds
+            FROM hourly_totals
+            WHERE hour_start >= %s AND hour_start < %s
             GROUP BY month
-            ORDER BY month;
-        """)
+            ORDER BY month
+            """,
+            (period.start, period.end)
+        )
 
         rows = cursor.fetchall()
         months = {month: total for month, total in rows}
@@ -285,5 +260,5 @@ class StatsHandler:
             result.append(round(months.get(m, 0) / 60))
 
         return result
-    
+
 
@@ -1,13 +1,18 @@
-from statlib.database import Cursor, ensure_cursor, TopArtist, TopTrack
+from statlib.database import (
+    Cursor, ensure_cursor, cached_result, ALL_TIME_STALENESS, TopArtist, TopTrack, Period
+)
 
 
 class TracksHandler:
     """
     Provides ranking data for tracks and artists.
+
+    Rankings are read from the `hourly_track_artist_totals` rollup.
     """
 
 
     @staticmethod
+    @cached_result(max_stale=ALL_TIME_STALENESS)
     @ensure_cursor
     def get_top_tracks(limit: int = 5, *, cursor: Cursor = None) -> list[TopTrack]:
         """
@@ -19,20 +24,27 @@ class TracksHandler:
         """
         cursor.execute(
             """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT t.name, a.name, top.total
+            FROM (
+                SELECT track_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                GROUP BY track_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN tracks t ON t.id = top.track_id
+            JOIN artists a ON a.id = t.artist_id
+            ORDER BY top.total DESC
             """,
             (limit,)
         )
         rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return [TopTrack(track_name=row[0], artist_name=row[1], total_seconds=row[2]) for row in rows]
 
 
 
     @staticmethod
+    @cached_result(max_stale=ALL_TIME_STALENESS)
     @ensure_cursor
     def get_top_artists(limit: int = 5, *, cursor: Cursor = None) -> list[TopArtist]:
         """
@@ -44,11 +56,16 @@ class TracksHandler:
         """
         cursor.execute(
             """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT a.name, top.total
+            FROM (
+                SELECT artist_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                GROUP BY artist_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN artists a ON a.id = top.artist_id
+            ORDER BY top.total DESC
             """,
             (limit,)
         )
@@ -58,54 +75,97 @@ class TracksHandler:
 
 
     @staticmethod
+    @cached_result()
     @ensure_cursor
-    def get_top_tracks_today(limit: int = 5, *, cursor: Cursor = None) -> list[TopTrack]:
+    def get_top_tracks_between(period: Period, limit: int = 5, *, cursor: Cursor = None) -> list[TopTrack]:
         """
-        Retrieve the most listened-to tracks for the current day.
+        Retrieve the most listened-to tracks within a period.
 
+        :param period: Half-open time range to rank over.
         :param limit: Number of tracks to return.
         :param cursor: Database cursor.
         :return: List of TopTrack instances.
         """
         cursor.execute(
             """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            WHERE DATE(timestamp) = CURDATE()
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT t.name, a.name, top.total
+            FROM (
+                SELECT track_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                WHERE hour_start >= %s AND hour_start < %s
+                GROUP BY track_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN tracks t ON t.id = top.track_id
+            JOIN artists a ON a.id = t.artist_id
+            ORDER BY top.total DESC
             """,
-            (limit,)
+            (period.start, period.end, limit)
         )
         rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return [TopTrack(track_name=row[0], artist_name=row[1], total_seconds=row[2]) for row in rows]
 
 
 
     @staticmethod
+    @cached_result()
     @ensure_cursor
-    def get_top_artists_today(limit: int = 5, *, cursor: Cursor = None) -> list[TopArtist]:
+    def get_top_artists_between(period: Period, limit: int = 5, *, cursor: Cursor = None) -> list[TopArtist]:
         """
-        Retrieve the most listened-to artists for the current day.
+        Retrieve the most listened-to artists within a period.
 
+        :param period: Half-open time range to rank over.
         :param limit: Number of artists to return.
         :param cursor: Database cursor.
         :return: List of TopArtist instances.
         """
         cursor.execute(
             """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            WHERE DATE(timestamp) = CURDATE()
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
+            SELECT a.name, top.total
+            FROM (
+                SELECT artist_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                WHERE hour_start >= %s AND hour_start < %s
+                GROUP BY artist_id
+                ORDER BY total DESC
+                LIMIT %s
+            ) AS top
+            JOIN artists a ON a.id = top.artist_id
+            ORDER BY top.total DESC
             """,
-            (limit,)
+            (period.start, period.end, limit)
         )
         rows = cursor.fetchall()
         return [TopArtist(artist_name=row[0], total_seconds=row[1]) for row in rows]
+
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_top_tracks_today(limit: int = 5, *, cursor: Cursor = None) -> list[TopTrack]:
+        """
+        Retrieve the most listened-to tracks for the current day.
+
+        :param limit: Number of tracks to return.
+        :param cursor: Database cursor.
+        :return: List of TopTrack instances.
+        """
+        return TracksHandler.get_top_tracks_between(Period.today(), limit, cursor=cursor)
+
+
+
+    @staticmethod
+    @ensure_cursor
+    def get_top_artists_today(limit: int = 5, *, cursor: Cursor = None) -> list[TopArtist]:
+        """
+        Retrieve the most listened-to artists for the current day.
+
+        :param limit: Number of artists to return.
+        :param cursor: Database cursor.
+        :return: List of TopArtist instances.
+        """
+        return TracksHandler.get_top_artists_between(Period.today(), limit, cursor=cursor)
     
 
     @staticmethod
@@ -118,19 +178,7 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopTrack instances representing weekly track rankings.
         """
-        cursor.execute(
-            """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            WHERE YEARWEEK(timestamp, 1) = YEARWEEK(CURDATE(), 1)
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_tracks_between(Period.this_week(), limit, cursor=cursor)
 
 
 
@@ -144,19 +192,7 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopArtist instances representing weekly artist rankings.
         """
-        cursor.execute(
-            """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            WHERE YEARWEEK(timestamp, 1) = YEARWEEK(CURDATE(), 1)
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopArtist(artist_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_artists_between(Period.this_week(), limit, cursor=cursor)
     
 
     @staticmethod
@@ -169,20 +205,7 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopTrack instances representing monthly track rankings.
         """
-        cursor.execute(
-            """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-              AND MONTH(timestamp) = MONTH(CURDATE())
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_tracks_between(Period.this_month(), limit, cursor=cursor)
 
 
 
@@ -196,20 +219,7 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopArtist instances representing monthly artist rankings.
         """
-        cursor.execute(
-            """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-              AND MONTH(timestamp) = MONTH(CURDATE())
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopArtist(artist_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_artists_between(Period.this_month(), limit, cursor=cursor)
     
 
     @staticmethod
@@ -222,19 +232,7 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopTrack instances representing yearly track rankings.
         """
-        cursor.execute(
-            """
-            SELECT track_name, SUM(duration)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-            GROUP BY track_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopTrack(track_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_tracks_between(Period.this_year(), limit, cursor=cursor)
 
 
 
@@ -248,22 +246,11 @@ class TracksHandler:
         :param cursor: Database cursor.
         :return: A list of TopArtist instances representing yearly artist rankings.
         """
-        cursor.execute(
-            """
-            SELECT artist_name, SUM(duration)
-            FROM listening_data
-            WHERE YEAR(timestamp) = YEAR(CURDATE())
-            GROUP BY artist_name
-            ORDER BY SUM(duration) DESC
-            LIMIT %s
-            """,
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        return [TopArtist(artist_name=row[0], total_seconds=row[1]) for row in rows]
+        return TracksHandler.get_top_artists_between(Period.this_year(), limit, cursor=cursor)
 
 
     @staticmethod
+    @cached_result(max_stale=ALL_TIME_STALENESS)
     @ensure_cursor
     def get_artist_totals(*, cursor: Cursor = None) -> list[tuple[str, int]]:
         """
@@ -271,10 +258,14 @@ class TracksHandler:
         """
         cursor.execute(
             """
-            SELECT artist_name, SUM(duration) AS total
-            FROM listening_data
-            GROUP BY artist_name
-            ORDER BY total DESC
+            SELECT a.name, totals.total
+            FROM (
+                SELECT artist_id, SUM(total_seconds) AS total
+                FROM hourly_track_artist_totals
+                GROUP BY artist_id
+            ) AS totals
+            JOIN artists a ON a.id = totals.artist_id
+            ORDER BY totals.total DESC
             """
         )
         return [(row[0], row[1]) for row in cursor.fetchall()]
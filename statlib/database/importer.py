@@ -0,0 +1,191 @@
+import sys
+import glob
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from statlib.logging import logger
+from statlib.database import Cursor, ensure_cursor
+from statlib.database.entries import drop_overlapping, split_by_hour
+from statlib.database.handlers import ArchiveHandler, DimensionHandler, ListeningHandler
+
+
+CHUNK_SIZE: int = 1 << 16
+BATCH_SIZE: int = 5_000
+
+_decoder = json.JSONDecoder()
+
+
+@dataclass
+class ImportStats:
+    """
+    Progress of a streaming history import.
+
+    :param records: JSON records read.
+    :param inserted: Listening rows written.
+    :param duplicates: Rows skipped because they overlap stored listening of the same track.
+    :param skipped: Records without track data (podcasts, zero-length plays) or inside archived months.
+    :param seconds: Time spent importing.
+    """
+    records: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Records processed per second.
+        """
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yield the elements of a top-level JSON array without loading the whole file.
+
+    The file is read in chunks and each element is decoded with
+    `JSONDecoder.raw_decode` as soon as it is complete.
+
+    :param path: JSON file containing an array.
+    :param chunk_size: Characters read per chunk.
+    :return: Iterator of decoded elements.
+    """
+    with open(path, encoding='utf-8') as file:
+        buffer = ''
+        pos = 0
+        started = False
+        eof = False
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != '[':
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+
+                if buffer[pos] == ']':
+                    return
+
+                try:
+                    element, pos = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield element
+                    continue
+
+            if eof:
+                if started:
+                    raise ValueError(f"{path} ended inside the JSON array")
+                return
+
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def parse_record(record: dict) -> list[tuple[datetime, datetime, str, str, float]]:
+    """
+    Map one extended streaming history record to listening entries.
+
+    `ts` is the UTC time playback ended; it is converted to local time, which
+    is what the tracker stores.
+
+    :param record: Decoded `Streaming_History_Audio_*.json` element.
+    :return: (started_at, ended_at, track_name, artist_name, duration) tuples,
+        empty for records without track data.
+    """
+    track_name = record.get('master_metadata_track_name')
+    artist_name = record.get('master_metadata_album_artist_name')
+    ms_played = record.get('ms_played') or 0
+
+    if not track_name or not artist_name or ms_played <= 0:
+        return []
+
+    ended_at = datetime.fromisoformat(record['ts']).astimezone().replace(tzinfo=None)
+    started_at = ended_at - timedelta(milliseconds=ms_played)
+
+    return list(split_by_hour(track_name, artist_name, started_at, ended_at))
+
+
+@ensure_cursor
+def import_history(
+    paths: Iterable[str],
+    *,
+    batch_size: int = BATCH_SIZE,
+    cursor: Cursor = None
+) -> ImportStats:
+    """
+    Import Spotify extended streaming history files.
+
+    Records are streamed from disk and written through
+    `ListeningHandler.insert_entries` in batches of `batch_size`, so the
+    rollups, leaderboards and result cache stay consistent. Plays inside
+    archived months are skipped.
+
+    :param paths: `Streaming_History_Audio_*.json` files.
+    :param batch_size: Entries written per transaction.
+    :param cursor: Database cursor.
+    :return: ImportStats for the whole import.
+    """
+    stats = ImportStats()
+    started = time.perf_counter()
+    archived_before = ArchiveHandler.get_archived_before(cursor=cursor)
+    batch: list[tuple[datetime, datetime, str, str, float]] = []
+
+    def flush() -> None:
+        ids = DimensionHandler.resolve_tracks([(row[2], row[3]) for row in batch], cursor=cursor)
+        kept = drop_overlapping(batch, ids, cursor)
+
+        ListeningHandler.insert_entries(kept, cursor=cursor)
+
+        stats.inserted += len(kept)
+        stats.duplicates += len(batch) - len(kept)
+        stats.seconds = time.perf_counter() - started
+        batch.clear()
+
+        logger.info(
+            f"Imported {stats.inserted:,} rows from {stats.records:,} records "
+            f"({stats.duplicates:,} duplicates, {stats.skipped:,} skipped, {stats.rate:,.0f} records/s)"
+        )
+
+    for path in paths:
+        logger.info(f"Importing {path}")
+
+        for record in iter_json_array(path):
+            stats.records += 1
+            entries = parse_record(record)
+
+            if not entries or (archived_before and entries[0][0] < archived_before):
+                stats.skipped += 1
+                continue
+
+            batch.extend(entries)
+            if len(batch) >= batch_size:
+                flush()
+
+    if batch:
+        flush()
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+if __name__ == '__main__':
+    files = sorted({path for pattern in sys.argv[1:] or ['Streaming_History_Audio_*.json'] for path in glob.glob(pattern)})
+    result = import_history(files)
+    logger.info(
+        f"Done: {result.inserted:,} rows from {result.records:,} records in {result.seconds:.1f}s "
+        f"({result.rate:,.0f} records/s)"
+    )
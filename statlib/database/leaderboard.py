@@ -0,0 +1,287 @@
+import random
+import threading
+from collections import defaultdict
+from typing import Hashable, Iterator
+
+from statlib.logging import logger
+from statlib.database.connection import Cursor, ensure_cursor
+from statlib.database.models import TopArtist, TopTrack
+
+
+class _Node:
+    __slots__ = ('key', 'score', 'forward')
+
+    def __init__(self, key: Hashable, score: float, level: int) -> None:
+        self.key = key
+        self.score = score
+        self.forward: list[_Node | None] = [None] * level
+
+
+class Leaderboard:
+    """
+    Scores ordered from highest to lowest, with O(log n) updates.
+
+    A dict maps each key to its score, and a skip list keeps the keys in
+    (score descending, key ascending) order, so `add` costs O(log n)
+    expected time and `top(k)` walks k nodes.
+    """
+    MAX_LEVEL: int = 24
+    P: float = 0.25
+
+
+    def __init__(self) -> None:
+        self._head = _Node(None, float('inf'), self.MAX_LEVEL)
+        self._level = 1
+        self._scores: dict[Hashable, float] = {}
+
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._scores
+
+
+    def score(self, key: Hashable) -> float:
+        """
+        :param key: Ranked key.
+        :return: The key's score, or 0 if it is not ranked.
+        """
+        return self._scores.get(key, 0.0)
+
+
+    @staticmethod
+    def _before(node: _Node, key: Hashable, score: float) -> bool:
+        """
+        Whether `node` ranks ahead of (key, score).
+        """
+        return node.score > score or (node.score == score and node.key < key)
+
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+
+    def _predecessors(self, key: Hashable, score: float) -> list[_Node]:
+        update = [self._head] * self.MAX_LEVEL
+        node = self._head
+        for level in range(self._level - 1, -1, -1):
+            while (nxt := node.forward[level]) is not None and self._before(nxt, key, score):
+                node = nxt
+            update[level] = node
+        return update
+
+
+    def _insert(self, key: Hashable, score: float) -> None:
+        update = self._predecessors(key, score)
+        level = self._random_level()
+        self._level = max(self._level, level)
+
+        node = _Node(key, score, level)
+        for i in range(level):
+            node.forward[i] = update[i].forward[i]
+            update[i].forward[i] = node
+
+
+    def _remove(self, key: Hashable, score: float) -> None:
+        update = self._predecessors(key, score)
+        node = update[0].forward[0]
+
+        for i in range(self._level):
+            if update[i].forward[i] is not node:
+                break
+            update[i].forward[i] = node.forward[i]
+
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+
+
+    def add(self, key: Hashable, delta: float) -> float:
+        """
+        Add `delta` to a key's score, ranking the key if it is new.
+
+        :param key: Ranked key.
+        :param delta: Amount to add.
+        :return: The key's new score.
+        """
+        old = self._scores.get(key)
+        if old is not None:
+            self._remove(key, old)
+
+        score = (old or 0.0) + delta
+        self._insert(key, score)
+        self._scores[key] = score
+        return score
+
+
+    def __iter__(self) -> Iterator[tuple[Hashable, float]]:
+        node = self._head.forward[0]
+        while node is not None:
+            yield node.key, node.score
+            node = node.forward[0]
+
+
+    def top(self, k: int) -> list[tuple[Hashable, float]]:
+        """
+        :param k: Number of entries to return.
+        :return: The k highest (key, score) pairs, highest first.
+        """
+        result = []
+        for entry in self:
+            if len(result) >= k:
+                break
+            result.append(entry)
+        return result
+
+
+class AllTimeLeaderboards:
+    """
+    All-time track and artist rankings kept in memory.
+
+    They are seeded once from the hourly rollups and then updated with every
+    batch `ListeningHandler.insert_entries` commits. Writers hold `lock`
+    across commit and `record`, and `seed` holds it across its read, so no
+    batch is counted twice or missed. Readers only take a short internal
+    mutex, so they never wait on a database write.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._mutex = threading.Lock()
+        self.tracks = Leaderboard()
+        self.artists = Leaderboard()
+        self.track_names: dict[int, tuple[str, str]] = {}
+        self.artist_names: dict[int, str] = {}
+        self._seeded = False
+
+
+    @property
+    def seeded(self) -> bool:
+        """
+        Whether the rankings reflect the stored history.
+        """
+        return self._seeded
+
+
+    def seed(self, cursor: Cursor) -> None:
+        """
+        Rebuild both rankings from the rollups.
+
+        :param cursor: Database cursor.
+        """
+        with self.lock:
+            tracks, artists = Leaderboard(), Leaderboard()
+
+            cursor.execute(
+                """
+                SELECT totals.track_id, t.name, a.name, totals.total
+                FROM (
+                    SELECT track_id, SUM(total_seconds) AS total
+                    FROM hourly_track_artist_totals
+                    GROUP BY track_id
+                ) AS totals
+                JOIN tracks t ON t.id = totals.track_id
+                JOIN artists a ON a.id = t.artist_id
+                """
+            )
+            for track_id, track_name, artist_name, total in cursor.fetchall():
+                tracks.add(track_id, total)
+                self.track_names[track_id] = (track_name, artist_name)
+
+            cursor.execute(
+                """
+                SELECT totals.artist_id, a.name, totals.total
+                FROM (
+                    SELECT artist_id, SUM(total_seconds) AS total
+                    FROM hourly_track_artist_totals
+                    GROUP BY artist_id
+                ) AS totals
+                JOIN artists a ON a.id = totals.artist_id
+                """
+            )
+            for artist_id, artist_name, total in cursor.fetchall():
+                artists.add(artist_id, total)
+                self.artist_names[artist_id] = artist_name
+
+            with self._mutex:
+                self.tracks, self.artists = tracks, artists
+                self._seeded = True
+
+
+    def record(self, plays: list[tuple[int, int, str, str, float]]) -> None:
+        """
+        Add a committed batch of listening time. Ignored until seeded.
+
+        :param plays: (track_id, artist_id, track_name, artist_name, duration) tuples.
+        """
+        with self.lock, self._mutex:
+            if not self._seeded:
+                return
+
+            tracks = defaultdict(float)
+            artists = defaultdict(float)
+
+            for track_id, artist_id, track_name, artist_name, duration in plays:
+                tracks[track_id] += duration
+                artists[artist_id] += duration
+                self.track_names[track_id] = (track_name, artist_name)
+                self.artist_names[artist_id] = artist_name
+
+            for track_id, seconds in tracks.items():
+                self.tracks.add(track_id, seconds)
+            for artist_id, seconds in artists.items():
+                self.artists.add(artist_id, seconds)
+
+
+    def top_tracks(self, limit: int = 5) -> list[TopTrack]:
+        """
+        :param limit: Number of tracks to return.
+        :return: The most listened-to tracks of all time.
+        """
+        with self._mutex:
+            return [
+                TopTrack(
+                    track_name=self.track_names[track_id][0],
+                    artist_name=self.track_names[track_id][1],
+                    total_seconds=total
+                )
+                for track_id, total in self.tracks.top(limit)
+            ]
+
+
+    def top_artists(self, limit: int = 5) -> list[TopArtist]:
+        """
+        :param limit: Number of artists to return.
+        :return: The most listened-to artists of all time.
+        """
+        with self._mutex:
+            return [
+                TopArtist(artist_name=self.artist_names[artist_id], total_seconds=total)
+                for artist_id, total in self.artists.top(limit)
+            ]
+
+
+    def artist_totals(self) -> list[tuple[str, float]]:
+        """
+        :return: Every artist with its all-time listening time, most listened first.
+        """
+        with self._mutex:
+            return [(self.artist_names[artist_id], total) for artist_id, total in self.artists]
+
+
+leaderboards: AllTimeLeaderboards = AllTimeLeaderboards()
+
+
+@ensure_cursor
+def seed_leaderboards(*, cursor: Cursor = None) -> None:
+    """
+    Seed the shared all-time leaderboards from the database.
+
+    :param cursor: Database cursor.
+    """
+    leaderboards.seed(cursor)
+    logger.debug(f"Seeded leaderboards with {len(leaderboards.tracks)} tracks and {len(leaderboards.artists)} artists")
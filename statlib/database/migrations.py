@@ -0,0 +1,626 @@
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Callable
+
+from statlib.logging import logger
+from statlib.database.backends import get_backend
+from statlib.database.connection import Cursor, ensure_cursor, transaction
+from statlib.database.models import ListeningSession
+from statlib.database.periods import Period
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    A single, ordered schema change.
+
+    Statements are kept per backend. SQLite databases are always created
+    fresh, so their history starts at the current schema rather than
+    replaying every MySQL step.
+
+    :param version: Monotonically increasing schema version this migration produces.
+    :param description: Short human-readable summary, stored alongside the version.
+    :param mysql: SQL statements, or callables taking a cursor, executed in order on MySQL.
+    :param sqlite: The same for SQLite; empty when the step does not apply there.
+    """
+    version: int
+    description: str
+    mysql: tuple[str | Callable[[Cursor], None], ...]
+    sqlite: tuple[str | Callable[[Cursor], None], ...] = ()
+
+    def statements(self, backend: str) -> tuple[str | Callable[[Cursor], None], ...]:
+        """
+        Return the statements to run on the named backend.
+
+        :param backend: Backend name, either 'mysql' or 'sqlite'.
+        :return: Statements in execution order.
+        """
+        return getattr(self, backend)
+
+
+def _backfill_rollups(cursor: Cursor) -> None:
+    """
+    Build the version 3 rollups from existing history, one month per transaction.
+    """
+    cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM listening_data")
+    first, last = cursor.fetchone()
+
+    if first is None:
+        return
+
+    for period in Period.months(first, last):
+        with transaction(cursor):
+            cursor.execute(
+                """
+                INSERT INTO hourly_totals (hour_start, total_seconds)
+                SELECT DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00') AS bucket, SUM(duration)
+                FROM listening_data
+                WHERE timestamp >= %s AND timestamp < %s
+                GROUP BY bucket
+                """,
+                (period.start, period.end)
+            )
+            cursor.execute(
+                """
+                INSERT INTO hourly_track_artist_totals (hour_start, track_name, artist_name, total_seconds)
+                SELECT DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00') AS bucket, track_name, artist_name, SUM(duration)
+                FROM listening_data
+                WHERE timestamp >= %s AND timestamp < %s
+                GROUP BY bucket, track_name, artist_name
+                """,
+                (period.start, period.end)
+            )
+
+        logger.info(f"Built rollups for {period.start:%Y-%m}")
+
+
+def _compact_sessions(cursor: Cursor) -> None:
+    """
+    Merge the per-poll rows of schema version 4 into session rows, one month
+    per transaction.
+
+    Consecutive rows for the same track and artist are merged while they are
+    at most 20 seconds apart, stay within one hour and the session is shorter
+    than 30 minutes. Totals per hour are unchanged, so the rollups stay valid.
+    """
+    cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM listening_data WHERE ended_at IS NULL")
+    first, last = cursor.fetchone()
+
+    if first is None:
+        return
+
+    for period in Period.months(first, last):
+        cursor.execute(
+            """
+            SELECT timestamp, track_name, artist_name, duration
+            FROM listening_data
+            WHERE timestamp >= %s AND timestamp < %s AND ended_at IS NULL
+            ORDER BY timestamp, id
+            """,
+            (period.start, period.end)
+        )
+        rows = cursor.fetchall()
+
+        sessions: list[ListeningSession] = []
+        current: ListeningSession | None = None
+
+        for timestamp, track_name, artist_name, duration in rows:
+            if (
+                current is not None
+                and current.track_name == track_name
+                and current.artist_name == artist_name
+                and (timestamp - current.ended_at).total_seconds() <= 20
+                and (timestamp - current.started_at).total_seconds() < 1800
+                and timestamp.hour == current.started_at.hour
+                and timestamp.date() == current.started_at.date()
+            ):
+                current.ended_at = timestamp
+                current.duration += duration
+                continue
+
+            current = ListeningSession(track_name, artist_name, timestamp, timestamp, duration)
+            sessions.append(current)
+
+        if not sessions:
+            continue
+
+        with transaction(cursor):
+            cursor.execute(
+                """
+                DELETE FROM listening_data
+                WHERE timestamp >= %s AND timestamp < %s AND ended_at IS NULL
+                """,
+                (period.start, period.end)
+            )
+            cursor.executemany(
+                """
+                INSERT INTO listening_data (timestamp, ended_at, track_name, artist_name, duration)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE duration = duration + VALUES(duration)
+                """,
+                [
+                    (session.started_at, session.ended_at, session.track_name, session.artist_name, session.duration)
+                    for session in sessions
+                ]
+            )
+
+        logger.info(f"Compacted {len(rows) - len(sessions)} rows into sessions for {period.start:%Y-%m}")
+
+
+def _drop_name_indexes(cursor: Cursor) -> None:
+    """
+    Drop every index on listening_data that covers the name columns, including
+    unique keys created before migrations existed, whose names are unknown.
+    """
+    cursor.execute(
+        """
+        SELECT DISTINCT INDEX_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = 'listening_data'
+          AND COLUMN_NAME IN ('track_name', 'artist_name')
+        """
+    )
+
+    for (index_name,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE listening_data DROP INDEX `{index_name}`")
+
+
+def _partition_by_month(cursor: Cursor) -> None:
+    """
+    Range partition listening_data by month of `timestamp`, with one partition
+    per month from the oldest row through the current month and a catch-all
+    `p_future` partition.
+    """
+    cursor.execute("SELECT MIN(timestamp) FROM listening_data")
+    (first,) = cursor.fetchone()
+
+    partitions = [
+        f"PARTITION p{period.start:%Y%m} VALUES LESS THAN ('{period.end:%Y-%m-%d}')"
+        for period in Period.months(first or datetime.now(), datetime.now())
+    ]
+    partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+
+    cursor.execute(
+        f"""
+        ALTER TABLE listening_data
+        PARTITION BY RANGE COLUMNS (timestamp) (
+            {', '.join(partitions)}
+        )
+        """
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        description="Create listening_data",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS listening_data (
+                id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                timestamp DATETIME(6) NOT NULL,
+                track_name VARCHAR(255) NOT NULL,
+                artist_name VARCHAR(255) NOT NULL,
+                duration DOUBLE NOT NULL,
+                UNIQUE KEY uq_listening_entry (timestamp, track_name, artist_name)
+            )
+            """,
+        )
+    ),
+    Migration(
+        version=2,
+        description="Add covering indexes for period range scans",
+        mysql=(
+            """
+            CREATE INDEX ix_listening_ts_artist
+            ON listening_data (timestamp, artist_name, duration)
+            """,
+            """
+            CREATE INDEX ix_listening_ts_track
+            ON listening_data (timestamp, track_name, duration)
+            """,
+        )
+    ),
+    Migration(
+        version=3,
+        description="Create hourly rollup tables",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS hourly_totals (
+                hour_start DATETIME NOT NULL PRIMARY KEY,
+                total_seconds DOUBLE NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hourly_track_artist_totals (
+                hour_start DATETIME NOT NULL,
+                track_name VARCHAR(255) NOT NULL,
+                artist_name VARCHAR(255) NOT NULL,
+                total_seconds DOUBLE NOT NULL,
+                PRIMARY KEY (hour_start, track_name, artist_name)
+            )
+            """,
+            _backfill_rollups,
+        )
+    ),
+    Migration(
+        version=4,
+        description="Store listening sessions with an end time",
+        mysql=(
+            """
+            ALTER TABLE listening_data
+            ADD COLUMN ended_at DATETIME(6) NULL
+            """,
+        )
+    ),
+    Migration(
+        version=5,
+        description="Compact per-poll listening rows into sessions",
+        mysql=(
+            _compact_sessions,
+        )
+    ),
+    Migration(
+        version=6,
+        description="Dictionary-encode tracks and artists",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS artists (
+                id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                UNIQUE KEY uq_artist_name (name)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS tracks (
+                id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                artist_id INT UNSIGNED NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                UNIQUE KEY uq_track (artist_id, name)
+            )
+            """,
+            """
+            INSERT IGNORE INTO artists (name)
+            SELECT DISTINCT artist_name FROM listening_data
+            """,
+            """
+            INSERT IGNORE INTO tracks (artist_id, name)
+            SELECT DISTINCT a.id, l.track_name
+            FROM listening_data l
+            JOIN artists a ON a.name = l.artist_name
+            """,
+            """
+            ALTER TABLE listening_data
+            ADD COLUMN track_id INT UNSIGNED NULL,
+            ADD COLUMN artist_id INT UNSIGNED NULL
+            """,
+            """
+            UPDATE listening_data l
+            JOIN artists a ON a.name = l.artist_name
+            JOIN tracks t ON t.artist_id = a.id AND t.name = l.track_name
+            SET l.artist_id = a.id, l.track_id = t.id
+            """,
+            _drop_name_indexes,
+            """
+            ALTER TABLE listening_data
+            DROP COLUMN track_name,
+            DROP COLUMN artist_name,
+            MODIFY track_id INT UNSIGNED NOT NULL,
+            MODIFY artist_id INT UNSIGNED NOT NULL,
+            ADD UNIQUE KEY uq_listening_entry (timestamp, track_id, artist_id),
+            ADD INDEX ix_listening_ts_artist (timestamp, artist_id, duration),
+            ADD INDEX ix_listening_ts_track (timestamp, track_id, duration)
+            """,
+            """
+            CREATE TABLE hourly_track_artist_totals_encoded (
+                hour_start DATETIME NOT NULL,
+                track_id INT UNSIGNED NOT NULL,
+                artist_id INT UNSIGNED NOT NULL,
+                total_seconds DOUBLE NOT NULL,
+                PRIMARY KEY (hour_start, track_id)
+            )
+            """,
+            """
+            INSERT INTO hourly_track_artist_totals_encoded (hour_start, track_id, artist_id, total_seconds)
+            SELECT h.hour_start, t.id, a.id, SUM(h.total_seconds)
+            FROM hourly_track_artist_totals h
+            JOIN artists a ON a.name = h.artist_name
+            JOIN tracks t ON t.artist_id = a.id AND t.name = h.track_name
+            GROUP BY h.hour_start, t.id, a.id
+            """,
+            "DROP TABLE hourly_track_artist_totals",
+            "RENAME TABLE hourly_track_artist_totals_encoded TO hourly_track_artist_totals",
+        ),
+        sqlite=(
+            """
+            CREATE TABLE IF NOT EXISTS artists (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS tracks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                artist_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                UNIQUE (artist_id, name)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS listening_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME NOT NULL,
+                ended_at DATETIME NULL,
+                track_id INTEGER NOT NULL,
+                artist_id INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                UNIQUE (timestamp, track_id, artist_id)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_listening_ts_artist
+            ON listening_data (timestamp, artist_id, duration)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_listening_ts_track
+            ON listening_data (timestamp, track_id, duration)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hourly_totals (
+                hour_start DATETIME NOT NULL PRIMARY KEY,
+                total_seconds REAL NOT NULL
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hourly_track_artist_totals (
+                hour_start DATETIME NOT NULL,
+                track_id INTEGER NOT NULL,
+                artist_id INTEGER NOT NULL,
+                total_seconds REAL NOT NULL,
+                PRIMARY KEY (hour_start, track_id)
+            ) WITHOUT ROWID
+            """,
+        )
+    ),
+    Migration(
+        version=7,
+        description="Partition listening_data by month and add archive tables",
+        mysql=(
+            """
+            ALTER TABLE listening_data
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, timestamp)
+            """,
+            _partition_by_month,
+            """
+            CREATE TABLE IF NOT EXISTS archived_months (
+                month_start DATETIME NOT NULL PRIMARY KEY,
+                month_end DATETIME NOT NULL,
+                row_count INT UNSIGNED NOT NULL,
+                total_seconds DOUBLE NOT NULL,
+                path VARCHAR(512) NULL,
+                archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS archived_totals (
+                track_id INT UNSIGNED NOT NULL PRIMARY KEY,
+                artist_id INT UNSIGNED NOT NULL,
+                total_seconds DOUBLE NOT NULL
+            )
+            """,
+        ),
+        sqlite=(
+            """
+            CREATE TABLE IF NOT EXISTS archived_months (
+                month_start DATETIME NOT NULL PRIMARY KEY,
+                month_end DATETIME NOT NULL,
+                row_count INTEGER NOT NULL,
+                total_seconds REAL NOT NULL,
+                path TEXT NULL,
+                archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS archived_totals (
+                track_id INTEGER NOT NULL PRIMARY KEY,
+                artist_id INTEGER NOT NULL,
+                total_seconds REAL NOT NULL
+            )
+            """,
+        )
+    ),
+    Migration(
+        version=8,
+        description="Persistent Spotify metadata cache",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS spotify_metadata (
+                kind VARCHAR(16) NOT NULL,
+                lookup_key VARCHAR(512) NOT NULL,
+                found BOOLEAN NOT NULL,
+                spotify_id VARCHAR(64) NULL,
+                image_url VARCHAR(512) NULL,
+                genres TEXT NULL,
+                fetched_at DATETIME NOT NULL,
+                PRIMARY KEY (kind, lookup_key)
+            )
+            """,
+        ),
+        sqlite=(
+            """
+            CREATE TABLE IF NOT EXISTS spotify_metadata (
+                kind TEXT NOT NULL,
+                lookup_key TEXT NOT NULL,
+                found INTEGER NOT NULL,
+                spotify_id TEXT NULL,
+                image_url TEXT NULL,
+                genres TEXT NULL,
+                fetched_at DATETIME NOT NULL,
+                PRIMARY KEY (kind, lookup_key)
+            ) WITHOUT ROWID
+            """,
+        )
+    ),
+    Migration(
+        version=9,
+        description="Store Spotify ids on tracks and artists",
+        mysql=(
+            "ALTER TABLE artists ADD COLUMN spotify_id VARCHAR(64) NULL",
+            "ALTER TABLE tracks ADD COLUMN spotify_id VARCHAR(64) NULL",
+        ),
+        sqlite=(
+            "ALTER TABLE artists ADD COLUMN spotify_id TEXT NULL",
+            "ALTER TABLE tracks ADD COLUMN spotify_id TEXT NULL",
+        )
+    ),
+    Migration(
+        version=10,
+        description="Artist genres and hourly genre rollup",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS genres (
+                id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                UNIQUE KEY uq_genre_name (name)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS artist_genres (
+                artist_id INT UNSIGNED NOT NULL,
+                genre_id INT UNSIGNED NOT NULL,
+                PRIMARY KEY (artist_id, genre_id),
+                KEY ix_artist_genres_genre (genre_id)
+            )
+            """,
+            "ALTER TABLE artists ADD COLUMN genres_fetched_at DATETIME NULL",
+            """
+            CREATE TABLE IF NOT EXISTS hourly_genre_totals (
+                hour_start DATETIME NOT NULL,
+                genre_id INT UNSIGNED NOT NULL,
+                total_seconds DOUBLE NOT NULL,
+                PRIMARY KEY (hour_start, genre_id)
+            )
+            """,
+        ),
+        sqlite=(
+            """
+            CREATE TABLE IF NOT EXISTS genres (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS artist_genres (
+                artist_id INTEGER NOT NULL,
+                genre_id INTEGER NOT NULL,
+                PRIMARY KEY (artist_id, genre_id)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_artist_genres_genre ON artist_genres (genre_id)",
+            "ALTER TABLE artists ADD COLUMN genres_fetched_at DATETIME NULL",
+            """
+            CREATE TABLE IF NOT EXISTS hourly_genre_totals (
+                hour_start DATETIME NOT NULL,
+                genre_id INTEGER NOT NULL,
+                total_seconds REAL NOT NULL,
+                PRIMARY KEY (hour_start, genre_id)
+            ) WITHOUT ROWID
+            """,
+        )
+    ),
+    Migration(
+        version=11,
+        description="Tracker state for recently-played backfill",
+        mysql=(
+            """
+            CREATE TABLE IF NOT EXISTS tracker_state (
+                name VARCHAR(64) NOT NULL PRIMARY KEY,
+                value VARCHAR(255) NOT NULL,
+                updated_at DATETIME NOT NULL
+            )
+            """,
+        ),
+        sqlite=(
+            """
+            CREATE TABLE IF NOT EXISTS tracker_state (
+                name TEXT NOT NULL PRIMARY KEY,
+                value TEXT NOT NULL,
+                updated_at DATETIME NOT NULL
+            )
+            """,
+        )
+    ),
+    Migration(
+        version=12,
+        description="Drop archived_totals, the hourly rollups keep archived listening",
+        mysql=(
+            "DROP TABLE IF EXISTS archived_totals",
+        ),
+        sqlite=(
+            "DROP TABLE IF EXISTS archived_totals",
+        )
+    ),
+]
+
+
+@ensure_cursor
+def get_schema_version(*, cursor: Cursor = None) -> int:
+    """
+    Retrieve the highest applied migration version.
+
+    :param cursor: Database cursor.
+    :return: The current schema version, or 0 if no migration has run.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    (version,) = cursor.fetchone()
+    return version
+
+
+@ensure_cursor
+def migrate(*, cursor: Cursor = None) -> int:
+    """
+    Apply every pending migration in version order.
+
+    Each migration is recorded in `schema_migrations` once its statements
+    have run, so it is never applied twice.
+
+    :param cursor: Database cursor.
+    :return: The schema version after migrating.
+    """
+    current = get_schema_version(cursor=cursor)
+    backend = get_backend().name
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+
+        for statement in migration.statements(backend):
+            if callable(statement):
+                statement(cursor)
+            else:
+                cursor.execute(statement)
+
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (migration.version, migration.description)
+        )
+        current = migration.version
+
+    return current
+
+
+if __name__ == '__main__':
+    logger.info(f"Schema is at version {migrate()}")
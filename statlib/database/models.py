@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
 
@@ -12,12 +12,37 @@ class ListeningEntry:
     :param track_name: Name of the track being listened to.
     :param artist_name: Name of the artist associated with the track.
     :param duration: Duration listened during this entry, in seconds.
+    :param ended_at: When the listening session ended, or None for legacy per-poll rows.
     """
     id: int
     timestamp: datetime
     track_name: str
     artist_name: str
     duration: int
+    ended_at: datetime | None = None
+
+
+
+@dataclass
+class ListeningSession:
+    """
+    An open, not yet persisted stretch of continuous playback of one track.
+
+    :param track_name: Name of the track being listened to.
+    :param artist_name: Name of the artist associated with the track.
+    :param started_at: When playback of the session started.
+    :param ended_at: When playback was last observed.
+    :param duration: Seconds listened so far.
+    :param track_spotify_id: Spotify id of the track, when known.
+    :param artist_spotify_id: Spotify id of the artist, when known.
+    """
+    track_name: str
+    artist_name: str
+    started_at: datetime
+    ended_at: datetime
+    duration: float = 0
+    track_spotify_id: str | None = None
+    artist_spotify_id: str | None = None
 
 
 
@@ -45,6 +70,19 @@ class TopArtist:
 
 
 
+@dataclass
+class TopGenre:
+    """
+    Represents a genre ranked by total listening time.
+
+    :param genre_name: Name of the genre.
+    :param total_seconds: Total seconds listened to artists of this genre.
+    """
+    genre_name: str
+    total_seconds: float
+
+
+
 @dataclass
 class TopTrack:
     """
@@ -52,6 +90,48 @@ class TopTrack:
 
     :param track_name: Name of the track.
     :param total_seconds: Total seconds listened to this track.
+    :param artist_name: Name of the track's artist, when known.
     """
     track_name: str
-    total_seconds: int
\ No newline at end of file
+    total_seconds: int
+    artist_name: str | None = None
+
+
+
+@dataclass
+class PeriodReport:
+    """
+    Everything a period command displays, computed from a single scan.
+
+    :param total_seconds: Total number of seconds listened in the period.
+    :param top_tracks: Tracks ranked by listening time within the period.
+    :param top_artists: Artists ranked by listening time within the period.
+    :param breakdown: Minutes listened per bucket (hour, weekday, day or month).
+    """
+    total_seconds: int
+    top_tracks: list[TopTrack]
+    top_artists: list[TopArtist]
+    breakdown: list[int]
+
+
+
+@dataclass
+class SpotifyMetadata:
+    """
+    Spotify metadata for an artist or track, cached persistently.
+
+    :param kind: Either 'artist' or 'track'.
+    :param key: Normalized lookup key, see `statlib.metadata.metadata_key`.
+    :param found: Whether Spotify returned a match; misses are cached too.
+    :param spotify_id: Spotify id of the match.
+    :param image_url: Artist image or album artwork URL.
+    :param genres: Artist genres, empty for tracks.
+    :param fetched_at: When the metadata was fetched from Spotify.
+    """
+    kind: str
+    key: str
+    found: bool
+    spotify_id: str | None = None
+    image_url: str | None = None
+    genres: list[str] = field(default_factory=list)
+    fetched_at: datetime | None = None
@@ -0,0 +1,158 @@
+import calendar
+from enum import Enum
+from typing import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+
+def _start_of_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _start_of_month(moment: datetime) -> datetime:
+    return _start_of_day(moment).replace(day=1)
+
+
+def _next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+@dataclass(frozen=True)
+class Period:
+    """
+    A half-open time range [start, end) used to filter listening data.
+
+    Boundaries are computed in Python so queries can compare the raw
+    `timestamp` column (`timestamp >= start AND timestamp < end`) and use
+    an index range scan instead of wrapping the column in a function.
+
+    :param start: Inclusive lower bound.
+    :param end: Exclusive upper bound.
+    """
+    start: datetime
+    end: datetime
+
+
+    @classmethod
+    def today(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the current day.
+        """
+        start = _start_of_day(now or datetime.now())
+        return cls(start, start + timedelta(days=1))
+
+
+    @classmethod
+    def yesterday(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the previous day.
+        """
+        end = _start_of_day(now or datetime.now())
+        return cls(end - timedelta(days=1), end)
+
+
+    @classmethod
+    def this_week(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the current Monday-based week.
+        """
+        today = _start_of_day(now or datetime.now())
+        start = today - timedelta(days=today.weekday())
+        return cls(start, start + timedelta(weeks=1))
+
+
+    @classmethod
+    def last_week(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the previous Monday-based week.
+        """
+        end = cls.this_week(now).start
+        return cls(end - timedelta(weeks=1), end)
+
+
+    @classmethod
+    def this_month(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the current calendar month.
+        """
+        start = _start_of_month(now or datetime.now())
+        return cls(start, _next_month(start))
+
+
+    @classmethod
+    def last_month(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the previous calendar month.
+        """
+        end = _start_of_month(now or datetime.now())
+        return cls(_start_of_month(end - timedelta(days=1)), end)
+
+
+    @classmethod
+    def year(cls, year: int) -> 'Period':
+        """
+        :param year: Calendar year.
+        :return: Period covering the given calendar year.
+        """
+        return cls(datetime(year, 1, 1), datetime(year + 1, 1, 1))
+
+
+    @classmethod
+    def this_year(cls, now: datetime | None = None) -> 'Period':
+        """
+        :param now: Reference time, defaults to the current local time.
+        :return: Period covering the current calendar year.
+        """
+        return cls.year((now or datetime.now()).year)
+
+
+    @classmethod
+    def months(cls, first: datetime, last: datetime) -> Iterator['Period']:
+        """
+        Iterate over the calendar months spanning two points in time.
+
+        :param first: Any moment in the first month.
+        :param last: Any moment in the last month.
+        :return: Iterator of monthly Periods, oldest first.
+        """
+        period = cls.this_month(first)
+        while period.start <= last:
+            yield period
+            period = cls.this_month(period.end)
+
+
+class Granularity(Enum):
+    """
+    Bucket size used when breaking a period down for charts.
+
+    Each value is the SQL expression mapping an hour bucket to a
+    zero-based bucket index.
+    """
+    HOUR = "HOUR(hour_start)"
+    WEEKDAY = "WEEKDAY(hour_start)"
+    DAY = "DAY(hour_start) - 1"
+    MONTH = "MONTH(hour_start) - 1"
+
+
+    def bucket_count(self, period: Period) -> int:
+        """
+        Number of buckets needed to cover a period.
+
+        :param period: The period being broken down.
+        :return: 24 for hours, 7 for weekdays, the month length for days, 12 for months.
+        """
+        if self is Granularity.HOUR:
+            return 24
+        if self is Granularity.WEEKDAY:
+            return 7
+        if self is Granularity.DAY:
+            return calendar.monthrange(period.start.year, period.start.month)[1]
+        return 12
@@ -0,0 +1,201 @@
+import os
+import time
+import functools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+
+ALL_TIME_STALENESS: float = float(os.getenv('DBCACHESTALE', 5))
+
+_MISSING = object()
+
+
+@dataclass
+class ResultCacheStats:
+    """
+    Counters describing the query-result cache.
+
+    :param entries: Results currently cached.
+    :param generation: Current write generation.
+    :param hits: Lookups answered from a result of the current generation.
+    :param stale_hits: Lookups answered from an older generation within the staleness budget.
+    :param misses: Lookups that ran the query.
+    """
+    entries: int
+    generation: int
+    hits: int
+    stale_hits: int
+    misses: int
+
+
+@dataclass(frozen=True)
+class _Entry:
+    generation: int
+    stored_at: float
+    value: Any
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of handler results, invalidated by a write generation.
+
+    Every committed write to listening data bumps the generation. A cached
+    result is fresh while its generation is current; results of an older
+    generation are only served by callers that allow a staleness budget,
+    and only while younger than that budget.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """
+        :param max_entries: Results kept before the least recently used is evicted.
+        """
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+
+
+    @property
+    def generation(self) -> int:
+        """
+        The current write generation.
+        """
+        return self._generation
+
+
+    def bump(self) -> None:
+        """
+        Mark every cached result as outdated. Call after a write commits.
+        """
+        with self._lock:
+            self._generation += 1
+
+
+    def get(self, key: Hashable, max_stale: float = 0) -> Any:
+        """
+        Look up a result.
+
+        :param key: Cache key.
+        :param max_stale: Seconds an outdated result may still be served.
+        :return: The cached value, or `_MISSING`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                if entry.generation == self._generation:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.value
+
+                if time.monotonic() - entry.stored_at <= max_stale:
+                    self._entries.move_to_end(key)
+                    self._stale_hits += 1
+                    return entry.value
+
+            self._misses += 1
+            return _MISSING
+
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        """
+        Store a result computed while `generation` was current.
+
+        Results computed before the latest write are not stored, since the
+        query may not have seen it.
+
+        :param key: Cache key.
+        :param generation: Generation read before the query ran.
+        :param value: The result.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._entries[key] = _Entry(generation, time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def clear(self) -> None:
+        """
+        Drop every cached result.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+    def stats(self) -> ResultCacheStats:
+        """
+        Return a snapshot of the cache counters.
+
+        :return: ResultCacheStats instance.
+        """
+        with self._lock:
+            return ResultCacheStats(
+                entries=len(self._entries),
+                generation=self._generation,
+                hits=self._hits,
+                stale_hits=self._stale_hits,
+                misses=self._misses
+            )
+
+
+result_cache: ResultCache = ResultCache()
+
+
+def cached_result(max_stale: float = 0):
+    """
+    Decorator caching the result of an `ensure_cursor` handler method.
+
+    Results are keyed by the method's qualified name and its arguments,
+    excluding `cursor`; methods should take a `Period` rather than computing
+    one, so period boundaries are part of the key. The awaitable `.aio`
+    variant shares the same cache and only dispatches to the executor on a miss.
+
+    :param max_stale: Seconds a result may be served after a newer write.
+    :return: Decorator.
+    """
+    def decorator(func):
+        name = func.__qualname__
+
+        def key_of(args: tuple, kwargs: dict) -> Hashable:
+            return name, args, tuple(sorted((k, v) for k, v in kwargs.items() if k != 'cursor'))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = key_of(args, kwargs)
+            value = result_cache.get(key, max_stale)
+            if value is not _MISSING:
+                return value
+
+            generation = result_cache.generation
+            value = func(*args, **kwargs)
+            result_cache.put(key, generation, value)
+            return value
+
+        @functools.wraps(func.aio)
+        async def aio(*args, **kwargs):
+            key = key_of(args, kwargs)
+            value = result_cache.get(key, max_stale)
+            if value is not _MISSING:
+                return value
+
+            generation = result_cache.generation
+            value = await func.aio(*args, **kwargs)
+            result_cache.put(key, generation, value)
+            return value
+
+        wrapper.aio = aio
+        return wrapper
+
+    return decorator
@@ -0,0 +1,329 @@
+import threading
+from datetime import datetime
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from statlib.logging import logger
+from statlib.database.connection import Cursor, ensure_cursor
+from statlib.database.models import PeriodReport, TimeSummary, TopArtist, TopTrack
+from statlib.database.periods import Period, Granularity
+
+
+FETCH_SIZE: int = 50_000
+NAME_CHUNK: int = 500
+
+
+@dataclass(frozen=True)
+class _Columns:
+    """
+    One immutable generation of the snapshot, sorted by timestamp.
+    """
+    timestamps: np.ndarray
+    durations: np.ndarray
+    track_ids: np.ndarray
+    artist_ids: np.ndarray
+
+
+def _empty_columns() -> _Columns:
+    return _Columns(
+        timestamps=np.empty(0, dtype='datetime64[us]'),
+        durations=np.empty(0, dtype=np.float64),
+        track_ids=np.empty(0, dtype=np.int64),
+        artist_ids=np.empty(0, dtype=np.int64)
+    )
+
+
+def _totals(ids: np.ndarray, durations: np.ndarray) -> np.ndarray:
+    """
+    Seconds listened per id.
+    """
+    return np.bincount(ids, weights=durations).astype(np.float64, copy=False)
+
+
+def _top(totals: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Indices of the `limit` largest non-zero totals, largest first.
+    """
+    candidates = np.flatnonzero(totals)
+    if limit <= 0 or not len(candidates):
+        return candidates[:0]
+
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(totals[candidates], -limit)[-limit:]]
+
+    return candidates[np.argsort(-totals[candidates], kind='stable')]
+
+
+def _buckets(timestamps: np.ndarray, granularity: Granularity) -> np.ndarray:
+    """
+    Zero-based breakdown bucket of every timestamp, matching `Granularity`.
+    """
+    days = timestamps.astype('datetime64[D]')
+
+    if granularity is Granularity.HOUR:
+        return (timestamps.astype('datetime64[h]') - days).astype(np.int64)
+    if granularity is Granularity.WEEKDAY:
+        # 1970-01-01 was a Thursday (weekday 3).
+        return (days.astype(np.int64) + 3) % 7
+    if granularity is Granularity.DAY:
+        return (days - days.astype('datetime64[M]')).astype(np.int64)
+    return days.astype('datetime64[M]').astype(np.int64) % 12
+
+
+class ListeningSnapshot:
+    """
+    In-memory columnar copy of `listening_data` for a single listener.
+
+    The full history is loaded once, then only rows with an id above the
+    last one seen are appended, so each refresh costs one indexed range read.
+    Statistics are computed with vectorized NumPy operations over the
+    period's slice and never touch the database.
+
+    `ListeningHandler.insert_entries` calls `invalidate` when it merges into
+    existing rows, so the next refresh reloads everything; any other writer
+    that updates or deletes rows must do the same. Archiving is detected
+    automatically and rows of archived months are left out, so periods
+    reaching into them are answered from the rollups instead.
+
+    All-time rankings are served by `leaderboards`, not the snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._columns = _empty_columns()
+        self._last_id = 0
+        self._loaded = False
+        self._stale = False
+        self._lock = threading.Lock()
+
+        self.archived_before: datetime | None = None
+
+        self.track_names: dict[int, tuple[str, str]] = {}
+        self.artist_names: dict[int, str] = {}
+
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the snapshot holds the full history and can answer queries.
+        """
+        return self._loaded
+
+
+    def __len__(self) -> int:
+        return len(self._columns.timestamps)
+
+
+    def covers(self, period: Period) -> bool:
+        """
+        Whether the snapshot can answer queries about a period.
+
+        :param period: Period about to be queried.
+        :return: False before the first load or for periods reaching into archived months.
+        """
+        return self._loaded and (self.archived_before is None or period.start >= self.archived_before)
+
+
+    def invalidate(self) -> None:
+        """
+        Force the next refresh to reload the full history.
+        """
+        self._stale = True
+
+
+    def refresh(self, cursor: Cursor) -> int:
+        """
+        Load listening rows added since the last refresh.
+
+        :param cursor: Database cursor.
+        :return: Number of rows loaded.
+        """
+        with self._lock:
+            cursor.execute("SELECT month_end FROM archived_months ORDER BY month_start DESC LIMIT 1")
+            row = cursor.fetchone()
+            archived_before = row[0] if row else None
+
+            columns, last_id = self._columns, self._last_id
+            if self._stale or archived_before != self.archived_before:
+                columns, last_id = _empty_columns(), 0
+
+            query = "SELECT id, timestamp, track_id, artist_id, duration FROM listening_data WHERE id > %s"
+            args = [last_id]
+            if archived_before is not None:
+                query += " AND timestamp >= %s"
+                args.append(archived_before)
+
+            cursor.execute(query + " ORDER BY id", args)
+
+            chunks = []
+            while rows := cursor.fetchmany(FETCH_SIZE):
+                ids, timestamps, track_ids, artist_ids, durations = zip(*rows)
+                last_id = ids[-1]
+                chunks.append((
+                    np.array(timestamps, dtype='datetime64[us]'),
+                    np.array(durations, dtype=np.float64),
+                    np.array(track_ids, dtype=np.int64),
+                    np.array(artist_ids, dtype=np.int64)
+                ))
+
+            # Dimension rows are committed before the facts that reference them,
+            # so every id fetched above can be resolved now. Ids are not
+            # committed in order, so look up the missing ones rather than
+            # everything above the highest known id.
+            if chunks:
+                track_ids = np.unique(np.concatenate([chunk[2] for chunk in chunks]))
+                artist_ids = np.unique(np.concatenate([chunk[3] for chunk in chunks]))
+                self._load_names(track_ids, artist_ids, cursor)
+
+            self._columns = self._append(columns, chunks) if chunks else columns
+            self._last_id = last_id
+            self.archived_before = archived_before
+            self._stale = False
+            self._loaded = True
+
+            return sum(len(chunk[0]) for chunk in chunks)
+
+
+    def _load_names(self, track_ids: np.ndarray, artist_ids: np.ndarray, cursor: Cursor) -> None:
+        """
+        Load the names of the given tracks and artists that are not known yet.
+        """
+        missing = [int(artist_id) for artist_id in artist_ids if artist_id not in self.artist_names]
+        for i in range(0, len(missing), NAME_CHUNK):
+            chunk = missing[i:i + NAME_CHUNK]
+            cursor.execute(
+                f"SELECT id, name FROM artists WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                chunk
+            )
+            self.artist_names.update(cursor.fetchall())
+
+        missing = [int(track_id) for track_id in track_ids if track_id not in self.track_names]
+        for i in range(0, len(missing), NAME_CHUNK):
+            chunk = missing[i:i + NAME_CHUNK]
+            cursor.execute(
+                f"""
+                SELECT t.id, t.name, a.name
+                FROM tracks t
+                JOIN artists a ON a.id = t.artist_id
+                WHERE t.id IN ({', '.join(['%s'] * len(chunk))})
+                """,
+                chunk
+            )
+            for track_id, track_name, artist_name in cursor.fetchall():
+                self.track_names[track_id] = (track_name, artist_name)
+
+
+    @staticmethod
+    def _append(columns: _Columns, chunks: list[tuple[np.ndarray, ...]]) -> _Columns:
+        """
+        Build the next generation from the current columns plus new chunks,
+        keeping rows ordered by timestamp.
+        """
+        timestamps, durations, track_ids, artist_ids = (
+            np.concatenate([current, *parts])
+            for current, parts in zip(
+                (columns.timestamps, columns.durations, columns.track_ids, columns.artist_ids),
+                zip(*chunks)
+            )
+        )
+
+        if len(timestamps) > 1 and (np.diff(timestamps) < np.timedelta64(0)).any():
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, durations = timestamps[order], durations[order]
+            track_ids, artist_ids = track_ids[order], artist_ids[order]
+
+        return replace(
+            columns,
+            timestamps=timestamps,
+            durations=durations,
+            track_ids=track_ids,
+            artist_ids=artist_ids
+        )
+
+
+    def _slice(self, period: Period) -> _Columns:
+        columns = self._columns
+        lo, hi = np.searchsorted(
+            columns.timestamps,
+            np.array([period.start, period.end], dtype='datetime64[us]')
+        )
+        return replace(
+            columns,
+            timestamps=columns.timestamps[lo:hi],
+            durations=columns.durations[lo:hi],
+            track_ids=columns.track_ids[lo:hi],
+            artist_ids=columns.artist_ids[lo:hi]
+        )
+
+
+    def _top_tracks(self, columns: _Columns, limit: int) -> list[TopTrack]:
+        totals = _totals(columns.track_ids, columns.durations)
+        tracks = []
+        for track_id in _top(totals, limit):
+            track_name, artist_name = self.track_names[track_id]
+            tracks.append(TopTrack(
+                track_name=track_name,
+                artist_name=artist_name,
+                total_seconds=float(totals[track_id])
+            ))
+        return tracks
+
+
+    def _top_artists(self, columns: _Columns, limit: int) -> list[TopArtist]:
+        totals = _totals(columns.artist_ids, columns.durations)
+        return [
+            TopArtist(artist_name=self.artist_names[artist_id], total_seconds=float(totals[artist_id]))
+            for artist_id in _top(totals, limit)
+        ]
+
+
+    def total(self, period: Period) -> TimeSummary:
+        """
+        Total listening time within a period.
+
+        :param period: Half-open time range to sum over.
+        :return: TimeSummary containing total seconds.
+        """
+        return TimeSummary(total_seconds=float(self._slice(period).durations.sum()))
+
+
+    def report(self, period: Period, granularity: Granularity, limit: int = 5) -> PeriodReport:
+        """
+        Total, top tracks, top artists and breakdown of a period, equivalent
+        to `ReportHandler.get_report`.
+
+        :param period: Half-open time range to report on.
+        :param granularity: Bucket size for the breakdown.
+        :param limit: Number of tracks and artists to rank.
+        :return: PeriodReport for the period.
+        """
+        columns = self._slice(period)
+        breakdown = np.bincount(
+            _buckets(columns.timestamps, granularity),
+            weights=columns.durations,
+            minlength=granularity.bucket_count(period)
+        )
+
+        return PeriodReport(
+            total_seconds=float(columns.durations.sum()),
+            top_tracks=self._top_tracks(columns, limit),
+            top_artists=self._top_artists(columns, limit),
+            breakdown=[round(seconds / 60) for seconds in breakdown.tolist()]
+        )
+
+
+listening_snapshot: ListeningSnapshot = ListeningSnapshot()
+
+
+@ensure_cursor
+def refresh_snapshot(*, cursor: Cursor = None) -> int:
+    """
+    Bring the shared listening snapshot up to date with the database.
+
+    :param cursor: Database cursor.
+    :return: Number of rows loaded.
+    """
+    loaded = listening_snapshot.refresh(cursor)
+    if loaded:
+        logger.debug(f"Snapshot loaded {loaded} rows ({len(listening_snapshot)} total)")
+    return loaded
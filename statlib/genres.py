@@ -0,0 +1,108 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable
+
+from statlib.api import Priority
+from statlib.metadata import BATCH_SIZE, metadata_key, metadata_store
+
+
+@dataclass
+class GenreProgress:
+    """
+    Genre ranking after some of the artists have been resolved.
+
+    :param ranking: Top genres with their listening time so far, highest first.
+    :param resolved: Artists resolved so far.
+    :param artists: Artists to resolve in total.
+    :param remaining_seconds: Listening time of the artists not resolved yet;
+        no genre can gain more than this.
+    :param settled: Whether the remaining artists can no longer change the ranking's order.
+    """
+    ranking: list[tuple[str, float]]
+    resolved: int
+    artists: int
+    remaining_seconds: float
+    settled: bool
+
+
+def _settled(ranking: list[tuple[str, float]], limit: int, remaining: float) -> bool:
+    """
+    Whether no genre can overtake another within the top `limit` by gaining
+    up to `remaining` seconds. `ranking` holds at least `limit + 1` genres when available.
+    """
+    if remaining <= 0:
+        return True
+    if len(ranking) < limit:
+        return False
+
+    for i in range(limit):
+        below = ranking[i + 1][1] if i + 1 < len(ranking) else 0.0
+        if ranking[i][1] - below <= remaining:
+            return False
+    return True
+
+
+async def aggregate_genres(
+    artist_totals: Iterable[tuple[str, float]],
+    *,
+    limit: int = 10,
+    chunk_size: int = BATCH_SIZE,
+    concurrency: int = 4,
+    priority: Priority = Priority.BACKGROUND
+) -> AsyncIterator[GenreProgress]:
+    """
+    Rank genres by listening time, resolving artist genres concurrently.
+
+    Artists are resolved in chunks, most listened first, with at most
+    `concurrency` chunks in flight. A progress update is yielded after every
+    chunk, and resolution stops early once the listening time of the
+    unresolved artists can no longer change the top `limit`.
+
+    :param artist_totals: (artist name, seconds) pairs.
+    :param limit: Number of genres to rank.
+    :param chunk_size: Artists resolved per chunk.
+    :param concurrency: Chunks resolved at the same time.
+    :param priority: Priority class of the Spotify requests.
+    :return: Async iterator of progress updates; the last one is settled
+        unless every artist was resolved first.
+    """
+    artist_totals = sorted(artist_totals, key=lambda pair: pair[1], reverse=True)
+    await metadata_store.preload('artist', [metadata_key(artist) for artist, _ in artist_totals])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(chunk: list[tuple[str, float]]):
+        async with semaphore:
+            return chunk, await metadata_store.artists([artist for artist, _ in chunk], priority)
+
+    tasks = [
+        asyncio.create_task(resolve(artist_totals[i:i + chunk_size]))
+        for i in range(0, len(artist_totals), chunk_size)
+    ]
+
+    genres: dict[str, float] = defaultdict(float)
+    remaining = sum(seconds for _, seconds in artist_totals)
+    resolved = 0
+
+    try:
+        for next_chunk in asyncio.as_completed(tasks):
+            chunk, metadata = await next_chunk
+
+            for artist, seconds in chunk:
+                remaining -= seconds
+                resolved += 1
+                for genre in metadata[artist].genres if artist in metadata else []:
+                    genres[genre] += seconds
+
+            ranking = sorted(genres.items(), key=lambda pair: pair[1], reverse=True)[:limit + 1]
+            settled = resolved == len(artist_totals) or _settled(ranking, limit, remaining)
+
+            yield GenreProgress(ranking[:limit], resolved, len(artist_totals), max(remaining, 0.0), settled)
+
+            if settled:
+                return
+
+    finally:
+        for task in tasks:
+            task.cancel()
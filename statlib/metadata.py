@@ -0,0 +1,296 @@
+import os
+import asyncio
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+from urllib.parse import quote
+
+from dotenv import load_dotenv; load_dotenv()
+
+from statlib.logging import logger
+from statlib.api import MISSING, Priority, TTLCache, spotify_request
+from statlib.database.models import SpotifyMetadata
+from statlib.database.handlers import DimensionHandler, MetadataHandler
+
+
+METADATA_TTL: timedelta = timedelta(days=float(os.getenv('METADATATTLDAYS', 30)))
+NEGATIVE_TTL: timedelta = timedelta(days=float(os.getenv('METADATANEGATIVEDAYS', 1)))
+STALE_TTL: timedelta = timedelta(days=365)
+BATCH_SIZE: int = 50
+
+
+def metadata_key(*names: str) -> str:
+    """
+    Build a lookup key that is the same for differently cased or spaced
+    spellings of a name.
+
+    :param names: Name parts, e.g. (track name, artist name).
+    :return: Normalized key.
+    """
+    return '\x1f'.join(' '.join(unicodedata.normalize('NFKC', name).casefold().split()) for name in names)
+
+
+def _search_endpoint(query: str, kind: str) -> str:
+    return f"/v1/search?q={quote(query, safe='')}&type={kind}&limit=1"
+
+
+def _search_query(kind: str, name: str | tuple[str, str]) -> str:
+    if kind == 'artist':
+        return name
+    track_name, artist_name = name
+    return f"{track_name} artist:{artist_name}"
+
+
+def _entry(kind: str, key: str, item: dict[str, Any] | None, fetched_at: datetime) -> SpotifyMetadata:
+    """
+    Build metadata from a Spotify artist or track object, or a miss from None.
+    """
+    entry = SpotifyMetadata(kind=kind, key=key, found=item is not None, fetched_at=fetched_at)
+
+    if item is not None:
+        images = item.get("images") if kind == 'artist' else item.get("album", {}).get("images")
+        entry.spotify_id = item.get("id")
+        entry.image_url = images[0]["url"] if images else None
+        entry.genres = item.get("genres") or []
+
+    return entry
+
+
+class MetadataStore:
+    """
+    Artist images, genres and album art, cached in memory and in the
+    `spotify_metadata` table.
+
+    Matches are kept for `METADATA_TTL` and misses for `NEGATIVE_TTL`, so
+    repeat lookups make no Spotify calls. An expired entry is still returned
+    while it is refreshed in the background; only names never looked up
+    before wait on Spotify. A failed request is not cached.
+
+    Names whose Spotify id is known, recorded by the tracker or from an
+    earlier lookup, are resolved through the batch endpoints, 50 per request.
+    Only the rest fall back to one search per name.
+
+    :param max_entries: Entries kept in memory.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._memory = TTLCache(max_entries=max_entries)
+
+
+    @staticmethod
+    def _ttl(entry: SpotifyMetadata) -> timedelta:
+        return METADATA_TTL if entry.found else NEGATIVE_TTL
+
+
+    def _remember(self, entry: SpotifyMetadata) -> None:
+        fresh_for = (entry.fetched_at + self._ttl(entry) - datetime.now()).total_seconds()
+        self._memory.set((entry.kind, entry.key), entry, max(fresh_for, 0), STALE_TTL.total_seconds())
+
+
+    async def _store(self, entries: list[SpotifyMetadata]) -> None:
+        for entry in entries:
+            self._remember(entry)
+
+        if not entries:
+            return
+
+        try:
+            await MetadataHandler.put_metadata.aio(entries)
+        except Exception as error:
+            logger.warning(f"Could not store {len(entries)} metadata entries: {error}")
+
+
+    async def preload(self, kind: str, keys: Iterable[str]) -> None:
+        """
+        Load stored entries for many keys into memory with one query.
+
+        :param kind: Either 'artist' or 'track'.
+        :param keys: Normalized lookup keys.
+        """
+        missing = [key for key in set(keys) if self._memory.lookup((kind, key))[0] is MISSING]
+        if not missing:
+            return
+
+        try:
+            stored = await MetadataHandler.get_metadata.aio(kind, missing)
+        except Exception as error:
+            logger.warning(f"Could not load {kind} metadata: {error}")
+            return
+
+        for entry in stored.values():
+            self._remember(entry)
+
+
+    async def _search(self, kind: str, key: str, query: str, priority: Priority) -> SpotifyMetadata | None:
+        data = await spotify_request(_search_endpoint(query, kind), priority=priority)
+        if data is None:
+            return None
+
+        items = data.get(f"{kind}s", {}).get("items", [])
+        entry = _entry(kind, key, items[0] if items else None, datetime.now())
+
+        await self._store([entry])
+        return entry
+
+
+    @staticmethod
+    async def _fetch_by_ids(kind: str, spotify_ids: Iterable[str], priority: Priority) -> dict[str, dict]:
+        """
+        Fetch Spotify objects through `/v1/artists?ids=` or `/v1/tracks?ids=`.
+
+        :return: Mapping of Spotify id to object, for the ids Spotify returned.
+        """
+        spotify_ids = sorted(set(spotify_ids))
+        responses = await asyncio.gather(*(
+            spotify_request(f"/v1/{kind}s?ids={','.join(spotify_ids[i:i + BATCH_SIZE])}", priority=priority)
+            for i in range(0, len(spotify_ids), BATCH_SIZE)
+        ))
+
+        items = {}
+        for data in responses:
+            for item in (data or {}).get(f"{kind}s") or []:
+                if item:
+                    items[item["id"]] = item
+        return items
+
+
+    @staticmethod
+    async def _recorded_ids(kind: str, names: list) -> dict:
+        try:
+            if kind == 'artist':
+                return await DimensionHandler.get_artist_spotify_ids.aio(names)
+            return await DimensionHandler.get_track_spotify_ids.aio(names)
+
+        except Exception as error:
+            logger.warning(f"Could not load recorded {kind} ids: {error}")
+            return {}
+
+
+    async def _fetch(
+        self,
+        kind: str,
+        names: dict[str, str | tuple[str, str]],
+        known_ids: dict[str, str],
+        priority: Priority
+    ) -> dict[str, SpotifyMetadata]:
+        """
+        Fetch metadata from Spotify, by id where one is known and by search otherwise.
+
+        :param names: Mapping of lookup key to artist name or (track, artist) pair.
+        :param known_ids: Spotify ids already known for some keys.
+        :return: Mapping of lookup key to metadata, for the keys that could be fetched.
+        """
+        known_ids = dict(known_ids)
+        unknown = [key for key in names if key not in known_ids]
+        if unknown:
+            recorded = await self._recorded_ids(kind, [names[key] for key in unknown])
+            known_ids.update({key: recorded[names[key]] for key in unknown if names[key] in recorded})
+
+        items = await self._fetch_by_ids(kind, known_ids.values(), priority) if known_ids else {}
+
+        fetched_at = datetime.now()
+        found = {
+            key: _entry(kind, key, items[spotify_id], fetched_at)
+            for key, spotify_id in known_ids.items()
+            if spotify_id in items
+        }
+        await self._store(list(found.values()))
+
+        searched = await asyncio.gather(*(
+            self._search(kind, key, _search_query(kind, name), priority)
+            for key, name in names.items()
+            if key not in found
+        ))
+        found.update({entry.key: entry for entry in searched if entry is not None})
+
+        return found
+
+
+    async def _lookup(
+        self,
+        kind: str,
+        names: dict[str, str | tuple[str, str]],
+        priority: Priority
+    ) -> dict[str, SpotifyMetadata]:
+        await self.preload(kind, names)
+
+        result, missing, stale = {}, {}, {}
+        for key, name in names.items():
+            cached, fresh = self._memory.lookup((kind, key))
+
+            if cached is MISSING:
+                missing[key] = name
+                continue
+
+            result[key] = cached
+            if not fresh:
+                stale[key] = cached
+
+        if stale:
+            known_ids = {key: entry.spotify_id for key, entry in stale.items() if entry.spotify_id}
+            self._memory.refresh(
+                (kind, frozenset(stale)),
+                lambda: self._fetch(kind, {key: names[key] for key in stale}, known_ids, Priority.BACKGROUND)
+            )
+
+        if missing:
+            result.update(await self._fetch(kind, missing, {}, priority))
+
+        return result
+
+
+    async def artists(
+        self,
+        artist_names: Iterable[str],
+        priority: Priority = Priority.INTERACTIVE
+    ) -> dict[str, SpotifyMetadata]:
+        """
+        :param artist_names: Names of the artists.
+        :param priority: Priority class of any Spotify requests needed.
+        :return: Mapping of artist name to metadata, for the artists that could be fetched.
+        """
+        keys = {name: metadata_key(name) for name in artist_names}
+        found = await self._lookup('artist', {key: name for name, key in keys.items()}, priority)
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+
+    async def tracks(
+        self,
+        pairs: Iterable[tuple[str, str]],
+        priority: Priority = Priority.INTERACTIVE
+    ) -> dict[tuple[str, str], SpotifyMetadata]:
+        """
+        :param pairs: (track name, artist name) tuples.
+        :param priority: Priority class of any Spotify requests needed.
+        :return: Mapping of (track name, artist name) to metadata, for the tracks that could be fetched.
+        """
+        keys = {pair: metadata_key(*pair) for pair in pairs}
+        found = await self._lookup('track', {key: pair for pair, key in keys.items()}, priority)
+        return {pair: found[key] for pair, key in keys.items() if key in found}
+
+
+    async def artist(self, artist_name: str, priority: Priority = Priority.INTERACTIVE) -> SpotifyMetadata | None:
+        """
+        :param artist_name: Name of the artist.
+        :param priority: Priority class of any Spotify request needed.
+        :return: The artist's metadata, or None if it could not be fetched.
+        """
+        return (await self.artists([artist_name], priority)).get(artist_name)
+
+
+    async def track(
+        self,
+        track_name: str,
+        artist_name: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> SpotifyMetadata | None:
+        """
+        :param track_name: Name of the track.
+        :param artist_name: Name of the track's artist.
+        :param priority: Priority class of any Spotify request needed.
+        :return: The track's metadata, or None if it could not be fetched.
+        """
+        return (await self.tracks([(track_name, artist_name)], priority)).get((track_name, artist_name))
+
+
+metadata_store: MetadataStore = MetadataStore()